@@ -1,51 +1,133 @@
+"""
+Histórico de conversas de um usuário
+
+GET /history/<user_id>?limit=20&cursor=...&since=2025-03-01T00:00:00&order=asc
+
+- Últimas `limit` conversas (padrão 20, máximo 100), da mais antiga para a
+  mais recente como antes; `order=desc` inverte a ordem dentro da página
+- `next_cursor` leva à página seguinte (conversas mais antigas). O cursor é
+  composto (timestamp + quantas conversas com esse timestamp já saíram),
+  então turnos gravados no mesmo instante não se perdem entre páginas
+- `since` (ISO 8601) retorna só conversas posteriores ao timestamp
+- A página é montada inteira antes do primeiro byte: um erro na leitura
+  vira 500, nunca um JSON truncado com 200
+- ETag calculado a partir da listagem dos segmentos: com If-None-Match
+  igual, responde 304 sem baixar nenhuma conversa
+"""
+
 from http.server import BaseHTTPRequestHandler
+import base64
+import hashlib
 import json
 import sys
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 sys.path.append('..')
-from vercel_storage import vercel_storage
+from src.services.storage.vercel_storage import vercel_storage
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+ORDER_ASC = "asc"
+ORDER_DESC = "desc"
+
+def encode_cursor(timestamp: str, skip: int) -> str:
+    raw = json.dumps([timestamp, skip]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, Optional[int]]:
+    """(timestamp, conversas já retornadas com esse timestamp); cursores antigos trazem só o timestamp"""
+    padding = "=" * (-len(cursor) % 4)
+    raw = base64.urlsafe_b64decode(cursor + padding).decode()
+    try:
+        timestamp, skip = json.loads(raw)
+        return str(timestamp), int(skip)
+    except (ValueError, TypeError):
+        return raw, None
 
 class handler(BaseHTTPRequestHandler):
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(json.dumps(payload, ensure_ascii=False).encode())
+    
     def do_GET(self):
         try:
             # Extrai user_id da URL
-            path_parts = self.path.split('/')
+            url = urlparse(self.path)
+            path_parts = url.path.split('/')
             if len(path_parts) >= 3 and path_parts[2].isdigit():
                 user_id = int(path_parts[2])
             else:
-                self.send_response(400)
-                self.send_header('Content-type', 'application/json')
+                self._send_json(400, {"error": "user_id required"})
+                return
+            
+            query = parse_qs(url.query)
+            try:
+                limit = int(query.get("limit", [DEFAULT_PAGE_SIZE])[0])
+                before, before_skip = decode_cursor(query["cursor"][0]) if "cursor" in query else (None, None)
+            except ValueError:
+                self._send_json(400, {"error": "invalid limit or cursor"})
+                return
+            limit = max(1, min(limit, MAX_PAGE_SIZE))
+            since = query.get("since", [None])[0]
+            order = query.get("order", [ORDER_ASC])[0]
+            if order not in (ORDER_ASC, ORDER_DESC):
+                self._send_json(400, {"error": "order must be asc or desc"})
+                return
+            
+            # Só a listagem é necessária para saber se o histórico mudou
+            segments = vercel_storage.list_conversation_segments(user_id)
+            version = vercel_storage.conversations_etag(segments)
+            etag = '"' + hashlib.sha1(
+                f"{version}|{limit}|{before}|{before_skip}|{since}|{order}".encode()
+            ).hexdigest() + '"'
+            
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
                 self.end_headers()
-                self.wfile.write(json.dumps({"error": "user_id required"}).encode())
                 return
             
-            # Busca conversas do usuário
-            conversations = vercel_storage.get_conversations(user_id) or []
+            # Da mais recente para a mais antiga; uma a mais indica que há outra página
+            conversations = []
+            for conversation in vercel_storage.iter_conversations(
+                    user_id, segments, before=before, since=since, before_skip=before_skip):
+                conversations.append(conversation)
+                if len(conversations) > limit:
+                    break
+            has_more = len(conversations) > limit
+            page = conversations[:limit]
             
-            # Retorna histórico
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+            next_cursor = None
+            if has_more and page:
+                oldest = page[-1].get("timestamp", "")
+                skip = sum(1 for conversation in page if conversation.get("timestamp", "") == oldest)
+                if oldest == before and before_skip is not None:
+                    skip += before_skip
+                next_cursor = encode_cursor(oldest, skip)
             
-            response_data = {
-                "user_id": user_id,
-                "conversations": conversations,
-                "total": len(conversations)
-            }
+            if order == ORDER_ASC:
+                page.reverse()
             
-            self.wfile.write(json.dumps(response_data, ensure_ascii=False, indent=2).encode())
+            self._send_json(200, {
+                "user_id": user_id,
+                "conversations": page,
+                "total": len(page),
+                "next_cursor": next_cursor
+            }, headers={'Access-Control-Allow-Origin': '*', 'ETag': etag})
             
         except Exception as e:
             print(f"Erro ao buscar histórico: {e}")
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": str(e)}).encode())
+            self._send_json(500, {"error": str(e)})
     
     def do_DELETE(self):
         try:
             # Extrai user_id da URL
-            path_parts = self.path.split('/')
+            path_parts = urlparse(self.path).path.split('/')
             if len(path_parts) >= 3 and path_parts[2].isdigit():
                 user_id = int(path_parts[2])
             else:
@@ -55,8 +137,8 @@ class handler(BaseHTTPRequestHandler):
                 self.wfile.write(json.dumps({"error": "user_id required"}).encode())
                 return
             
-            # Limpa histórico do usuário (armazena lista vazia)
-            success = vercel_storage.store_conversation(user_id, "", "")
+            # Remove o histórico do usuário
+            success = vercel_storage.delete_conversations(user_id)
             
             if success:
                 self.send_response(200)
@@ -1,132 +1,192 @@
-from http.server import BaseHTTPRequestHandler
+import asyncio
 import json
 import os
-import requests
 import sys
+import threading
+from collections import OrderedDict
 sys.path.append('..')
-from vercel_storage import vercel_storage
+from config.settings import settings
+from src.core.engine import answer, warm_up
+from src.services.storage.analytics_buffer import analytics_buffer
+from src.services.storage.vercel_storage import vercel_storage
+from src.services.telegram.bot_api import get_bot_client
 
-# Carrega as funções do chatbot
-def load_qa_data():
+# secret_token informado no setWebhook (opcional)
+WEBHOOK_SECRET = os.environ.get("TELEGRAM_WEBHOOK_SECRET")
+
+def store_interaction(user_id, message_text, reply):
+    """Salva a conversa no Vercel Blob Storage e registra os analytics em lote (erros só são logados)"""
+    try:
+        vercel_storage.store_conversation(user_id, message_text, reply.text)
+    except Exception as e:
+        print(f"Erro ao salvar conversa: {e}")
+    
+    # Analytics de uso vão para o buffer (um segmento por lote, não um blob
+    # por mensagem); o lote vencido é enviado aqui mesmo, porque a thread do
+    # buffer pode ficar congelada entre invocações
     try:
-        with open("public/perguntas_respostas_melhorado.json", encoding="utf-8") as f:
-            return json.load(f)
-    except:
-        return []
+        analytics_buffer.record("message_received", {
+            "user_id": user_id,
+            "message_length": len(message_text),
+            "response_type": reply.source,
+            "match_score": reply.score
+        })
+        analytics_buffer.flush_if_due()
+    except Exception as e:
+        print(f"Erro ao registrar analytics: {e}")
+
+def send_chunks(chat_id, reply):
+    """Envia as partes da resposta em ordem pela Bot API (conexão reaproveitada)"""
+    client = get_bot_client()
+    if not client:
+        raise RuntimeError("TELEGRAM_TOKEN não configurado")
+    for chunk in reply.chunks:
+        if client.send_message(chat_id, chunk, parse_mode=reply.parse_mode) is None:
+            raise RuntimeError(f"falha ao enviar resposta para o chat {chat_id}")
 
-def advanced_similarity(query, item):
-    query_lower = query.lower()
-    score = 0
+class RecentUpdates:
+    """update_ids em processamento ou já respondidos por esta instância (descarta os mais antigos)"""
     
-    # Verifica pergunta principal
-    if query_lower in item["pergunta"].lower():
-        score += 100
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self._ids = OrderedDict()
     
-    # Verifica variações
-    for variacao in item.get("variacoes", []):
-        if query_lower in variacao.lower():
-            score += 80
+    def seen(self, update_id):
+        """True se o update já está em processamento ou foi respondido (reentrega do Telegram)"""
+        return update_id in self._ids
     
-    # Verifica tags
-    for tag in item.get("tags", []):
-        if tag.lower() in query_lower:
-            score += 60
+    def add(self, update_id):
+        """Marca o update antes de processá-lo: reentregas concorrentes são ignoradas"""
+        self._ids[update_id] = None
+        while len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
     
-    return score
+    def discard(self, update_id):
+        """Desmarca um update que falhou, para a reentrega ser processada"""
+        self._ids.pop(update_id, None)
+
+recent_updates = RecentUpdates()
+
+# Aquecimento na importação, não no lifespan: o Vercel pode nunca enviar
+# lifespan.startup. É só antecipação (thread daemon que pode ficar congelada
+# entre invocações); o que não tiver carregado carrega sob demanda.
+if settings.WARMUP_ON_START:
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+# Estado de cada usuário entre mensagens (equivalente ao user_data do polling)
+_user_states = OrderedDict()
+MAX_USER_STATES = 1000
+
+def get_user_state(user_id):
+    state = _user_states.pop(user_id, None)
+    if state is None:
+        state = {}
+    _user_states[user_id] = state
+    while len(_user_states) > MAX_USER_STATES:
+        _user_states.popitem(last=False)
+    return state
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
 
-def split_long_message(message, max_length=4000):
-    """Divide mensagem longa em chunks se necessário"""
-    if len(message) <= max_length:
-        return [message]
-    
-    chunks = []
-    current_chunk = ""
-    
-    for line in message.split('\n'):
-        if len(current_chunk) + len(line) + 1 <= max_length:
-            current_chunk += line + '\n'
-        else:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = line + '\n'
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks
+async def send_json(send, status, payload):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json")],
+    })
+    await send({"type": "http.response.body", "body": json.dumps(payload, ensure_ascii=False).encode("utf-8")})
 
-def handle_message(message_text, user_id):
-    qa_data = load_qa_data()
+async def app(scope, receive, send):
+    """
+    Webhook do Telegram (ASGI).
     
-    best_match = None
-    best_score = 0
+    A resposta é gerada e, se tiver várias partes, enviada pela Bot API
+    antes do retorno; uma resposta que cabe em uma mensagem volta no próprio
+    corpo do retorno (método sendMessage, sem chamada extra à Bot API).
+    A conversa e os analytics são gravados depois do retorno, ainda dentro
+    desta chamada: o Telegram recebe a confirmação sem esperar o upload e a
+    listagem do Blob, e a invocação só termina com tudo gravado.
     
-    for item in qa_data:
-        score = advanced_similarity(message_text, item)
-        if score > best_score and score >= 50:
-            best_score = score
-            best_match = item
+    O update_id é marcado antes do processamento, então reentregas que
+    chegam enquanto ele roda são ignoradas. Se algo falhar antes do retorno,
+    a marca é desfeita e o webhook responde 500: a reentrega do Telegram é
+    processada de novo.
+    """
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
     
-    if best_match:
-        response = best_match["resposta"]
-    else:
-        response = "Desculpe, não entendi sua pergunta. Pode reformular?"
+    if scope["method"] != "POST":
+        await send_json(send, 405, {"error": "method not allowed"})
+        return
+    
+    # Token configurado no setWebhook (secret_token), se houver
+    if WEBHOOK_SECRET:
+        headers = dict(scope.get("headers", []))
+        if headers.get(b"x-telegram-bot-api-secret-token", b"").decode() != WEBHOOK_SECRET:
+            await send_json(send, 403, {"error": "forbidden"})
+            return
+    
+    try:
+        update_data = json.loads(await read_body(receive))
+    except ValueError:
+        await send_json(send, 400, {"error": "invalid json"})
+        return
+    
+    update_id = update_data.get("update_id")
+    message = update_data.get("message") or {}
+    if (update_id is not None and recent_updates.seen(update_id)) or "text" not in message:
+        await send_json(send, 200, {"status": "ok"})
+        return
+    
+    try:
+        chat_id = message["chat"]["id"]
+        user_id = message["from"]["id"]
+        message_text = message["text"]
+    except (KeyError, TypeError) as e:
+        print(f"Erro: update inválido {e}")
+        await send_json(send, 200, {"status": "error"})
+        return
+    
+    # Sem await entre seen() e add(): nenhuma reentrega passa no meio
+    if update_id is not None:
+        recent_updates.add(update_id)
     
-    # Salva a conversa no Vercel Blob Storage
     try:
-        vercel_storage.store_conversation(user_id, message_text, response)
+        # Mesmo pipeline do bot em polling (Q&A, PPC, FLAN-T5)
+        reply = await answer(message_text, get_user_state(user_id))
         
-        # Salva analytics de uso
-        vercel_storage.store_analytics("message_received", {
-            "user_id": user_id,
-            "message_length": len(message_text),
-            "response_type": "qa_match" if best_match else "fallback",
-            "match_score": best_score if best_match else 0
-        })
+        # Resposta em uma única mensagem vai no próprio retorno; várias partes
+        # vão todas pela Bot API, para manter a ordem
+        inline = len(reply.chunks) == 1
+        if not inline:
+            await asyncio.to_thread(send_chunks, chat_id, reply)
     except Exception as e:
-        print(f"Erro ao salvar conversa: {e}")
+        print(f"Erro: {e}")
+        # Desmarca o update: o Telegram reentrega e a mensagem é processada de novo
+        if update_id is not None:
+            recent_updates.discard(update_id)
+        await send_json(send, 500, {"status": "error"})
+        return
     
-    return response
-
-class handler(BaseHTTPRequestHandler):
-    def do_POST(self):
-        try:
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            update_data = json.loads(post_data.decode('utf-8'))
-            
-            # Processa update do Telegram
-            if 'message' in update_data and 'text' in update_data['message']:
-                chat_id = update_data['message']['chat']['id']
-                message_text = update_data['message']['text']
-                user_id = update_data['message']['from']['id']
-                
-                # Gera resposta
-                response_text = handle_message(message_text, user_id)
-                
-                # Envia resposta via Telegram Bot API
-                bot_token = os.environ.get('TELEGRAM_TOKEN')
-                if bot_token:
-                    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-                    
-                    # Divide mensagem longa se necessário
-                    chunks = split_long_message(response_text)
-                    
-                    for i, chunk in enumerate(chunks):
-                        data = {
-                            "chat_id": chat_id,
-                            "text": f"(continuação...)\n\n{chunk}" if i > 0 else chunk
-                        }
-                        requests.post(url, json=data)
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({"status": "ok"}).encode())
-            
-        except Exception as e:
-            print(f"Erro: {e}")
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({"error": str(e)}).encode())
+    if inline:
+        payload = {"method": "sendMessage", "chat_id": chat_id, "text": reply.chunks[0]}
+        if reply.parse_mode:
+            payload["parse_mode"] = reply.parse_mode
+        await send_json(send, 200, payload)
+    else:
+        await send_json(send, 200, {"status": "ok"})
+    
+    # Fora do caminho da confirmação
+    await asyncio.to_thread(store_interaction, user_id, message_text, reply)
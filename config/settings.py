@@ -26,12 +26,20 @@ class Settings:
     HF_API_TOKEN: Optional[str] = os.getenv("HF_API_TOKEN")
     AI_TIMEOUT: int = int(os.getenv("AI_TIMEOUT", "30"))
     MAX_TOKENS: int = int(os.getenv("MAX_TOKENS", "150"))
+    FLAN_BACKEND: str = os.getenv("FLAN_BACKEND", "torch")  # torch | torch_int8 | onnx
+    FLAN_BATCH_MAX_SIZE: int = int(os.getenv("FLAN_BATCH_MAX_SIZE", "8"))
+    FLAN_BATCH_MAX_WAIT_MS: int = int(os.getenv("FLAN_BATCH_MAX_WAIT_MS", "10"))
+    FLAN_INFERENCE_WORKERS: int = int(os.getenv("FLAN_INFERENCE_WORKERS", "1"))
+    FLAN_INFERENCE_MAX_QUEUE: int = int(os.getenv("FLAN_INFERENCE_MAX_QUEUE", "16"))
+    FLAN_CACHE_MAX_SIZE: int = int(os.getenv("FLAN_CACHE_MAX_SIZE", "512"))
+    FLAN_CACHE_TTL: int = int(os.getenv("FLAN_CACHE_TTL", "86400"))
     
     # =============================================================================
     # APPLICATION CONFIGURATION
     # =============================================================================
     DEBUG_MODE: bool = os.getenv("DEBUG_MODE", "false").lower() == "true"
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    WARMUP_ON_START: bool = os.getenv("WARMUP_ON_START", "true").lower() == "true"
     
     # =============================================================================
     # VERCEL CONFIGURATION
@@ -47,6 +55,30 @@ class Settings:
     RAW_DATA_DIR = os.path.join(DATA_DIR, "raw")
     PROCESSED_DATA_DIR = os.path.join(DATA_DIR, "processed")
     
+    # =============================================================================
+    # STORAGE CONFIGURATION
+    # =============================================================================
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "vercel")  # vercel | local
+    STORAGE_SERIALIZER: str = os.getenv("STORAGE_SERIALIZER", "gzip")  # json | gzip | zstd | msgpack
+    LOCAL_STORAGE_PATH: str = os.getenv(
+        "LOCAL_STORAGE_PATH", os.path.join(PROCESSED_DATA_DIR, "storage.sqlite3")
+    )
+    USER_DATA_CACHE_TTL: int = int(os.getenv("USER_DATA_CACHE_TTL", "300"))
+    USER_DATA_NEGATIVE_CACHE_TTL: int = int(os.getenv("USER_DATA_NEGATIVE_CACHE_TTL", "60"))
+    BLOB_URL_CACHE_TTL: int = int(os.getenv("BLOB_URL_CACHE_TTL", "300"))
+    CONVERSATION_HISTORY_LIMIT: int = int(os.getenv("CONVERSATION_HISTORY_LIMIT", "50"))
+    CONVERSATION_COMPACT_EVERY: int = int(os.getenv("CONVERSATION_COMPACT_EVERY", "10"))
+    
+    # =============================================================================
+    # ANALYTICS AND RETENTION CONFIGURATION
+    # =============================================================================
+    ANALYTICS_FLUSH_SIZE: int = int(os.getenv("ANALYTICS_FLUSH_SIZE", "100"))
+    ANALYTICS_FLUSH_INTERVAL: float = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "30"))
+    ANALYTICS_MAX_BUFFER: int = int(os.getenv("ANALYTICS_MAX_BUFFER", "5000"))
+    ANALYTICS_RETENTION_DAYS: float = float(os.getenv("ANALYTICS_RETENTION_DAYS", "90"))
+    ANALYTICS_ROLLUP_AFTER_HOURS: float = float(os.getenv("ANALYTICS_ROLLUP_AFTER_HOURS", "24"))
+    CONVERSATION_RETENTION_DAYS: float = float(os.getenv("CONVERSATION_RETENTION_DAYS", "180"))
+    
     # =============================================================================
     # CHATBOT CONFIGURATION
     # =============================================================================
@@ -61,6 +93,8 @@ class Settings:
     MAX_CHUNKS: int = 3
     CHUNK_SIZE: int = 800
     CHUNK_OVERLAP: int = 150
+    # PPC_RANKING_MODE, PPC_BM25_MIN_SCORE e PPC_CHUNKS_FILE são lidos em
+    # src/services/search/ppc_search.py, que não depende destas configurações
     
     @classmethod
     def validate(cls) -> bool:
@@ -25,6 +25,7 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 # Configuração de logging deve ser a primeira importação
 from config.logging_config import setup_logging
 from config.settings import settings
+from src.utils.timing import timed_startup
 
 def main():
     """Função principal da aplicação"""
@@ -37,7 +38,8 @@ def main():
         settings.validate()
         
         # Importa e executa o bot principal
-        from src.core.bot import main as bot_main
+        with timed_startup("bot_module"):
+            from src.core.bot import main as bot_main
         
         print("🚀 Iniciando Chatbot Educacional UFC Quixadá...")
         print(f"📊 Modo Debug: {'Ativado' if settings.DEBUG_MODE else 'Desativado'}")
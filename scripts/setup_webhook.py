@@ -12,9 +12,13 @@ if not TELEGRAM_TOKEN:
     exit(1)
 
 # Configurar webhook
+webhook_config = {"url": WEBHOOK_URL}
+if os.getenv("TELEGRAM_WEBHOOK_SECRET"):
+    webhook_config["secret_token"] = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+
 response = requests.post(
     f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/setWebhook",
-    json={"url": WEBHOOK_URL}
+    json=webhook_config
 )
 
 print(f"Status: {response.status_code}")
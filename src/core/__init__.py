@@ -2,7 +2,8 @@
 Core - Núcleo da Aplicação
 
 Contém os componentes centrais do chatbot:
-- Bot principal
+- Bot principal (transporte Telegram em polling)
+- Motor de respostas (engine), compartilhado com o webhook
 - Configurações
 - Inicialização da aplicação
 """
@@ -21,9 +21,8 @@ Autor: Desenvolvimento para TCC - Engenharia de Software UFC Quixadá
 Data: 2025
 """
 
-import json
+import asyncio
 import os
-from difflib import SequenceMatcher
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import (
     Application,
@@ -34,49 +33,20 @@ from telegram.ext import (
 )
 from dotenv import load_dotenv
 
-from src.services.storage.vercel_storage import vercel_storage
-from src.services.ai.flan_service import flan_service, DEFAULT_CONTEXT
-from src.services.search.ppc_search import ppc_search
+from config.settings import settings
+from src.services.storage.factory import storage
+from src.services.storage.analytics_buffer import analytics_buffer
+from src.core.engine import Reply, answer, warm_up as engine_warm_up
+from src.utils.timing import log_startup_summary, timed_startup
 
 load_dotenv()
 
 TOKEN = os.getenv("TELEGRAM_TOKEN")
 
-async def send_long_message(update: Update, message: str, parse_mode: str = 'Markdown'):
-    """Envia mensagem longa dividindo em chunks se necessário"""
-    MAX_MESSAGE_LENGTH = 4000  # Deixa margem de segurança
-    
-    if len(message) <= MAX_MESSAGE_LENGTH:
-        await update.message.reply_text(message, parse_mode=parse_mode)
-        return
-    
-    # Divide a mensagem em chunks
-    chunks = []
-    current_chunk = ""
-    
-    for line in message.split('\n'):
-        if len(current_chunk) + len(line) + 1 <= MAX_MESSAGE_LENGTH:
-            current_chunk += line + '\n'
-        else:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = line + '\n'
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    # Envia cada chunk
-    for i, chunk in enumerate(chunks):
-        if i == 0:
-            await update.message.reply_text(chunk, parse_mode=parse_mode)
-        else:
-            await update.message.reply_text(f"(continuação...)\n\n{chunk}", parse_mode=parse_mode)
-
-# Carrega perguntas e respostas
-with open("data/qa/perguntas_respostas_melhorado.json", encoding="utf-8") as f:
-    DATA = json.load(f)
-    QA = DATA["qa_items"]
-    AMBIGUITY_CONFIG = DATA["ambiguity_detection"]
+async def send_reply(update: Update, reply: Reply):
+    """Envia a resposta do motor, dividida em partes se necessário"""
+    for chunk in reply.chunks:
+        await update.message.reply_text(chunk, parse_mode=reply.parse_mode)
 
 # Menus
 MAIN_MENU = [
@@ -113,69 +83,10 @@ CURSO_MENU = [
     ["🔙 Voltar ao Menu Principal"]
 ]
 
-# Função de similaridade melhorada
-def similarity(a: str, b: str) -> float:
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
-
-def advanced_similarity(query: str, item: dict) -> float:
-    """
-    Calcula similaridade avançada considerando múltiplos fatores.
-    
-    Algoritmo multi-fator que combina diferentes métricas de similaridade
-    para melhorar a precisão do matching entre perguntas do usuário e
-    itens da base de conhecimento.
-    
-    Args:
-        query (str): Pergunta do usuário
-        item (dict): Item da base Q&A com estrutura:
-                    - pergunta: pergunta principal
-                    - variacoes: lista de variações da pergunta
-                    - tags: lista de palavras-chave
-    
-    Returns:
-        float: Score de similaridade entre 0.0 e 1.0
-        
-    Fatores considerados:
-        - Similaridade textual com pergunta principal (60%)
-        - Similaridade com variações
-        - Matching de tags (20%)
-        - Matching de palavras-chave específicas (20%)
-    """
-    query_lower = query.lower()
-    
-    # Similaridade com a pergunta principal
-    main_score = similarity(query, item["pergunta"])
-    
-    # Similaridade com variações
-    variation_scores = []
-    for variacao in item.get("variacoes", []):
-        variation_scores.append(similarity(query, variacao))
-    
-    max_variation_score = max(variation_scores) if variation_scores else 0
-    
-    # Similaridade com tags
-    tag_score = 0
-    for tag in item.get("tags", []):
-        if tag.lower() in query_lower:
-            tag_score += 0.3
-    
-    # Pontuação por palavras-chave específicas
-    keyword_score = 0
-    query_words = query_lower.split()
-    for word in query_words:
-        if len(word) > 3:  # Ignora palavras muito pequenas
-            for variacao in item.get("variacoes", []):
-                if word in variacao.lower():
-                    keyword_score += 0.2
-    
-    # Combina as pontuações
-    final_score = max(main_score, max_variation_score) * 0.6 + tag_score * 0.2 + keyword_score * 0.2
-    
-    return min(final_score, 1.0)  # Limita a 1.0
-
 # 🏁 Start
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    vercel_storage.store_analytics("bot_start", {
+    # Gravado em lote, em segundo plano (não bloqueia a resposta)
+    analytics_buffer.record("bot_start", {
         "user_id": update.effective_user.id,
         "username": update.effective_user.username,
         "first_name": update.effective_user.first_name
@@ -225,7 +136,7 @@ async def handle_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # 📝 Cadastro guiado
 async def handle_cadastro(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
-    user_data = vercel_storage.get_user_data(user.id) or {}
+    user_data = await storage.get_user_data(user.id) or {}
 
     text = (
         "📝 **Seus Dados Acadêmicos**\n\n"
@@ -245,148 +156,14 @@ async def handle_cadastro(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # 🎯 Pergunta específica do menu
 async def handle_specific_question(update: Update, context: ContextTypes.DEFAULT_TYPE, question: str):
     """Handle questions triggered by menu options"""
-    # Procura pela pergunta específica no JSON
-    for item in QA:
-        if item["pergunta"] == question:
-            await update.message.reply_text(item["resposta"], parse_mode='Markdown')
-            return
-    
-    # Fallback para busca livre se não encontrar
-    await handle_free_question(update, context)
-
-# 🔍 Detecção de perguntas ambíguas
-def is_ambiguous_question(question: str) -> bool:
-    """Detecta se uma pergunta é muito ambígua ou genérica"""
-    question_lower = question.lower()
-    
-    # Carrega configurações do JSON
-    ambiguous_keywords = AMBIGUITY_CONFIG["keywords"]
-    generic_terms = AMBIGUITY_CONFIG["generic_terms"]
-    
-    # Conta palavras ambíguas
-    ambiguous_count = sum(1 for keyword in ambiguous_keywords if keyword in question_lower)
-    
-    # Verifica se tem termos genéricos sem especificação
-    has_generic = any(term in question_lower for term in generic_terms)
-    
-    # Pergunta muito curta (menos de 20 caracteres)
-    is_too_short = len(question.strip()) < 20
-    
-    # Considera ambígua se tem muitas palavras ambíguas OU é muito genérica
-    return (ambiguous_count >= 2) or (has_generic and ambiguous_count >= 1) or is_too_short
-
-# 💬 Gerar pedidos de esclarecimento
-def generate_clarification_request(question: str) -> str:
-    """Gera um pedido de esclarecimento específico baseado na pergunta"""
-    question_lower = question.lower()
-    
-    # Carrega mapeamento do JSON
-    clarification_map = AMBIGUITY_CONFIG["clarification_map"]
-    
-    # Encontra o termo mais relevante
-    relevant_clarifications = []
-    for term, clarifications in clarification_map.items():
-        if term in question_lower:
-            relevant_clarifications.extend(clarifications)
-    
-    # Se não encontrou termos específicos, usa esclarecimento genérico
-    if not relevant_clarifications:
-        relevant_clarifications = AMBIGUITY_CONFIG["default_clarifications"]
-    
-    clarification_text = "\n".join(relevant_clarifications[:5])  # Limita a 5 opções
-    
-    return (
-        f"🤔 Sua pergunta precisa de mais detalhes para eu te ajudar melhor.\n\n"
-        f"**Você está perguntando sobre:**\n"
-        f"{clarification_text}\n\n"
-        f"💡 **Dica:** Seja mais específico em sua pergunta para obter uma resposta mais precisa.\n"
-        f"📞 **Ou contate:** es@quixada.ufc.br"
-    )
+    # O motor procura primeiro a pergunta exata e, se não achar, faz a busca livre
+    reply = await answer(question, context.user_data)
+    await send_reply(update, reply)
 
 # ❓ Perguntas livres
 async def handle_free_question(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    question = update.message.text
-    
-    # 0. Verifica se a pergunta é muito ambígua
-    if is_ambiguous_question(question):
-        clarification = generate_clarification_request(question)
-        await update.message.reply_text(clarification, parse_mode='Markdown')
-        return
-    
-    # 1. Busca avançada no JSON local
-    scored_items = []
-    for item in QA:
-        score = advanced_similarity(question, item)
-        if score > 0.3:  # Threshold mais baixo para capturar mais opções
-            scored_items.append((item, score))
-    
-    # Ordena por score e pega o melhor
-    if scored_items:
-        scored_items.sort(key=lambda x: x[1], reverse=True)
-        best_match, best_score = scored_items[0]
-        
-        if best_score >= 0.5:  # Threshold ajustado
-            response = best_match["resposta"]
-            await update.message.reply_text(response, parse_mode='Markdown')
-            return
-
-    # 2. Busca por tags (mantida como fallback)
-    for qa_item in QA:
-        if any(tag.lower() in question.lower() for tag in qa_item.get("tags", [])):
-            response = qa_item["resposta"]
-            await update.message.reply_text(response, parse_mode='Markdown')
-            return
-
-    # 3. Busca no PPC
-    ppc_response = ppc_search.get_formatted_response(question)
-    if ppc_response:
-        await send_long_message(update, ppc_response)
-        return
-
-    # 4. Verificação final antes do fallback
-    if len(question.strip()) < 10:
-        await update.message.reply_text(
-            "🤔 Sua pergunta está muito curta.\n\n"
-            "💡 **Tente ser mais específico:**\n"
-            "• Qual é exatamente sua dúvida?\n"
-            "• Sobre qual assunto você precisa de ajuda?\n\n"
-            "📞 **Ou contate:** es@quixada.ufc.br",
-            parse_mode='Markdown'
-        )
-        return
-
-    # 5. Fallback controlado (apenas para perguntas bem estruturadas)
-    try:
-        # Contexto dinâmico baseado no PPC
-        ppc_context = ppc_search.get_context_for_flan(question)
-        
-        # Só usa FLAN se encontrou contexto relevante no PPC
-        if ppc_context and len(ppc_context.strip()) > 50:
-            context_text = f"{DEFAULT_CONTEXT}\n\nContexto do PPC:\n{ppc_context}"
-            resposta = flan_service.generate_response(question, context_text)
-            await send_long_message(update, resposta)
-        else:
-            # Sem contexto suficiente, não tenta responder
-            await update.message.reply_text(
-                "😔 Não encontrei informações específicas sobre sua pergunta.\n\n"
-                "💡 **Sugestões:**\n"
-                "• Tente reformular com palavras-chave mais específicas\n"
-                "• Use o menu principal para navegar por tópicos\n"
-                "• Consulte: https://es.quixada.ufc.br\n"
-                "• Fale com a coordenação: es@quixada.ufc.br",
-                parse_mode='Markdown'
-            )
-    except Exception as e:
-        print(f"Erro FLAN-T5: {e}")
-        await update.message.reply_text(
-            "😔 Não consegui processar sua pergunta no momento.\n\n"
-            "💡 **Sugestões:**\n"
-            "• Tente reformular sua pergunta\n"
-            "• Use o menu principal para navegar\n"
-            "• Consulte: https://es.quixada.ufc.br\n"
-            "• Fale com a coordenação: es@quixada.ufc.br",
-            parse_mode='Markdown'
-        )
+    reply = await answer(update.message.text, context.user_data)
+    await send_reply(update, reply)
 
 # 🎵 Handler para áudio
 async def handle_audio(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -497,10 +274,34 @@ async def handle_other_media(update: Update, context: ContextTypes.DEFAULT_TYPE)
         parse_mode='Markdown'
     )
 
+async def post_init(application: Application):
+    """Executado pelo Application antes de começar a receber updates"""
+    log_startup_summary()
+
+    if settings.WARMUP_ON_START:
+        # Roda em segundo plano: os menus já respondem enquanto os índices e o modelo carregam
+        application.create_task(warm_up())
+
+async def post_shutdown(application: Application):
+    """Envia os eventos de analytics pendentes e fecha o armazenamento antes de encerrar"""
+    await asyncio.get_running_loop().run_in_executor(None, analytics_buffer.close)
+    await storage.aclose()
+
+async def warm_up():
+    await asyncio.get_running_loop().run_in_executor(None, engine_warm_up)
+    log_startup_summary()
+
 # 🚀 Main
 def main():
     print("Bot iniciado...")
-    app = Application.builder().token(TOKEN).build()
+    with timed_startup("telegram_app"):
+        app = (
+            Application.builder()
+            .token(TOKEN)
+            .post_init(post_init)
+            .post_shutdown(post_shutdown)
+            .build()
+        )
 
     app.add_handler(CommandHandler("start", start))
     
@@ -0,0 +1,327 @@
+"""
+Motor de respostas do chatbot
+
+Concentra o pipeline de resposta independente do transporte, usado tanto
+pelo bot em polling (src/core/bot.py) quanto pelo webhook (api/webhook.py):
+
+1. Opção de menu (busca exata pela pergunta principal)
+2. Detecção de perguntas ambíguas
+3. Busca na base Q&A (QAMatcher) e, como fallback, por tags
+4. Busca no PPC
+5. FLAN-T5 com contexto do PPC
+
+Base Q&A, índice do PPC e modelo são carregados uma única vez por processo
+e compartilhados entre as chamadas (warm_up() antecipa esse carregamento).
+A base Q&A é recarregada quando o arquivo muda (mtime). Base ausente ou
+inválida é erro: warm_up() falha em vez de responder tudo com "sem
+contexto"; uma recarga que falha mantém a base anterior.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, MutableMapping, NamedTuple, Optional
+
+from config.settings import settings
+from src.services.ai.flan_service import DEFAULT_CONTEXT, InferenceQueueFull, flan_service
+from src.services.ai.flan_batcher import flan_batcher
+from src.services.ai.response_cache import flan_response_cache
+from src.services.search.ppc_search import ppc_search
+from src.services.search.qa_matcher import QAMatcher
+from src.utils.timing import timed_startup
+
+logger = logging.getLogger(__name__)
+
+QA_FILE = os.path.join(settings.QA_DATA_DIR, "public", "perguntas_respostas_melhorado.json")
+
+# Configuração de ambiguidade usada quando a base não traz a sua
+EMPTY_AMBIGUITY_CONFIG: Dict[str, Any] = {
+    "keywords": [],
+    "generic_terms": [],
+    "clarification_map": {},
+    "default_clarifications": [],
+}
+
+# Origem de cada resposta (também usada nos analytics)
+SOURCE_MENU = "menu"
+SOURCE_CLARIFICATION = "clarification"
+SOURCE_QA = "qa_match"
+SOURCE_QA_TAG = "qa_tag"
+SOURCE_PPC = "ppc"
+SOURCE_FLAN = "flan"
+SOURCE_TOO_SHORT = "too_short"
+SOURCE_NO_CONTEXT = "no_context"
+SOURCE_ERROR = "error"
+
+# Respostas cacheadas do FLAN-T5 deixam de valer quando os chunks do PPC mudam
+ppc_search.add_reload_listener(flan_response_cache.clear)
+
+class KnowledgeBase(NamedTuple):
+    """Base de perguntas e respostas já indexada"""
+    qa: List[Dict[str, Any]]
+    ambiguity_config: Dict[str, Any]
+    matcher: QAMatcher
+    mtime: Optional[float] = None
+
+# Base compartilhada entre chamadas (e invocações de uma instância já aquecida)
+_knowledge_base: Optional[KnowledgeBase] = None
+_knowledge_base_lock = threading.Lock()
+
+def get_knowledge_base() -> KnowledgeBase:
+    """
+    Retorna a base Q&A, recarregando só quando o arquivo muda (mtime).
+
+    Raises:
+        OSError, ValueError: se a base nunca foi carregada e o arquivo está
+            ausente ou é inválido
+    """
+    global _knowledge_base
+    try:
+        mtime = os.stat(QA_FILE).st_mtime
+    except OSError:
+        mtime = None
+
+    knowledge_base = _knowledge_base
+    if knowledge_base is not None and knowledge_base.mtime == mtime:
+        return knowledge_base
+
+    with _knowledge_base_lock:
+        if _knowledge_base is None or _knowledge_base.mtime != mtime:
+            try:
+                _knowledge_base = load_knowledge_base(mtime)
+            except (OSError, ValueError):
+                if _knowledge_base is None:
+                    raise
+                # Arquivo trocado por um inválido: segue com a base anterior
+                # até o próximo mtime, sem tentar reler a cada pergunta
+                _knowledge_base = _knowledge_base._replace(mtime=mtime)
+        return _knowledge_base
+
+def load_knowledge_base(mtime: Optional[float] = None) -> KnowledgeBase:
+    """
+    Lê e indexa QA_FILE.
+
+    Raises:
+        OSError: se o arquivo não puder ser lido
+        ValueError: se o JSON for inválido ou não tiver perguntas
+    """
+    with timed_startup("qa_base"):
+        try:
+            with open(QA_FILE, encoding="utf-8") as f:
+                data = json.load(f)
+
+            # Formato atual: {"qa_items": [...], "ambiguity_detection": {...}}; antigo: lista
+            if isinstance(data, list):
+                qa, ambiguity_config = data, {}
+            elif isinstance(data, dict):
+                qa, ambiguity_config = data.get("qa_items", []), data.get("ambiguity_detection", {})
+            else:
+                raise ValueError("formato desconhecido")
+            if not qa:
+                raise ValueError("nenhuma pergunta na base")
+        except (OSError, ValueError) as e:
+            logger.error(f"Erro ao carregar a base Q&A ({QA_FILE}): {e}")
+            raise
+
+        # Índice pré-compilado da base Q&A
+        return KnowledgeBase(qa, {**EMPTY_AMBIGUITY_CONFIG, **ambiguity_config}, QAMatcher(qa), mtime)
+
+def warm_up():
+    """
+    Carrega base Q&A, índice do PPC e modelo FLAN-T5 antes da primeira pergunta.
+
+    Raises:
+        OSError, ValueError: se a base Q&A ou os chunks do PPC estiverem
+            ausentes ou inválidos
+    """
+    get_knowledge_base()
+    ppc_search.ensure_loaded()
+    if flan_service:
+        flan_service.load()
+
+# Resposta quando não há contexto suficiente (ou o FLAN-T5 está sobrecarregado)
+NO_CONTEXT_REPLY = (
+    "😔 Não encontrei informações específicas sobre sua pergunta.\n\n"
+    "💡 **Sugestões:**\n"
+    "• Tente reformular com palavras-chave mais específicas\n"
+    "• Use o menu principal para navegar por tópicos\n"
+    "• Consulte: https://es.quixada.ufc.br\n"
+    "• Fale com a coordenação: es@quixada.ufc.br"
+)
+
+TOO_SHORT_REPLY = (
+    "🤔 Sua pergunta está muito curta.\n\n"
+    "💡 **Tente ser mais específico:**\n"
+    "• Qual é exatamente sua dúvida?\n"
+    "• Sobre qual assunto você precisa de ajuda?\n\n"
+    "📞 **Ou contate:** es@quixada.ufc.br"
+)
+
+ERROR_REPLY = (
+    "😔 Não consegui processar sua pergunta no momento.\n\n"
+    "💡 **Sugestões:**\n"
+    "• Tente reformular sua pergunta\n"
+    "• Use o menu principal para navegar\n"
+    "• Consulte: https://es.quixada.ufc.br\n"
+    "• Fale com a coordenação: es@quixada.ufc.br"
+)
+
+def split_message(message: str, max_length: int = settings.MAX_MESSAGE_LENGTH) -> List[str]:
+    """Divide mensagem longa em partes de até max_length caracteres (por linha)"""
+    if len(message) <= max_length:
+        return [message]
+
+    chunks = []
+    current_chunk = ""
+
+    for line in message.split('\n'):
+        if len(current_chunk) + len(line) + 1 <= max_length:
+            current_chunk += line + '\n'
+        else:
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+            current_chunk = line + '\n'
+
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+
+    return chunks
+
+class Reply(NamedTuple):
+    """Resposta do motor, pronta para qualquer transporte"""
+    text: str
+    source: str
+    score: float = 0.0
+    parse_mode: Optional[str] = "Markdown"
+
+    @property
+    def chunks(self) -> List[str]:
+        """Partes a enviar, já com o aviso de continuação"""
+        return [
+            f"(continuação...)\n\n{chunk}" if i > 0 else chunk
+            for i, chunk in enumerate(split_message(self.text))
+        ]
+
+# 🔍 Detecção de perguntas ambíguas
+def is_ambiguous_question(question: str) -> bool:
+    """Detecta se uma pergunta é muito ambígua ou genérica"""
+    question_lower = question.lower()
+
+    # Carrega configurações do JSON
+    ambiguity_config = get_knowledge_base().ambiguity_config
+    ambiguous_keywords = ambiguity_config["keywords"]
+    generic_terms = ambiguity_config["generic_terms"]
+
+    # Conta palavras ambíguas
+    ambiguous_count = sum(1 for keyword in ambiguous_keywords if keyword in question_lower)
+
+    # Verifica se tem termos genéricos sem especificação
+    has_generic = any(term in question_lower for term in generic_terms)
+
+    # Pergunta muito curta (menos de 20 caracteres)
+    is_too_short = len(question.strip()) < 20
+
+    # Considera ambígua se tem muitas palavras ambíguas OU é muito genérica
+    return (ambiguous_count >= 2) or (has_generic and ambiguous_count >= 1) or is_too_short
+
+# 💬 Gerar pedidos de esclarecimento
+def generate_clarification_request(question: str) -> str:
+    """Gera um pedido de esclarecimento específico baseado na pergunta"""
+    question_lower = question.lower()
+
+    # Carrega mapeamento do JSON
+    ambiguity_config = get_knowledge_base().ambiguity_config
+    clarification_map = ambiguity_config["clarification_map"]
+
+    # Encontra o termo mais relevante
+    relevant_clarifications = []
+    for term, clarifications in clarification_map.items():
+        if term in question_lower:
+            relevant_clarifications.extend(clarifications)
+
+    # Se não encontrou termos específicos, usa esclarecimento genérico
+    if not relevant_clarifications:
+        relevant_clarifications = ambiguity_config["default_clarifications"]
+
+    clarification_text = "\n".join(relevant_clarifications[:5])  # Limita a 5 opções
+
+    return (
+        f"🤔 Sua pergunta precisa de mais detalhes para eu te ajudar melhor.\n\n"
+        f"**Você está perguntando sobre:**\n"
+        f"{clarification_text}\n\n"
+        f"💡 **Dica:** Seja mais específico em sua pergunta para obter uma resposta mais precisa.\n"
+        f"📞 **Ou contate:** es@quixada.ufc.br"
+    )
+
+async def answer(question: str, user_state: Optional[MutableMapping[str, Any]] = None) -> Reply:
+    """
+    Responde uma pergunta do usuário.
+
+    Args:
+        question: Texto enviado pelo usuário (pergunta livre ou opção de menu)
+        user_state: Estado do usuário no transporte (ex.: context.user_data
+            do python-telegram-bot); recebe a origem da última resposta
+
+    Returns:
+        Reply com o texto e a origem da resposta
+    """
+    reply = await _answer(question)
+    if user_state is not None:
+        user_state["last_reply_source"] = reply.source
+    return reply
+
+async def _answer(question: str) -> Reply:
+    qa_matcher = get_knowledge_base().matcher
+
+    # 1. Opção de menu: pergunta principal exata
+    item = qa_matcher.find_by_question(question)
+    if item:
+        return Reply(item["resposta"], SOURCE_MENU, 1.0)
+
+    # 2. Verifica se a pergunta é muito ambígua
+    if is_ambiguous_question(question):
+        return Reply(generate_clarification_request(question), SOURCE_CLARIFICATION)
+
+    # 3. Busca avançada no JSON local (melhor item com score >= 0.5)
+    match = qa_matcher.best_match(question, min_score=settings.SIMILARITY_THRESHOLD)
+    if match:
+        best_match, best_score = match
+        return Reply(best_match["resposta"], SOURCE_QA, best_score)
+
+    # Busca por tags (mantida como fallback)
+    qa_item = qa_matcher.first_tag_match(question)
+    if qa_item:
+        return Reply(qa_item["resposta"], SOURCE_QA_TAG)
+
+    # 4. Busca no PPC
+    ppc_response = ppc_search.get_formatted_response(question)
+    if ppc_response:
+        return Reply(ppc_response, SOURCE_PPC)
+
+    # Verificação final antes do fallback
+    if len(question.strip()) < settings.MIN_QUESTION_LENGTH:
+        return Reply(TOO_SHORT_REPLY, SOURCE_TOO_SHORT)
+
+    # 5. Fallback controlado (apenas para perguntas bem estruturadas)
+    try:
+        # Contexto dinâmico baseado no PPC
+        ppc_context = ppc_search.get_context_for_flan(question)
+
+        # Só usa FLAN se encontrou contexto relevante no PPC
+        if not ppc_context or len(ppc_context.strip()) <= 50:
+            return Reply(NO_CONTEXT_REPLY, SOURCE_NO_CONTEXT)
+
+        context_text = f"{DEFAULT_CONTEXT}\n\nContexto do PPC:\n{ppc_context}"
+        try:
+            resposta = await flan_batcher.generate(question, context_text)
+        except InferenceQueueFull:
+            # Fila de inferência cheia: responde rápido em vez de acumular trabalho
+            print("Fila do FLAN-T5 cheia - usando resposta sem contexto")
+            return Reply(NO_CONTEXT_REPLY, SOURCE_NO_CONTEXT)
+        # Texto gerado pelo modelo não é Markdown: vai sem parse_mode
+        return Reply(resposta, SOURCE_FLAN, parse_mode=None)
+
+    except Exception as e:
+        print(f"Erro FLAN-T5: {e}")
+        return Reply(ERROR_REPLY, SOURCE_ERROR)
@@ -0,0 +1,91 @@
+"""
+Backends de inferência do FLAN-T5
+
+Cada backend carrega o modelo de uma forma diferente, mas todos devolvem
+um objeto com `generate(**inputs)` compatível com o Transformers, então
+`SafeFlanT5.generate_batch` funciona igual com qualquer um deles.
+
+Backends disponíveis (configurados em FLAN_BACKEND):
+- torch: PyTorch float32 (padrão, CPU ou GPU)
+- torch_int8: PyTorch com quantização dinâmica int8 das camadas Linear (CPU)
+- onnx: ONNX Runtime com KV-cache, via optimum (CPU)
+
+torch/transformers/optimum são importados dentro das funções, pois só
+devem ser carregados quando o modelo for de fato inicializado.
+"""
+
+import logging
+import os
+from typing import Any, Callable, Dict
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+BACKEND_TORCH = "torch"
+BACKEND_TORCH_INT8 = "torch_int8"
+BACKEND_ONNX = "onnx"
+
+# Backends que só rodam em CPU
+CPU_ONLY_BACKENDS = (BACKEND_TORCH_INT8, BACKEND_ONNX)
+
+# Diretório onde o modelo exportado para ONNX fica salvo entre execuções
+ONNX_EXPORT_DIR = os.path.join(settings.PROCESSED_DATA_DIR, "onnx")
+
+def load_torch(model_name: str, device: str) -> Any:
+    """Modelo PyTorch em float32"""
+    import torch
+    from transformers import AutoModelForSeq2SeqLM
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(
+        model_name,
+        device_map="auto" if torch.cuda.is_available() else None,
+        torch_dtype=torch.float32  # Mais estável que float16 em CPUs
+    ).to(device)
+    model.eval()
+    return model
+
+def load_torch_int8(model_name: str, device: str) -> Any:
+    """Modelo PyTorch com as camadas Linear quantizadas dinamicamente para int8"""
+    import torch
+    from transformers import AutoModelForSeq2SeqLM
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name, torch_dtype=torch.float32)
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def load_onnx(model_name: str, device: str) -> Any:
+    """
+    Modelo exportado para ONNX Runtime, com KV-cache no decoder.
+
+    A exportação acontece só na primeira vez; depois o modelo é lido de
+    ONNX_EXPORT_DIR.
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise ImportError(
+            "Backend 'onnx' requer o pacote optimum[onnxruntime]"
+        ) from e
+
+    export_dir = os.path.join(ONNX_EXPORT_DIR, model_name.replace("/", "__"))
+
+    if os.path.isdir(export_dir):
+        return ORTModelForSeq2SeqLM.from_pretrained(export_dir, use_cache=True)
+
+    logger.info(f"Exportando {model_name} para ONNX em {export_dir}")
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True)
+    model.save_pretrained(export_dir)
+    return model
+
+BACKENDS: Dict[str, Callable[[str, str], Any]] = {
+    BACKEND_TORCH: load_torch,
+    BACKEND_TORCH_INT8: load_torch_int8,
+    BACKEND_ONNX: load_onnx,
+}
+
+def load_model(backend: str, model_name: str, device: str) -> Any:
+    """Carrega o modelo com o backend pedido"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de inferência inválido: {backend}")
+    return BACKENDS[backend](model_name, device)
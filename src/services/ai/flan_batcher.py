@@ -0,0 +1,136 @@
+"""
+Micro-batching de requisições ao FLAN-T5
+
+Perguntas que chegam quase ao mesmo tempo (ex.: vários alunos no período
+de matrícula) são agrupadas por alguns milissegundos e processadas com uma
+única chamada a `SafeFlanT5.generate_batch`. Cada chamador recebe de volta
+apenas a sua resposta.
+
+Respostas já geradas para a mesma pergunta e contexto são servidas pelo
+cache (src/services/ai/response_cache.py) sem entrar na fila.
+
+Uso:
+    resposta = await flan_batcher.generate(pergunta, contexto)
+"""
+
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from config.settings import settings
+from src.services.ai.flan_service import FALLBACK_RESPONSES, InferenceQueueFull, flan_service
+from src.services.ai.response_cache import ResponseCache, flan_response_cache
+
+logger = logging.getLogger(__name__)
+
+class FlanMicroBatcher:
+    """
+    Fila assíncrona que agrupa requisições concorrentes em lotes.
+
+    Um lote é despachado quando atinge `max_batch_size` ou quando
+    `max_wait_ms` se passam desde a chegada da primeira requisição.
+    O worker é criado sob demanda no event loop do chamador; se o loop
+    mudar (ex.: um asyncio.run por invocação), fila e worker são recriados.
+
+    A fila aceita no máximo `max_queue` requisições; acima disso (ou com
+    o executor do serviço cheio) `generate` levanta InferenceQueueFull.
+    """
+
+    def __init__(self, service, max_batch_size: int = 8, max_wait_ms: float = 10, max_queue: int = 64,
+                 cache: Optional[ResponseCache] = None):
+        self.service = service
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight = set()
+
+    def _ensure_worker(self):
+        """Cria a fila e o worker no event loop atual, se necessário"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            # Fila e worker de um loop anterior (já fechado) não servem neste
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = loop.create_task(self._run())
+            self._in_flight = set()
+
+    async def generate(self, question: str, context: Optional[str] = None) -> str:
+        """
+        Enfileira a pergunta e aguarda a resposta do lote em que ela entrar.
+
+        Raises:
+            InferenceQueueFull: se a fila estiver cheia
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(question, context)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((question, context, future))
+        except asyncio.QueueFull:
+            raise InferenceQueueFull(f"{self.max_queue} perguntas aguardando o FLAN-T5")
+        response = await future
+
+        if cache_key is not None and response not in FALLBACK_RESPONSES:
+            self.cache.set(cache_key, response)
+        return response
+
+    async def _collect_batch(self) -> List[Tuple[str, Optional[str], asyncio.Future]]:
+        """Aguarda a primeira requisição e junta as que chegarem dentro da janela"""
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        """Loop do worker: coleta lotes e os despacha para o executor do serviço"""
+        while True:
+            batch = await self._collect_batch()
+            # Não espera o lote terminar: o executor limita a concorrência
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, Optional[str], asyncio.Future]]):
+        """Executa um lote fora do event loop e distribui os resultados"""
+        requests = [(question, context) for question, context, _ in batch]
+
+        try:
+            responses = await self.service.agenerate_batch(requests)
+        except Exception as e:
+            if not isinstance(e, InferenceQueueFull):
+                logger.error(f"Erro no lote de {len(batch)} requisições: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        logger.debug(f"Lote FLAN-T5 processado com {len(batch)} requisições")
+        for (_, _, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+# Instância global
+flan_batcher = FlanMicroBatcher(
+    flan_service,
+    max_batch_size=settings.FLAN_BATCH_MAX_SIZE,
+    max_wait_ms=settings.FLAN_BATCH_MAX_WAIT_MS,
+    max_queue=settings.FLAN_BATCH_MAX_SIZE * settings.FLAN_INFERENCE_MAX_QUEUE,
+    cache=flan_response_cache
+)
@@ -25,8 +25,15 @@ Autor: Desenvolvimento para TCC - Engenharia de Software UFC Quixadá
 Data: 2025
 """
 
-# Monkey-patch for split_torch_state_dict_into_shards
-import huggingface_hub
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from config.settings import settings
+from src.services.ai.backends import BACKENDS, BACKEND_TORCH, CPU_ONLY_BACKENDS, load_model
+from src.utils.timing import timed_startup
 
 # Contexto padrão específico do curso de Engenharia de Software UFC Quixadá
 DEFAULT_CONTEXT = """
@@ -38,21 +45,46 @@ Informações relevantes:
 - Período de matrícula: Janeiro e Julho
 """
 
-if not hasattr(huggingface_hub, "split_torch_state_dict_into_shards"):
-    def split_torch_state_dict_into_shards(state_dict, max_shard_size, post_process_kwargs=None):
-        # fallback trivial: um único “shard” com o estado completo
-        yield state_dict
-    huggingface_hub.split_torch_state_dict_into_shards = split_torch_state_dict_into_shards
+MODEL_NAME = "google/flan-t5-small"
 
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import torch
-import logging
-from typing import Optional
+# Respostas de fallback (não devem ser cacheadas como respostas do modelo)
+UNAVAILABLE_RESPONSE = "Serviço temporariamente indisponível."
+ERROR_RESPONSE = "Houve um erro ao processar sua pergunta."
+FALLBACK_RESPONSES = frozenset({UNAVAILABLE_RESPONSE, ERROR_RESPONSE})
+
+# torch/transformers levam segundos para importar: são carregados sob
+# demanda por _import_backend, no primeiro uso do modelo
+torch = None
+AutoTokenizer = None
+
+def _import_backend():
+    """Importa torch e transformers (uma única vez)"""
+    global torch, AutoTokenizer
+    if torch is not None:
+        return
+
+    # Monkey-patch for split_torch_state_dict_into_shards
+    import huggingface_hub
+
+    if not hasattr(huggingface_hub, "split_torch_state_dict_into_shards"):
+        def split_torch_state_dict_into_shards(state_dict, max_shard_size, post_process_kwargs=None):
+            # fallback trivial: um único “shard” com o estado completo
+            yield state_dict
+        huggingface_hub.split_torch_state_dict_into_shards = split_torch_state_dict_into_shards
+
+    import torch as torch_module
+    from transformers import AutoTokenizer as tokenizer_class
+
+    AutoTokenizer = tokenizer_class
+    torch = torch_module
 
 # Configuração básica de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class InferenceQueueFull(Exception):
+    """Fila de inferência cheia - o chamador deve usar uma resposta de fallback"""
+
 class SafeFlanT5:
     """
     Wrapper seguro para o modelo FLAN-T5 com otimizações para ambiente educacional.
@@ -66,47 +98,106 @@ class SafeFlanT5:
     - Configurações conservadoras para hardware limitado
     - Sistema de fallback para casos de erro
     - Logging estruturado para monitoramento
+    - Executor dedicado para inferência fora do event loop, com fila limitada
+    - Carregamento preguiçoso do modelo (lazy=True) para inicialização rápida
+    - Backends plugáveis: PyTorch float32, PyTorch int8 e ONNX Runtime
     
     Uso:
         service = SafeFlanT5()
         response = service.generate_response("pergunta", "contexto")
+        response = await service.agenerate_response("pergunta", "contexto")
     """
     
-    def __init__(self):
+    def __init__(self, max_workers: int = 1, max_pending: int = 16, lazy: bool = False,
+                 backend: str = BACKEND_TORCH, do_sample: bool = True):
         """
         Inicializa o serviço FLAN-T5 com configurações seguras.
         
-        Processo de inicialização:
+        Processo de inicialização (em load()):
         1. Detecta o melhor dispositivo disponível
         2. Carrega tokenizer com configurações rápidas
         3. Carrega modelo com configurações conservadoras
         4. Configura modo de avaliação para inferência
+        
+        Args:
+            max_workers: Threads dedicadas à inferência
+            max_pending: Máximo de jobs em execução ou aguardando no executor
+            lazy: Adia o carregamento do modelo até o primeiro uso
+            backend: Backend de inferência (ver src/services/ai/backends.py)
+            do_sample: Amostra a resposta (temperature=0.7); False usa só a
+                beam search, que dá sempre a mesma resposta para a mesma entrada
         """
-        self.device = self._select_safe_device()
-        logger.info(f"Inicializando modelo FLAN-T5 no dispositivo: {self.device}")
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend de inferência inválido: {backend}")
         
-        try:
-            # Configurações seguras para hardware limitado
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                "google/flan-t5-small",
-                use_fast=True
-            )
-            
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(
-                "google/flan-t5-small",
-                device_map="auto" if torch.cuda.is_available() else None,
-                torch_dtype=torch.float32  # Mais estável que float16 em CPUs
-            ).to(self.device)
+        self.backend = backend
+        self.do_sample = do_sample
+        self.max_pending = max_pending
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="flan-inference"
+        )
+        
+        self.device = None
+        self.tokenizer = None
+        self.model = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        
+        if not lazy:
+            self.load()
+
+    def load(self) -> bool:
+        """
+        Carrega tokenizer e modelo, se ainda não carregados.
+        
+        Seguro para chamadas concorrentes (ex.: warm-up e primeira pergunta).
+        
+        Returns:
+            True se o modelo está disponível, False em modo de fallback
+        """
+        if self._loaded:
+            return self.model is not None
+        
+        with self._load_lock:
+            if self._loaded:
+                return self.model is not None
             
-            self.model.eval()
-            logger.info("Modelo carregado com sucesso")
+            try:
+                with timed_startup("flan_t5"):
+                    self._load_model()
+                logger.info("Modelo carregado com sucesso")
+                
+            except Exception as e:
+                logger.error(f"Erro na inicialização: {str(e)}")
+                self.model = None  # Modo de fallback
+                logger.warning("Modelo não carregado - operando em modo limitado")
             
-        except Exception as e:
-            logger.error(f"Erro na inicialização: {str(e)}")
-            self.model = None  # Modo de fallback
+            self._loaded = True
+        
+        return self.model is not None
+
+    def _load_model(self):
+        """Importa o backend e carrega tokenizer e modelo"""
+        _import_backend()
+
+        self.device = self._select_safe_device()
+        logger.info(f"Inicializando modelo FLAN-T5 ({self.backend}) no dispositivo: {self.device}")
+        
+        # Configurações seguras para hardware limitado
+        self.tokenizer = AutoTokenizer.from_pretrained(
+            MODEL_NAME,
+            use_fast=True
+        )
+        
+        self.model = load_model(self.backend, MODEL_NAME, self.device)
 
     def _select_safe_device(self) -> str:
         """Seleciona o dispositivo mais adequado com verificações de segurança"""
+        if self.backend in CPU_ONLY_BACKENDS:
+            return "cpu"
         if torch.cuda.is_available():
             try:
                 # Verificação conservadora para GPUs com pouca VRAM
@@ -116,48 +207,115 @@ class SafeFlanT5:
                 pass
         return "cpu"
 
-    def generate_response(self, question: str, context: str = None) -> str:
-        if not self.model:
-            return "Serviço temporariamente indisponível."
-        
+    def _build_input_text(self, question: str, context: Optional[str]) -> str:
+        """Monta o prompt no formato question/context esperado pelo modelo"""
+        # Contexto aprimorado
+        safe_context = DEFAULT_CONTEXT + (context if context else "")
+        return f"question: {question[:150]}\ncontext: {safe_context[:1000]}"
+
+    def _postprocess(self, response: str) -> str:
+        """Pós-processamento para respostas mais naturais"""
+        if response.lower().startswith("não sei") or len(response) < 5:
+            return "Não encontrei informações precisas sobre isso no meu banco de dados."
+        return response.strip()
+
+    def generate_batch(self, requests: List[Tuple[str, Optional[str]]]) -> List[str]:
+        """
+        Gera respostas para várias perguntas com uma única chamada a generate.
+
+        As entradas são tokenizadas juntas (com padding) em um único tensor,
+        e as saídas são devolvidas na mesma ordem de `requests`.
+
+        Args:
+            requests: Lista de pares (pergunta, contexto)
+
+        Returns:
+            Lista de respostas, uma por pergunta
+        """
+        if not requests:
+            return []
+
+        if not self.load():
+            return [UNAVAILABLE_RESPONSE] * len(requests)
+
         try:
-            # Contexto aprimorado
-            safe_context = DEFAULT_CONTEXT + (context if context else "")
-            
-            input_text = f"question: {question[:150]}\ncontext: {safe_context[:1000]}"
-            
+            input_texts = [self._build_input_text(question, context) for question, context in requests]
+
             inputs = self.tokenizer(
-                input_text,
+                input_texts,
                 return_tensors="pt",
                 max_length=384,
-                truncation=True
+                truncation=True,
+                padding=True
             ).to(self.device)
-            
+
+            sampling = {"temperature": 0.7, "do_sample": True} if self.do_sample else {"do_sample": False}
             with torch.no_grad():
                 outputs = self.model.generate(
                     **inputs,
                     max_new_tokens=100,
                     num_beams=3,
-                    temperature=0.7,
-                    do_sample=True
+                    **sampling
                 )
-            
-            response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-            # Pós-processamento para respostas mais naturais
-            if response.lower().startswith("não sei") or len(response) < 5:
-                return "Não encontrei informações precisas sobre isso no meu banco de dados."
-                
-            return response.strip()
-        
+
+            responses = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+            return [self._postprocess(response) for response in responses]
+
         except Exception as e:
             print(f"Erro na geração: {e}")
-            return "Houve um erro ao processar sua pergunta."
-# Instância global
+            return [ERROR_RESPONSE] * len(requests)
+
+    def generate_response(self, question: str, context: str = None) -> str:
+        return self.generate_batch([(question, context)])[0]
+
+    def submit_batch(self, requests: List[Tuple[str, Optional[str]]]) -> Future:
+        """
+        Agenda generate_batch no executor de inferência.
+
+        Raises:
+            InferenceQueueFull: se já houver max_pending jobs na fila
+        """
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                raise InferenceQueueFull(f"{self._pending} jobs de inferência pendentes")
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(self.generate_batch, requests)
+        except Exception:
+            self._release_slot()
+            raise
+
+        future.add_done_callback(lambda _: self._release_slot())
+        return future
+
+    def _release_slot(self):
+        with self._pending_lock:
+            self._pending -= 1
+
+    async def agenerate_batch(self, requests: List[Tuple[str, Optional[str]]]) -> List[str]:
+        """Versão assíncrona de generate_batch, executada fora do event loop"""
+        return await asyncio.wrap_future(self.submit_batch(requests))
+
+    async def agenerate_response(self, question: str, context: str = None) -> str:
+        """Versão assíncrona de generate_response, executada fora do event loop"""
+        return (await self.agenerate_batch([(question, context)]))[0]
+
+    def shutdown(self, wait: bool = True):
+        """Encerra o executor de inferência"""
+        self._executor.shutdown(wait=wait)
+
+# Instância global (o modelo é carregado no primeiro uso ou no warm-up)
 try:
-    flan_service = SafeFlanT5()
-    if flan_service.model is None:
-        logger.warning("Modelo não carregado - operando em modo limitado")
+    flan_service = SafeFlanT5(
+        max_workers=settings.FLAN_INFERENCE_WORKERS,
+        max_pending=settings.FLAN_INFERENCE_MAX_QUEUE,
+        lazy=True,
+        backend=settings.FLAN_BACKEND,
+        # Com o cache de respostas ligado, a resposta cacheada seria uma
+        # amostra congelada: a geração passa a ser determinística
+        do_sample=settings.FLAN_CACHE_MAX_SIZE <= 0
+    )
 except Exception as e:
     logger.critical(f"Falha na inicialização do serviço: {str(e)}")
-    flan_service = None
\ No newline at end of file
+    flan_service = None
@@ -0,0 +1,108 @@
+"""
+Cache de respostas do FLAN-T5
+
+Perguntas repetidas (ex.: "quantas horas de estágio?") com o mesmo contexto
+recuperado do PPC reaproveitam a resposta já gerada, em vez de rodar uma
+nova beam search.
+
+Com o cache ligado (FLAN_CACHE_MAX_SIZE > 0) o FLAN-T5 gera sem amostragem
+(src/services/ai/flan_service.py), então a resposta cacheada é a mesma que
+uma nova geração daria, e não uma amostra congelada.
+
+A chave combina o texto normalizado da pergunta com um hash do contexto,
+então qualquer mudança nos chunks recuperados gera uma chave nova. O cache
+é LRU com tamanho máximo e TTL por entrada.
+"""
+
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import settings
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+def normalize_question(question: str) -> str:
+    """Normaliza a pergunta: caixa, espaços e pontuação nas pontas"""
+    text = unicodedata.normalize("NFKC", question).casefold()
+    text = WHITESPACE_PATTERN.sub(" ", text)
+    return text.strip(" ?!.,;:")
+
+class ResponseCache:
+    """
+    Cache LRU + TTL para respostas geradas.
+
+    Uso:
+        key = cache.make_key(pergunta, contexto)
+        resposta = cache.get(key)
+        if resposta is None:
+            resposta = gerar(...)
+            cache.set(key, resposta)
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 86400):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(question: str, context: Optional[str]) -> Tuple[str, str]:
+        """Chave = pergunta normalizada + hash do contexto"""
+        context_hash = hashlib.sha1((context or "").encode("utf-8")).hexdigest()
+        return normalize_question(question), context_hash
+
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        """Retorna a resposta cacheada ou None (entrada ausente ou expirada)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, response = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def set(self, key: Tuple[str, str], response: str):
+        """Armazena a resposta, descartando a menos usada se passar do limite"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Invalida todas as entradas (ex.: quando os chunks do PPC são recarregados)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de uso do cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+# Instância global
+flan_response_cache = ResponseCache(
+    max_size=settings.FLAN_CACHE_MAX_SIZE,
+    ttl=settings.FLAN_CACHE_TTL
+)
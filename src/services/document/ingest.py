@@ -0,0 +1,198 @@
+"""
+Ingestão de vários PDFs em um único corpus
+
+Recebe diretórios, globs ou arquivos e processa os PDFs em paralelo, um
+documento por processo. A segmentação é a mesma do PDFProcessor (chunks
+por página, ids derivados do hash da página). Cada chunk recebe o
+documento de origem ('source') e a página ('pages'), e os ids ganham o
+documento como prefixo para não colidirem no corpus. O corpus gerado pode
+ser usado pela busca via PPC_CHUNKS_FILE: o arquivo é substituído de uma
+vez e a busca em execução aplica só os chunks que mudaram
+(PPCSearch.refresh).
+
+Uso:
+    python -m src.services.document.ingest data/raw -o data/qa/corpus.json
+    python -m src.services.document.ingest "data/raw/resolucoes/*.pdf" data/raw/PPC-ES-2023.pdf \\
+        -o data/qa/corpus.ndjson --workers 4
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+from src.services.document.pdf_processor import PDFProcessor, open_atomic, validate_chunking
+
+def find_pdfs(inputs: List[str]) -> List[str]:
+    """Expande diretórios (recursivamente) e globs em uma lista de PDFs sem repetição"""
+    paths: List[str] = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, "**", "*.pdf"), recursive=True)
+        else:
+            matches = glob.glob(item, recursive=True)
+        paths.extend(sorted(path for path in matches if path.lower().endswith(".pdf")))
+
+    return list(dict.fromkeys(os.path.normpath(path) for path in paths))
+
+def document_ids(paths: List[str]) -> List[str]:
+    """
+    Nome de cada arquivo sem extensão, com sufixo quando o id já foi usado.
+
+    O sufixo é conferido contra todos os ids já atribuídos: "a.pdf",
+    "x/a.pdf" e "a-2.pdf" viram "a", "a-2" e "a-2-2".
+    """
+    ids: List[str] = []
+    assigned: Set[str] = set()
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        document_id, suffix = name, 1
+        while document_id in assigned:
+            suffix += 1
+            document_id = f"{name}-{suffix}"
+        assigned.add(document_id)
+        ids.append(document_id)
+    return ids
+
+def ingest_document(task: Tuple[str, str, int, int, int]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Processa um PDF (roda em um processo do pool).
+
+    Returns:
+        (estatísticas do documento, chunks já marcados com a origem)
+    """
+    pdf_path, document_id, chunk_size, overlap, page_workers = task
+    started = time.perf_counter()
+    stats: Dict[str, Any] = {
+        "document": document_id,
+        "source": pdf_path,
+        "bytes": os.path.getsize(pdf_path),
+    }
+
+    chunks: List[Dict[str, Any]] = []
+    try:
+        processor = PDFProcessor(pdf_path, workers=page_workers)
+        for chunk in processor.iter_chunks(chunk_size, overlap):
+            chunk["id"] = f"{document_id}:{chunk['id']}"
+            chunk["source"] = document_id
+            chunks.append(chunk)
+        stats["pages"] = processor.page_count()
+    except Exception as e:
+        print(f"Erro ao processar {pdf_path}: {e}")
+        stats["error"] = str(e)
+        stats["pages"] = 0
+        chunks = []
+
+    elapsed = time.perf_counter() - started
+    stats["chunks"] = len(chunks)
+    stats["seconds"] = round(elapsed, 3)
+    stats["pages_per_second"] = round(stats["pages"] / elapsed, 1) if elapsed else 0.0
+    return stats, chunks
+
+def ingest(paths: List[str], chunk_size: int = 800, overlap: int = 150,
+           workers: int = None) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Processa os PDFs em paralelo e gera (estatísticas, chunks) na ordem de `paths`.
+
+    Com um único documento, o paralelismo fica por conta do próprio
+    PDFProcessor (faixas de páginas); com vários, cada processo cuida de
+    um documento inteiro.
+    """
+    validate_chunking(chunk_size, overlap)
+    return _ingest(paths, chunk_size, overlap, workers)
+
+def _ingest(paths: List[str], chunk_size: int, overlap: int,
+            workers: int = None) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    workers = workers or os.cpu_count() or 1
+    ids = document_ids(paths)
+
+    if len(paths) == 1 or workers == 1:
+        for path, document_id in zip(paths, ids):
+            yield ingest_document((path, document_id, chunk_size, overlap, workers))
+        return
+
+    tasks = [(path, document_id, chunk_size, overlap, 1) for path, document_id in zip(paths, ids)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        yield from executor.map(ingest_document, tasks)
+
+def write_corpus(results: Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]],
+                 output_path: str) -> List[Dict[str, Any]]:
+    """
+    Grava o corpus à medida que os documentos ficam prontos e retorna as estatísticas.
+
+    Em .ndjson os chunks são escritos um por linha, sem acumular o corpus
+    em memória; nos demais casos é gerado o mesmo formato JSON de
+    PDFProcessor.save_chunks_to_json, com as estatísticas em 'documents'.
+    """
+    documents: List[Dict[str, Any]] = []
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    if output_path.endswith(".ndjson"):
+        with open_atomic(output_path) as f:
+            for stats, chunks in results:
+                documents.append(stats)
+                for chunk in chunks:
+                    f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+        return documents
+
+    corpus: List[Dict[str, Any]] = []
+    for stats, chunks in results:
+        documents.append(stats)
+        corpus.extend(chunks)
+
+    data = {
+        "source": [stats["source"] for stats in documents],
+        "total_chunks": len(corpus),
+        "documents": documents,
+        "chunks": corpus
+    }
+    with open_atomic(output_path) as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return documents
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um corpus de chunks a partir de vários PDFs")
+    parser.add_argument("inputs", nargs="+",
+                        help="Diretórios, globs (entre aspas) ou arquivos PDF")
+    parser.add_argument("-o", "--output", default="data/qa/corpus.json",
+                        help="Arquivo do corpus (.json ou .ndjson)")
+    parser.add_argument("--chunk-size", type=int, default=800,
+                        help="Palavras por chunk")
+    parser.add_argument("--overlap", type=int, default=150,
+                        help="Palavras repetidas entre chunks vizinhos")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processos em paralelo (padrão: número de CPUs)")
+    args = parser.parse_args()
+
+    try:
+        validate_chunking(args.chunk_size, args.overlap)
+    except ValueError as e:
+        parser.error(str(e))
+
+    paths = find_pdfs(args.inputs)
+    if not paths:
+        parser.error("nenhum PDF encontrado")
+
+    started = time.perf_counter()
+    documents = write_corpus(ingest(paths, args.chunk_size, args.overlap, args.workers), args.output)
+    elapsed = time.perf_counter() - started
+
+    for stats in documents:
+        status = f"  ERRO: {stats['error']}" if "error" in stats else ""
+        print(
+            f"  {stats['document']}: {stats['pages']} páginas, {stats['chunks']} chunks, "
+            f"{stats['bytes']} bytes, {stats['pages_per_second']} páginas/s{status}"
+        )
+
+    total_pages = sum(stats["pages"] for stats in documents)
+    print(
+        f"Corpus salvo em {args.output}: {len(documents)} documentos, {total_pages} páginas, "
+        f"{sum(stats['chunks'] for stats in documents)} chunks em {elapsed:.1f}s "
+        f"({total_pages / elapsed if elapsed else 0:.1f} páginas/s)"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,290 @@
 import fitz  # PyMuPDF
+import hashlib
 import json
+import os
 import re
-from typing import List, Dict, Any
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterable, Iterator, NamedTuple, Optional, Set, TextIO, Tuple
 from difflib import SequenceMatcher
 
+from src.utils.term_matcher import TermMatcher
+
+# Abaixo disso a extração roda no próprio processo (o pool não compensa)
+MIN_PAGES_FOR_POOL = 16
+
+# Páginas extraídas por tarefa do pool
+PAGES_PER_TASK = 8
+
+# Palavras-chave relevantes para o curso
+COURSE_KEYWORDS = [
+    'estágio', 'matrícula', 'disciplina', 'crédito', 'semestre',
+    'engenharia', 'software', 'graduação', 'curso', 'ppc',
+    'projeto', 'pedagógico', 'competência', 'habilidade',
+    'carga horária', 'pré-requisito', 'optativa', 'obrigatória',
+    'coordenação', 'professor', 'aluno', 'avaliação'
+]
+
+# Termo -> seção, em ordem de prioridade (vale o primeiro termo presente)
+SECTION_TERMS = [
+    ('estágio', 'estágio'),
+    ('matrícula', 'matrícula'),
+    ('disciplina', 'disciplinas'),
+    ('competência', 'competências'),
+    ('habilidade', 'competências'),
+    ('projeto pedagógico', 'projeto_pedagógico'),
+    ('ppc', 'projeto_pedagógico'),
+]
+
+# Palavras-chave e termos de seção encontrados em uma única passada pelo texto
+TERM_MATCHER = TermMatcher(COURSE_KEYWORDS + [term for term, _ in SECTION_TERMS])
+
+def _extract_page_range(task: Tuple[str, int, int]) -> List[str]:
+    """Extrai o texto das páginas [start, end) abrindo o documento no próprio worker"""
+    pdf_path, start, end = task
+    doc = fitz.open(pdf_path)
+    try:
+        return [doc[page_num].get_text() for page_num in range(start, end)]
+    finally:
+        doc.close()
+
+def page_hash(text: str) -> str:
+    """Hash do conteúdo de uma página (identifica páginas inalteradas entre revisões)"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def load_chunks_file(path: str) -> Optional[Dict[str, Any]]:
+    """Lê um arquivo de chunks salvo por save_chunks_to_json (None se não existir)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def validate_chunking(chunk_size: int, overlap: int):
+    """Exige 0 <= overlap < chunk_size (senão a janela nunca avança)"""
+    if not 0 <= overlap < chunk_size:
+        raise ValueError(
+            f"overlap deve estar entre 0 e chunk_size - 1 (chunk_size={chunk_size}, overlap={overlap})"
+        )
+
+@contextmanager
+def open_atomic(path: str) -> Iterator[TextIO]:
+    """
+    Abre um arquivo temporário que substitui `path` de uma vez ao final.
+
+    Quem está servindo a busca (PPCSearch.refresh) nunca lê um arquivo de
+    chunks pela metade; se a escrita falhar, o arquivo anterior fica intacto.
+    """
+    temp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            yield f
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+class ChunkChanges(NamedTuple):
+    """O que mudou nos chunks em relação à versão anterior"""
+    upserted: List[Dict[str, Any]]  # Chunks novos ou com metadados alterados
+    removed: List[str]              # Ids que deixaram de existir
+    reused: int                     # Chunks reaproveitados sem mudança
+    changed_pages: List[int]        # Páginas re-segmentadas
+
 class PDFProcessor:
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, workers: Optional[int] = None):
         self.pdf_path = pdf_path
+        self.workers = workers or os.cpu_count() or 1
         self.chunks = []
         self.metadata = {}
+    
+    def page_count(self) -> int:
+        doc = fitz.open(self.pdf_path)
+        try:
+            return len(doc)
+        finally:
+            doc.close()
+    
+    def iter_pages(self) -> Iterator[str]:
+        """Texto de cada página, com o marcador "--- Página N ---" """
+        for page_num, text in enumerate(self.iter_page_texts(), 1):
+            yield f"\n--- Página {page_num} ---\n{text}"
+    
+    def iter_page_texts(self) -> Iterator[str]:
+        """
+        Texto bruto de cada página, em ordem, à medida que é extraído.
+        
+        As páginas são divididas em faixas de PAGES_PER_TASK; cada processo
+        do pool abre o documento e extrai a sua faixa. No máximo
+        2 * workers faixas ficam em andamento ao mesmo tempo, então a
+        memória usada não cresce com o tamanho do documento.
+        """
+        page_count = self.page_count()
+        
+        workers = min(self.workers, -(-page_count // PAGES_PER_TASK))
+        if workers <= 1 or page_count < MIN_PAGES_FOR_POOL:
+            for start in range(0, page_count, PAGES_PER_TASK):
+                yield from _extract_page_range((self.pdf_path, start, min(start + PAGES_PER_TASK, page_count)))
+            return
+        
+        tasks = (
+            (self.pdf_path, start, min(start + PAGES_PER_TASK, page_count))
+            for start in range(0, page_count, PAGES_PER_TASK)
+        )
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = deque()
+            for task in tasks:
+                in_flight.append(executor.submit(_extract_page_range, task))
+                if len(in_flight) >= 2 * workers:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+    
+    def extract_pages(self) -> List[str]:
+        """Texto de todas as páginas, em ordem (extraído em paralelo)"""
+        return list(self.iter_pages())
+    
+    def iter_chunks(self, chunk_size: int = 1000, overlap: int = 200) -> Iterator[Dict[str, Any]]:
+        """
+        Modo streaming: gera os chunks página a página.
+        
+        Mesma segmentação de update_chunks (ids derivados do hash da página,
+        janela de cada página começando com as últimas `overlap` palavras da
+        anterior), mas sem guardar nada: só a página atual fica em memória.
+        Cada chunk traz as páginas que cobre ('pages': [primeira, última]).
+        
+        Raises:
+            ValueError: se overlap não estiver em [0, chunk_size)
+        """
+        # Validado já na chamada, não só no primeiro next()
+        validate_chunking(chunk_size, overlap)
+        return self._iter_chunks(chunk_size, overlap)
+    
+    def _iter_chunks(self, chunk_size: int, overlap: int) -> Iterator[Dict[str, Any]]:
+        for page_num, key, words, carry in self._iter_page_windows(overlap):
+            yield from self._create_page_chunks(key, page_num, words, carry, chunk_size, overlap)
+    
+    def _iter_keyed_pages(self) -> Iterator[Tuple[int, str, str]]:
+        """(número da página, chave, texto) de cada página; a chave vem do hash do conteúdo"""
+        occurrences: Dict[str, int] = {}
+        for page_num, text in enumerate(self.iter_page_texts(), 1):
+            digest = page_hash(text)[:16]
+            # Páginas idênticas (ex.: em branco) recebem chaves distintas
+            occurrence = occurrences.get(digest, 0)
+            occurrences[digest] = occurrence + 1
+            yield page_num, (digest if occurrence == 0 else f"{digest}-{occurrence}"), text
+    
+    def _iter_page_windows(self, overlap: int) -> Iterator[Tuple[int, str, List[str], List[str]]]:
+        """
+        (número da página, chave, palavras, palavras herdadas) de cada página.
+        
+        As palavras herdadas são as últimas `overlap` palavras da página
+        anterior: o texto que atravessa a quebra de página aparece inteiro
+        no primeiro chunk da página seguinte, como na janela deslizante
+        sobre o documento inteiro.
+        """
+        carry: List[str] = []
+        for page_num, key, text in self._iter_keyed_pages():
+            words = self._clean_text(text).split()
+            yield page_num, key, words, carry
+            carry = words[-overlap:] if overlap else []
+    
+    def update_chunks(self, previous: Optional[Dict[str, Any]] = None, chunk_size: int = 1000,
+                      overlap: int = 200) -> Tuple[Dict[str, Any], ChunkChanges]:
+        """
+        Modo incremental: re-segmenta só as páginas que mudaram.
+        
+        O id de cada chunk deriva do hash da página de origem, então páginas
+        inalteradas (mesmo que tenham mudado de posição) mantêm os mesmos
+        ids. Como a janela de uma página começa com o fim da anterior, uma
+        página também é re-segmentada quando esse fim muda. `previous` é o
+        conteúdo do arquivo salvo na execução anterior (load_chunks_file);
+        sem ele, ou com outros chunk_size/overlap, tudo é re-segmentado.
+        
+        Returns:
+            (dados para save_chunks_to_json, mudanças em relação a previous)
         
+        Raises:
+            ValueError: se overlap não estiver em [0, chunk_size)
+        """
+        validate_chunking(chunk_size, overlap)
+        reusable: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        if previous and previous.get('chunk_size') == chunk_size and previous.get('overlap') == overlap:
+            previous_chunks = {chunk['id']: chunk for chunk in previous.get('chunks', [])}
+            for page in previous.get('pages', []):
+                if 'carry' in page and all(chunk_id in previous_chunks for chunk_id in page['chunks']):
+                    reusable[page['key'], page['carry']] = [previous_chunks[chunk_id] for chunk_id in page['chunks']]
+        
+        chunks: List[Dict[str, Any]] = []
+        pages: List[Dict[str, Any]] = []
+        upserted: List[Dict[str, Any]] = []
+        changed_pages: List[int] = []
+        reused = 0
+        
+        for page_num, key, words, carry in self._iter_page_windows(overlap):
+            carry_key = page_hash(' '.join(carry))[:16] if carry else ''
+            page_chunks = reusable.get((key, carry_key))
+            if page_chunks is None:
+                page_chunks = self._create_page_chunks(key, page_num, words, carry, chunk_size, overlap)
+                upserted.extend(page_chunks)
+                changed_pages.append(page_num)
+            else:
+                for index, chunk in enumerate(page_chunks):
+                    first_page, last_page = chunk.get('pages', (page_num, page_num))
+                    expected = [page_num - (last_page - first_page), page_num]
+                    if chunk.get('pages') != expected:
+                        # Página mudou de posição: só o metadado é atualizado
+                        page_chunks[index] = chunk = {**chunk, 'pages': expected}
+                        upserted.append(chunk)
+                    else:
+                        reused += 1
+            
+            chunks.extend(page_chunks)
+            pages.append({'key': key, 'carry': carry_key, 'chunks': [chunk['id'] for chunk in page_chunks]})
+        
+        current_ids = {chunk['id'] for chunk in chunks}
+        removed = [
+            chunk['id'] for chunk in (previous or {}).get('chunks', [])
+            if chunk['id'] not in current_ids
+        ]
+        
+        data = {
+            'chunks': chunks,
+            'pages': pages,
+            'chunk_size': chunk_size,
+            'overlap': overlap
+        }
+        return data, ChunkChanges(upserted, removed, reused, changed_pages)
+    
+    def _create_page_chunks(self, key: str, page_num: int, words: List[str], carry: List[str],
+                            chunk_size: int, overlap: int) -> List[Dict[str, Any]]:
+        """Divide uma página em chunks com sobreposição, começando pelas palavras herdadas da anterior"""
+        chunks = []
+        if not words:
+            return chunks
+        
+        window = carry + words
+        for i in range(0, len(window), chunk_size - overlap):
+            # Chunk que começa nas palavras herdadas atravessa a quebra de página
+            first_page = page_num - 1 if i < len(carry) else page_num
+            chunks.append(self._make_chunk(f"chunk_{key}_{len(chunks) + 1}", window[i:i + chunk_size],
+                                           (first_page, page_num)))
+            if i + chunk_size >= len(window):
+                # O resto da janela já está neste chunk
+                break
+        
+        return chunks
+    
     def extract_text_with_chunks(self, chunk_size: int = 1000, overlap: int = 200) -> List[Dict[str, Any]]:
         """Extrai texto do PDF e divide em chunks menores"""
+        validate_chunking(chunk_size, overlap)
         print(f"Extraindo texto de {self.pdf_path}...")
         
         try:
-            doc = fitz.open(self.pdf_path)
-            full_text = ""
-            
-            # Extrai texto de todas as páginas
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text = page.get_text()
-                full_text += f"\n--- Página {page_num + 1} ---\n{text}"
-            
-            doc.close()
-            
-            # Limpa o texto
-            full_text = self._clean_text(full_text)
-            
-            # Divide em chunks
-            chunks = self._create_chunks(full_text, chunk_size, overlap)
+            # Mesma segmentação por página do modo streaming e do incremental
+            chunks = list(self._iter_chunks(chunk_size, overlap))
             
             print(f"Extraido {len(chunks)} chunks do PDF")
             return chunks
@@ -49,78 +303,71 @@ class PDFProcessor:
         text = re.sub(r'[^\w\s\-.,;:!?()[\]{}/"\'@#$%&+=*]', '', text)
         return text.strip()
     
-    def _create_chunks(self, text: str, chunk_size: int, overlap: int) -> List[Dict[str, Any]]:
-        """Divide o texto em chunks com sobreposição"""
-        chunks = []
-        words = text.split()
+    def _make_chunk(self, chunk_id: str, chunk_words: List[str],
+                    pages: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        chunk_text = ' '.join(chunk_words)
+        terms = TERM_MATCHER.present(chunk_text.lower())
         
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk_words = words[i:i + chunk_size]
-            chunk_text = ' '.join(chunk_words)
-            
-            # Extrai informações relevantes do chunk
-            chunk_data = {
-                'id': f"chunk_{len(chunks) + 1}",
-                'text': chunk_text,
-                'word_count': len(chunk_words),
-                'keywords': self._extract_keywords(chunk_text),
-                'section': self._identify_section(chunk_text)
-            }
-            
-            chunks.append(chunk_data)
+        # Extrai informações relevantes do chunk
+        chunk = {
+            'id': chunk_id,
+            'text': chunk_text,
+            'word_count': len(chunk_words),
+            'keywords': self._extract_keywords(chunk_text, terms),
+            'section': self._identify_section(chunk_text, terms)
+        }
+        if pages:
+            chunk['pages'] = list(pages)
+        return chunk
+    
+    def _extract_keywords(self, text: str, terms: Optional[Set[str]] = None) -> List[str]:
+        """Extrai palavras-chave do texto (`terms`: termos já encontrados por TERM_MATCHER)"""
+        if terms is None:
+            terms = TERM_MATCHER.present(text.lower())
         
-        return chunks
+        return [keyword for keyword in COURSE_KEYWORDS if keyword in terms]
     
-    def _extract_keywords(self, text: str) -> List[str]:
-        """Extrai palavras-chave do texto"""
-        # Palavras-chave relevantes para o curso
-        keywords = [
-            'estágio', 'matrícula', 'disciplina', 'crédito', 'semestre',
-            'engenharia', 'software', 'graduação', 'curso', 'ppc',
-            'projeto', 'pedagógico', 'competência', 'habilidade',
-            'carga horária', 'pré-requisito', 'optativa', 'obrigatória',
-            'coordenação', 'professor', 'aluno', 'avaliação'
-        ]
+    def _identify_section(self, text: str, terms: Optional[Set[str]] = None) -> str:
+        """Identifica a seção do documento (`terms`: termos já encontrados por TERM_MATCHER)"""
+        if terms is None:
+            terms = TERM_MATCHER.present(text.lower())
         
-        found_keywords = []
-        text_lower = text.lower()
-        
-        for keyword in keywords:
-            if keyword in text_lower:
-                found_keywords.append(keyword)
-        
-        return found_keywords
-    
-    def _identify_section(self, text: str) -> str:
-        """Identifica a seção do documento"""
-        text_lower = text.lower()
-        
-        if 'estágio' in text_lower:
-            return 'estágio'
-        elif 'matrícula' in text_lower:
-            return 'matrícula'
-        elif 'disciplina' in text_lower:
-            return 'disciplinas'
-        elif 'competência' in text_lower or 'habilidade' in text_lower:
-            return 'competências'
-        elif 'projeto pedagógico' in text_lower or 'ppc' in text_lower:
-            return 'projeto_pedagógico'
-        else:
-            return 'geral'
-    
-    def save_chunks_to_json(self, chunks: List[Dict[str, Any]], output_path: str):
-        """Salva os chunks em um arquivo JSON"""
+        for term, section in SECTION_TERMS:
+            if term in terms:
+                return section
+        return 'geral'
+    
+    def save_chunks_to_json(self, chunks: List[Dict[str, Any]], output_path: str,
+                            metadata: Optional[Dict[str, Any]] = None):
+        """Salva os chunks em um arquivo JSON (com metadados extras, ex.: hashes das páginas)"""
         data = {
             'source': self.pdf_path,
             'total_chunks': len(chunks),
+            **(metadata or {}),
             'chunks': chunks
         }
         
-        with open(output_path, 'w', encoding='utf-8') as f:
+        with open_atomic(output_path) as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
         
         print(f"Chunks salvos em {output_path}")
     
+    def save_chunks_to_ndjson(self, chunks: Iterable[Dict[str, Any]], output_path: str) -> int:
+        """
+        Grava os chunks em NDJSON (um por linha) à medida que são gerados.
+        
+        Aceita o gerador de iter_chunks, então o arquivo é escrito sem
+        manter os chunks em memória. Retorna quantos chunks foram gravados.
+        """
+        total = 0
+        with open_atomic(output_path) as f:
+            for chunk in chunks:
+                f.write(json.dumps(chunk, ensure_ascii=False) + '\n')
+                total += 1
+        
+        print(f"{total} chunks salvos em {output_path}")
+        return total
+    
     def search_chunks(self, query: str, chunks: List[Dict[str, Any]], top_k: int = 3) -> List[Dict[str, Any]]:
         """Busca nos chunks usando similaridade de texto"""
         query_lower = query.lower()
@@ -147,6 +394,15 @@ class PDFProcessor:
         return [item['chunk'] for item in scored_chunks[:top_k]]
 
 if __name__ == "__main__":
+    output_path = "data/qa/public/ppc_chunks.json"
     processor = PDFProcessor("data/raw/PPC-ES-2023.pdf")
-    chunks = processor.extract_text_with_chunks(chunk_size=800, overlap=150)
-    processor.save_chunks_to_json(chunks, "data/qa/ppc_chunks.json")
+    
+    # Reaproveita os chunks das páginas que não mudaram desde a última execução;
+    # a busca em execução percebe o arquivo novo e aplica só as diferenças
+    # (PPCSearch.refresh)
+    data, changes = processor.update_chunks(load_chunks_file(output_path), chunk_size=800, overlap=150)
+    processor.save_chunks_to_json(data.pop('chunks'), output_path, data)
+    print(
+        f"{len(changes.changed_pages)} páginas re-segmentadas, {changes.reused} chunks reaproveitados, "
+        f"{len(changes.upserted)} novos/atualizados, {len(changes.removed)} removidos"
+    )
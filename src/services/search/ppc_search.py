@@ -1,43 +1,520 @@
 import json
-from typing import List, Dict, Any
+import logging
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from contextlib import nullcontext
+from typing import Callable, Iterable, List, Dict, Any, Optional, Set, Tuple
 from difflib import SequenceMatcher
 
+from src.utils.markdown import escape_markdown
+from src.utils.term_matcher import TermMatcher
+from src.utils.timing import timed_startup
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Seções que recebem bônus quando o termo aparece na query
+SECTION_BONUS_TERMS = {
+    'estágio': 'estágio',
+    'matrícula': 'matrícula',
+    'disciplinas': 'disciplina',
+}
+
+# Modos de ranqueamento suportados por PPCSearch
+RANKING_HEURISTIC = "heuristic"
+RANKING_BM25 = "bm25"
+RANKING_MODES = (RANKING_HEURISTIC, RANKING_BM25)
+
+# Score mínimo do modo heurístico
+HEURISTIC_MIN_SCORE = 0.1
+
+# Margem para a poda não descartar chunks por diferença de arredondamento
+PRUNE_EPSILON = 1e-9
+
+# Tamanho dos n-gramas de caracteres do índice de substrings (modo heurístico)
+NGRAM_SIZE = 3
+
+# Parâmetros padrão do Okapi BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Score BM25 mínimo para um chunk ser retornado. Termos presentes em quase
+# todos os chunks (ex.: "curso") têm IDF perto de zero e, sozinhos, não
+# chegam a esse valor.
+BM25_MIN_SCORE = 1.0
+
+# Palavras funcionais ignoradas pelo BM25 (termos com até 2 letras já são
+# ignorados). Sem isso, "que" ou "quero saber sobre" trazem chunks do PPC.
+STOPWORDS = frozenset({
+    'que', 'qual', 'quais', 'quem', 'como', 'onde', 'quando', 'quanto', 'quanta',
+    'quantos', 'quantas', 'para', 'por', 'pelo', 'pela', 'pelos', 'pelas', 'com',
+    'sem', 'sobre', 'entre', 'uma', 'umas', 'uns', 'dos', 'das', 'nos', 'nas',
+    'num', 'numa', 'aos', 'mas', 'mais', 'menos', 'muito', 'não', 'sim', 'ser',
+    'são', 'sou', 'era', 'foi', 'está', 'estão', 'estou', 'tem', 'têm', 'ter',
+    'há', 'isso', 'isto', 'esse', 'essa', 'esses', 'essas', 'este', 'esta',
+    'estes', 'estas', 'aquele', 'aquela', 'meu', 'minha', 'meus', 'minhas',
+    'seu', 'sua', 'seus', 'suas', 'você', 'vocês', 'ele', 'ela', 'eles', 'elas',
+    'quero', 'queria', 'gostaria', 'saber', 'posso', 'pode', 'podem', 'preciso',
+    'fazer', 'faço', 'existe', 'algum', 'alguma', 'todo', 'toda', 'todos',
+    'todas', 'tudo', 'também', 'então', 'porque', 'pois', 'qualquer', 'olá',
+})
+
+# Configuração da instância global, lida direto do ambiente: importar a
+# busca não deve exigir config.settings (que valida o token do bot)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+PPC_CHUNKS_FILE = os.getenv("PPC_CHUNKS_FILE", os.path.join(PROJECT_ROOT, "data", "qa", "public", "ppc_chunks.json"))
+PPC_RANKING_MODE = os.getenv("PPC_RANKING_MODE", RANKING_BM25)
+PPC_BM25_MIN_SCORE = float(os.getenv("PPC_BM25_MIN_SCORE", str(BM25_MIN_SCORE)))
+
+# Intervalo mínimo (segundos) entre verificações do mtime do arquivo de chunks
+REFRESH_CHECK_INTERVAL = 5.0
+
+def tokenize(text: str) -> List[str]:
+    """Divide um texto já normalizado em termos"""
+    return TOKEN_PATTERN.findall(text)
+
+def ngrams(text: str) -> Set[str]:
+    """N-gramas de caracteres (NGRAM_SIZE) distintos do texto"""
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
 class PPCSearch:
-    def __init__(self, chunks_file: str = "data/qa/ppc_chunks.json"):
+    def __init__(self, chunks_file: str = "data/qa/public/ppc_chunks.json", ranking: str = RANKING_BM25,
+                 lazy: bool = False, min_score: float = BM25_MIN_SCORE,
+                 refresh_interval: Optional[float] = REFRESH_CHECK_INTERVAL):
+        """
+        Args:
+            refresh_interval: De quanto em quanto tempo (segundos) as buscas
+                conferem se o arquivo de chunks mudou e, se mudou, chamam
+                refresh(); None desliga a verificação
+        """
+        if ranking not in RANKING_MODES:
+            raise ValueError(f"Modo de ranqueamento inválido: {ranking}")
+        
         self.chunks_file = chunks_file
+        self.ranking = ranking
+        self.min_score = min_score
+        self.refresh_interval = refresh_interval
         self.chunks = []
-        self.load_chunks()
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        # Buscas e alterações do índice não se intercalam
+        self._index_lock = threading.RLock()
+        self._file_mtime: Optional[float] = None
+        self._next_refresh_check = 0.0
+        self._reload_listeners: List[Callable[[], None]] = []
+        self._reset_index()
+        if not lazy:
+            self.load_chunks()
+    
+    def add_reload_listener(self, callback: Callable[[], None]):
+        """Registra uma função chamada sempre que os chunks são (re)carregados"""
+        self._reload_listeners.append(callback)
+    
+    def ensure_loaded(self):
+        """Carrega os chunks e o índice no primeiro uso"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.load_chunks()
+    
+    def _reset_index(self):
+        """Limpa o índice invertido e os dados pré-processados"""
+        self.inverted_index: Dict[str, Dict[int, int]] = {}
+        self.keyword_index: Dict[str, Set[int]] = {}
+        self.section_index: Dict[str, Set[int]] = {}
+        self._texts_lower: List[str] = []
+        self._keywords_lower: List[List[str]] = []
+        self._doc_lengths: List[int] = []
+        self._bm25_norms: List[float] = []
+        self._idf: Dict[str, float] = {}
+        # id do chunk -> posição em self.chunks (posições removidas ficam como None)
+        self._positions: Dict[str, int] = {}
+        # Só no modo heurístico: n-grama -> chunks que o contêm, e
+        # (tamanho do texto, chunk) em ordem, para a poda por similaridade
+        self._ngram_index: Dict[str, Set[int]] = {}
+        self._text_lengths: List[Tuple[int, int]] = []
+        self._term_matcher = TermMatcher(())
     
     def load_chunks(self):
-        """Carrega os chunks do arquivo JSON"""
+        """
+        Carrega os chunks do arquivo JSON e (re)constrói o índice.
+        
+        Raises:
+            OSError, ValueError: se o arquivo estiver ausente, for inválido
+                ou não tiver chunks (o índice não é marcado como carregado)
+        """
+        # Só o primeiro carregamento conta como inicialização
+        timer = nullcontext() if self._loaded else timed_startup("ppc_search")
+        with timer, self._index_lock:
+            self._file_mtime = self._stat_chunks_file()
+            self._load_chunks()
+        self._loaded = True
+        
+        for callback in self._reload_listeners:
+            callback()
+    
+    def _stat_chunks_file(self) -> Optional[float]:
         try:
-            with open(self.chunks_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.chunks = data.get('chunks', [])
-            print(f"Carregados {len(self.chunks)} chunks do PPC")
-        except FileNotFoundError:
-            print(f"Arquivo {self.chunks_file} não encontrado")
-            self.chunks = []
-        except Exception as e:
-            print(f"Erro ao carregar chunks: {e}")
-            self.chunks = []
+            return os.stat(self.chunks_file).st_mtime
+        except OSError:
+            return None
+    
+    def refresh_if_changed(self):
+        """Chama refresh() se o arquivo de chunks mudou (verifica no máximo a cada refresh_interval)"""
+        if self.refresh_interval is None or not self._loaded:
+            return
+        now = time.monotonic()
+        if now < self._next_refresh_check:
+            return
+        self._next_refresh_check = now + self.refresh_interval
+        
+        if self._stat_chunks_file() != self._file_mtime:
+            self.refresh()
+    
+    def _read_chunks_file(self) -> List[Dict[str, Any]]:
+        with open(self.chunks_file, 'r', encoding='utf-8') as f:
+            if self.chunks_file.endswith('.ndjson'):
+                # Saída do modo streaming do PDFProcessor: um chunk por linha
+                return [json.loads(line) for line in f if line.strip()]
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("formato desconhecido")
+        return data.get('chunks', [])
+    
+    def _load_chunks(self):
+        try:
+            chunks = self._read_chunks_file()
+            if not chunks:
+                raise ValueError("nenhum chunk no arquivo")
+        except (OSError, ValueError) as e:
+            logger.error(f"Erro ao carregar chunks do PPC ({self.chunks_file}): {e}")
+            raise
+        
+        self.chunks = chunks
+        print(f"Carregados {len(self.chunks)} chunks do PPC")
+        self._build_index()
+    
+    def _build_index(self):
+        """
+        Constrói o índice invertido (termo -> {posição do chunk: frequência}).
+        
+        Também guarda o texto e as palavras-chave já em minúsculas, para que
+        as consultas não precisem reprocessar os chunks a cada mensagem.
+        """
+        self._reset_index()
+        
+        for chunk_id, chunk in enumerate(self.chunks):
+            self._texts_lower.append('')
+            self._keywords_lower.append([])
+            self._doc_lengths.append(0)
+            self._index_chunk(chunk_id, chunk)
+        
+        self._build_bm25_tables()
+        self._build_term_matcher()
+    
+    def _index_chunk(self, chunk_id: int, chunk: Dict[str, Any]):
+        """Adiciona o chunk da posição chunk_id ao índice"""
+        text_lower = chunk['text'].lower()
+        keywords_lower = [k.lower() for k in chunk.get('keywords', [])]
+        
+        self._texts_lower[chunk_id] = text_lower
+        self._keywords_lower[chunk_id] = keywords_lower
+        if 'id' in chunk:
+            self._positions[chunk['id']] = chunk_id
+        
+        terms = tokenize(text_lower)
+        self._doc_lengths[chunk_id] = len(terms)
+        
+        for term, frequency in Counter(terms).items():
+            self.inverted_index.setdefault(term, {})[chunk_id] = frequency
+        
+        for keyword in keywords_lower:
+            self.keyword_index.setdefault(keyword, set()).add(chunk_id)
+        
+        section = chunk.get('section')
+        if section:
+            self.section_index.setdefault(section, set()).add(chunk_id)
+        
+        if self.ranking == RANKING_HEURISTIC:
+            for ngram in ngrams(text_lower):
+                self._ngram_index.setdefault(ngram, set()).add(chunk_id)
+            insort(self._text_lengths, (len(text_lower), chunk_id))
+    
+    def _unindex_chunk(self, chunk_id: int):
+        """Remove o chunk da posição chunk_id do índice"""
+        chunk = self.chunks[chunk_id]
+        
+        for term in set(tokenize(self._texts_lower[chunk_id])):
+            postings = self.inverted_index.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self.inverted_index[term]
+                    self._idf.pop(term, None)
+        
+        for keyword in self._keywords_lower[chunk_id]:
+            chunk_ids = self.keyword_index.get(keyword)
+            if chunk_ids is not None:
+                chunk_ids.discard(chunk_id)
+                if not chunk_ids:
+                    del self.keyword_index[keyword]
+        
+        section_ids = self.section_index.get(chunk.get('section'))
+        if section_ids is not None:
+            section_ids.discard(chunk_id)
+            if not section_ids:
+                del self.section_index[chunk.get('section')]
+        
+        if self.ranking == RANKING_HEURISTIC:
+            text_lower = self._texts_lower[chunk_id]
+            for ngram in ngrams(text_lower):
+                chunk_ids = self._ngram_index.get(ngram)
+                if chunk_ids is not None:
+                    chunk_ids.discard(chunk_id)
+                    if not chunk_ids:
+                        del self._ngram_index[ngram]
+            position = bisect_left(self._text_lengths, (len(text_lower), chunk_id))
+            if position < len(self._text_lengths) and self._text_lengths[position] == (len(text_lower), chunk_id):
+                del self._text_lengths[position]
+        
+        self._texts_lower[chunk_id] = ''
+        self._keywords_lower[chunk_id] = []
+        self._doc_lengths[chunk_id] = 0
+    
+    def apply_chunk_changes(self, upserted: Iterable[Dict[str, Any]], removed: Iterable[str] = ()):
+        """
+        Atualiza o índice no lugar, sem reconstruí-lo.
+        
+        Chunks de `upserted` com id já indexado são substituídos na mesma
+        posição (se só os metadados mudaram, nem são re-tokenizados); os
+        demais entram no final. Os ids de `removed` saem do índice e suas
+        posições ficam vazias até o próximo load_chunks. Só as tabelas de
+        BM25, que dependem do total de chunks, são recalculadas.
+        """
+        self.ensure_loaded()
+        
+        with self._index_lock:
+            self._apply_chunk_changes(upserted, removed)
+        
+        for callback in self._reload_listeners:
+            callback()
+    
+    def _apply_chunk_changes(self, upserted: Iterable[Dict[str, Any]], removed: Iterable[str]):
+        for chunk_key in removed:
+            chunk_id = self._positions.pop(chunk_key, None)
+            if chunk_id is not None:
+                self._unindex_chunk(chunk_id)
+                self.chunks[chunk_id] = None
+        
+        for chunk in upserted:
+            chunk_id = self._positions.get(chunk['id'])
+            if chunk_id is None:
+                chunk_id = len(self.chunks)
+                self.chunks.append(chunk)
+                self._texts_lower.append('')
+                self._keywords_lower.append([])
+                self._doc_lengths.append(0)
+                self._index_chunk(chunk_id, chunk)
+                continue
+            
+            current = self.chunks[chunk_id]
+            if (current['text'], current.get('keywords'), current.get('section')) != \
+                    (chunk['text'], chunk.get('keywords'), chunk.get('section')):
+                self._unindex_chunk(chunk_id)
+                self.chunks[chunk_id] = chunk
+                self._index_chunk(chunk_id, chunk)
+            else:
+                self.chunks[chunk_id] = chunk
+        
+        self._build_bm25_tables()
+        self._build_term_matcher()
+    
+    def refresh(self):
+        """
+        Relê o arquivo de chunks e aplica só as diferenças ao índice.
+        
+        Chunks comparados pelo id: com a segmentação por página do
+        PDFProcessor, uma nova revisão do PPC mexe apenas nos chunks das
+        páginas alteradas. Chamado pelas buscas quando o arquivo muda
+        (refresh_if_changed); as buscas em andamento terminam antes da troca.
+        """
+        if not self._loaded:
+            self.ensure_loaded()
+            return
+        
+        with self._load_lock:
+            mtime = self._stat_chunks_file()
+            try:
+                chunks = self._read_chunks_file()
+            except Exception as e:
+                print(f"Erro ao recarregar chunks: {e}")
+                return
+            
+            with self._index_lock:
+                current = {chunk['id']: chunk for chunk in self.chunks if chunk is not None and 'id' in chunk}
+                new_ids = {chunk.get('id') for chunk in chunks}
+                rebuild = None in new_ids or len(current) != self._live_chunks()
+                if rebuild:
+                    # Chunks sem id não podem ser comparados: reconstrói tudo
+                    self.chunks = chunks
+                    self._build_index()
+                else:
+                    upserted = [chunk for chunk in chunks if current.get(chunk['id']) != chunk]
+                    removed = [chunk_key for chunk_key in current if chunk_key not in new_ids]
+                    if upserted or removed:
+                        self._apply_chunk_changes(upserted, removed)
+                self._file_mtime = mtime
+            
+            if rebuild:
+                print(f"PPC recarregado: {len(chunks)} chunks")
+            else:
+                print(f"PPC atualizado: {len(upserted)} chunks novos/alterados, {len(removed)} removidos")
+            if rebuild or upserted or removed:
+                for callback in self._reload_listeners:
+                    callback()
+    
+    def _live_chunks(self) -> int:
+        return sum(1 for chunk in self.chunks if chunk is not None)
+    
+    def _build_bm25_tables(self):
+        """Pré-calcula a tabela de IDF e a normalização por tamanho de cada chunk"""
+        total_docs = self._live_chunks()
+        if not total_docs:
+            return
+        
+        # Posições removidas têm tamanho 0 e não entram na média
+        avg_length = (sum(self._doc_lengths) / total_docs) or 1
+        self._bm25_norms = [
+            BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            for length in self._doc_lengths
+        ]
+        
+        for term, postings in self.inverted_index.items():
+            doc_freq = len(postings)
+            self._idf[term] = math.log(1 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+    
+    def _build_term_matcher(self):
+        """Compila palavras-chave e seções indexadas para achá-las na query em uma passada"""
+        self._term_matcher = TermMatcher(
+            list(self.keyword_index) + list(SECTION_BONUS_TERMS.values()) + list(self.section_index)
+        )
+    
+    def _query_terms(self, query: str) -> Set[str]:
+        """Palavras-chave, termos de bônus e seções presentes na query"""
+        return self._term_matcher.present(query)
+    
+    def _bm25_scores(self, query: str) -> Dict[int, float]:
+        """Calcula o score Okapi BM25 percorrendo apenas as listas de postings"""
+        scores: Dict[int, float] = {}
+        
+        for term in set(tokenize(query)):
+            if len(term) <= 2 or term in STOPWORDS:  # Ignora termos muito pequenos e palavras funcionais
+                continue
+            
+            postings = self.inverted_index.get(term)
+            if not postings:
+                continue
+            
+            idf = self._idf[term]
+            for chunk_id, frequency in postings.items():
+                weight = idf * frequency * (BM25_K1 + 1) / (frequency + self._bm25_norms[chunk_id])
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + weight
+        
+        return scores
+    
+    def _candidate_chunks(self, query: str, query_terms: Optional[Set[str]] = None) -> Set[int]:
+        """
+        Retorna os chunks que podem passar do score mínimo do modo heurístico.
+        
+        É só uma poda: fica de fora apenas o chunk em que nenhuma parte do
+        score pode ser positiva (sem palavra-chave, termo ou seção da query,
+        e com similaridade textual máxima abaixo do mínimo). Os candidatos
+        são pontuados com a fórmula original, então o resultado é o mesmo de
+        pontuar todos os chunks.
+        """
+        if query_terms is None:
+            query_terms = self._query_terms(query)
+        candidates = set()
+        
+        # Termos da query como substring do texto, como no score ("curso" casa com "cursos")
+        for term in set(query.split()):
+            if len(term) > 2:
+                candidates.update(self._chunks_containing(term))
+        
+        for keyword in query_terms:
+            candidates.update(self.keyword_index.get(keyword, ()))
+        
+        for section, term in SECTION_BONUS_TERMS.items():
+            if term in query_terms:
+                candidates.update(self.section_index.get(section, ()))
+        
+        # Similaridade: ratio() nunca passa de 2 * min(tamanhos) / soma dos
+        # tamanhos, então só textos com tamanho entre ~1/4 e ~4 vezes o da
+        # query podem passar do mínimo; a faixa sai da lista ordenada
+        query_length = len(query)
+        start = bisect_left(self._text_lengths, (max(query_length // 4 - 1, 0),))
+        for text_length, chunk_id in self._text_lengths[start:]:
+            if text_length > 4 * query_length + 1:
+                break
+            if chunk_id in candidates:
+                continue
+            total_length = query_length + text_length
+            max_similarity = 2 * min(query_length, text_length) / total_length if total_length else 1.0
+            if max_similarity * 0.25 > HEURISTIC_MIN_SCORE - PRUNE_EPSILON:
+                candidates.add(chunk_id)
+        
+        return candidates
+    
+    def _chunks_containing(self, term: str) -> Set[int]:
+        """Chunks cujo texto contém `term` (com pelo menos NGRAM_SIZE caracteres), pelo índice de n-gramas"""
+        postings = [self._ngram_index.get(ngram) for ngram in ngrams(term)]
+        if not postings or not all(postings):
+            return set()
+        postings.sort(key=len)
+        # Ter todos os n-gramas não garante a substring: confirma no texto
+        return {
+            chunk_id for chunk_id in postings[0].intersection(*postings[1:])
+            if term in self._texts_lower[chunk_id]
+        }
     
     def search_ppc(self, query: str, max_chunks: int = 3) -> List[Dict[str, Any]]:
         """Busca informações no PPC baseado na query"""
-        if not self.chunks:
-            return []
+        self.ensure_loaded()
+        self.refresh_if_changed()
         
-        query_lower = query.lower()
+        with self._index_lock:
+            if not self.chunks:
+                return []
+            
+            query_lower = query.lower()
+            
+            if self.ranking == RANKING_BM25:
+                return self._search_bm25(query_lower, max_chunks)
+            
+            return self._search_heuristic(query_lower, max_chunks)
+    
+    def _search_heuristic(self, query_lower: str, max_chunks: int) -> List[Dict[str, Any]]:
+        """Busca pelo score heurístico original (palavras-chave, termos, similaridade e seção)"""
         scored_chunks = []
+        query_terms = self._query_terms(query_lower)
         
-        for chunk in self.chunks:
-            score = self._calculate_relevance_score(query_lower, chunk)
+        # Ordena os candidatos para manter a ordem original do documento nos empates
+        for chunk_id in sorted(self._candidate_chunks(query_lower, query_terms)):
+            chunk = self.chunks[chunk_id]
+            score = self._calculate_relevance_score(query_lower, chunk_id, query_terms)
             
-            if score > 0.1:  # Threshold mínimo
+            if score > HEURISTIC_MIN_SCORE:
                 scored_chunks.append({
                     'chunk': chunk,
                     'score': score,
-                    'relevance': self._get_relevance_reason(query_lower, chunk)
+                    'relevance': self._get_relevance_reason(query_lower, chunk_id, query_terms)
                 })
         
         # Ordena por score
@@ -46,21 +523,44 @@ class PPCSearch:
         # Retorna os melhores chunks
         return scored_chunks[:max_chunks]
     
-    def _calculate_relevance_score(self, query: str, chunk: Dict[str, Any]) -> float:
-        """Calcula a relevância do chunk para a query"""
-        chunk_text = chunk['text'].lower()
-        chunk_keywords = [k.lower() for k in chunk.get('keywords', [])]
+    def _search_bm25(self, query: str, max_chunks: int) -> List[Dict[str, Any]]:
+        """Busca ranqueada por BM25, com o mesmo formato de retorno de search_ppc"""
+        scores = self._bm25_scores(query)
+        
+        # Empates mantêm a ordem original do documento
+        best = sorted(
+            ((chunk_id, score) for chunk_id, score in scores.items() if score >= self.min_score),
+            key=lambda item: (-item[1], item[0])
+        )[:max_chunks]
+        query_terms = self._query_terms(query)
+        
+        return [
+            {
+                'chunk': self.chunks[chunk_id],
+                'score': score,
+                'relevance': self._get_relevance_reason(query, chunk_id, query_terms)
+            }
+            for chunk_id, score in best
+        ]
+    
+    def _calculate_relevance_score(self, query: str, chunk_id: int,
+                                   query_terms: Optional[Set[str]] = None) -> float:
+        """Calcula a relevância do chunk para a query (`query_terms`: resultado de _query_terms)"""
+        if query_terms is None:
+            query_terms = self._query_terms(query)
+        chunk = self.chunks[chunk_id]
+        chunk_text = self._texts_lower[chunk_id]
+        chunk_keywords = self._keywords_lower[chunk_id]
         
         # Score baseado em palavras-chave
         keyword_matches = 0
         for keyword in chunk_keywords:
-            if keyword in query:
+            if keyword in query_terms:
                 keyword_matches += 1
         
         # Score baseado em termos específicos da query
-        query_terms = query.split()
         term_matches = 0
-        for term in query_terms:
+        for term in query.split():
             if len(term) > 2:  # Ignora termos muito pequenos
                 if term in chunk_text:
                     term_matches += 1
@@ -70,11 +570,8 @@ class PPCSearch:
         
         # Score baseado na seção
         section_bonus = 0
-        if chunk.get('section') == 'estágio' and 'estágio' in query:
-            section_bonus = 0.3
-        elif chunk.get('section') == 'matrícula' and 'matrícula' in query:
-            section_bonus = 0.3
-        elif chunk.get('section') == 'disciplinas' and 'disciplina' in query:
+        bonus_term = SECTION_BONUS_TERMS.get(chunk.get('section'))
+        if bonus_term and bonus_term in query_terms:
             section_bonus = 0.3
         
         # Combina os scores
@@ -87,16 +584,19 @@ class PPCSearch:
         
         return final_score
     
-    def _get_relevance_reason(self, query: str, chunk: Dict[str, Any]) -> str:
+    def _get_relevance_reason(self, query: str, chunk_id: int,
+                              query_terms: Optional[Set[str]] = None) -> str:
         """Explica por que este chunk é relevante"""
+        if query_terms is None:
+            query_terms = self._query_terms(query)
+        chunk = self.chunks[chunk_id]
         reasons = []
         
-        chunk_keywords = [k.lower() for k in chunk.get('keywords', [])]
-        for keyword in chunk_keywords:
-            if keyword in query:
+        for keyword in self._keywords_lower[chunk_id]:
+            if keyword in query_terms:
                 reasons.append(f"palavra-chave: {keyword}")
         
-        if chunk.get('section') in query:
+        if chunk.get('section') in query_terms:
             reasons.append(f"seção: {chunk.get('section')}")
         
         if not reasons:
@@ -159,10 +659,10 @@ class PPCSearch:
             # Limita o tamanho do parágrafo
             if len(best_paragraph) > 1000:
                 best_paragraph = best_paragraph[:1000] + "..."
-            return f"**Informação do PPC:**\n\n{best_paragraph.strip()}"
+            return f"**Informação do PPC:**\n\n{escape_markdown(best_paragraph.strip())}"
         else:
             # Fallback para o início do chunk
-            return f"**Informação do PPC:**\n\n{chunk_text[:800]}..."
+            return f"**Informação do PPC:**\n\n{escape_markdown(chunk_text[:800])}..."
 
 # Instância global
-ppc_search = PPCSearch()
+ppc_search = PPCSearch(PPC_CHUNKS_FILE, ranking=PPC_RANKING_MODE, lazy=True, min_score=PPC_BM25_MIN_SCORE)
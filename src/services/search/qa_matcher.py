@@ -0,0 +1,265 @@
+"""
+Matcher pré-compilado para a base de Perguntas e Respostas
+
+Reproduz exatamente o score do antigo `advanced_similarity` (calculado
+item a item; a referência está em tests/unit/test_qa_matcher.py), mas faz o trabalho caro uma única vez, no carregamento da base:
+
+- Perguntas, variações e tags ficam em minúsculas
+- Cada pergunta/variação tem um SequenceMatcher com a seq2 já indexada
+- Um índice palavra -> {item: nº de variações que contêm a palavra}
+  substitui o loop aninhado palavras x variações
+
+Na consulta só são avaliados os itens candidatos: os que têm alguma tag
+ou palavra da query, ou cujo limite superior de similaridade textual
+ainda pode ultrapassar o score mínimo pedido.
+
+Os SequenceMatcher guardam estado entre chamadas, então uma instância
+não deve ser usada por várias threads ao mesmo tempo.
+"""
+
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+# Pesos usados por advanced_similarity
+TEXT_WEIGHT = 0.6
+TAG_WEIGHT = 0.2
+KEYWORD_WEIGHT = 0.2
+TAG_INCREMENT = 0.3
+KEYWORD_INCREMENT = 0.2
+MIN_KEYWORD_LENGTH = 4
+
+# Margem para a poda não descartar itens por diferença de arredondamento
+PRUNE_EPSILON = 1e-9
+
+# Palavras de consultas fora do vocabulário da base mantidas em cache (LRU)
+QUERY_WORD_CACHE_SIZE = 1024
+
+def _repeated_sum(increment: float, count: int) -> float:
+    """Soma o incremento `count` vezes, na mesma ordem do cálculo original"""
+    total = 0
+    for _ in range(count):
+        total += increment
+    return total
+
+class QAMatcher:
+    """
+    Índice da base Q&A com scoring equivalente a `advanced_similarity`.
+
+    Uso:
+        matcher = QAMatcher(QA)
+        for item, score in matcher.match(pergunta, min_score=0.3):
+            ...
+    """
+
+    def __init__(self, qa_items: List[Dict[str, Any]]):
+        self.items = qa_items
+        self._text_matchers: List[List[SequenceMatcher]] = []
+        self._variations_lower: List[List[str]] = []
+        self._tags_lower: List[List[str]] = []
+        self._tag_index: Dict[str, List[int]] = {}
+        # Vocabulário das variações (fixo) e palavras vindas das consultas (LRU limitado)
+        self._word_index: Dict[str, Dict[int, int]] = {}
+        self._query_word_cache: "OrderedDict[str, Dict[int, int]]" = OrderedDict()
+        self._by_question: Dict[str, Dict[str, Any]] = {}
+
+        for item_id, item in enumerate(qa_items):
+            variations_lower = [v.lower() for v in item.get("variacoes", [])]
+            tags_lower = [t.lower() for t in item.get("tags", [])]
+
+            matchers = []
+            for text in [item["pergunta"].lower()] + variations_lower:
+                matcher = SequenceMatcher(None)
+                matcher.set_seq2(text)  # Indexa a seq2 uma única vez
+                matchers.append(matcher)
+
+            self._text_matchers.append(matchers)
+            self._variations_lower.append(variations_lower)
+            self._tags_lower.append(tags_lower)
+            self._by_question.setdefault(item["pergunta"], item)
+
+            for tag in set(tags_lower):
+                self._tag_index.setdefault(tag, []).append(item_id)
+
+        # Todas as variações em um texto só: descarta em uma passada as
+        # palavras que não aparecem em nenhuma variação
+        self._all_variations = "\n".join(
+            variation for variations_lower in self._variations_lower for variation in variations_lower
+        )
+
+        # Índice fixo com o vocabulário das próprias variações
+        for variations_lower in self._variations_lower:
+            for variation in variations_lower:
+                for word in variation.split():
+                    if len(word) >= MIN_KEYWORD_LENGTH and word not in self._word_index:
+                        self._word_index[word] = self._scan_variations(word)
+
+    def _scan_variations(self, word: str) -> Dict[int, int]:
+        """Itens cujas variações contêm a palavra (como substring), com contagem"""
+        postings: Dict[int, int] = {}
+        if word not in self._all_variations:
+            return postings
+        for item_id, variations_lower in enumerate(self._variations_lower):
+            count = sum(1 for variation in variations_lower if word in variation)
+            if count:
+                postings[item_id] = count
+        return postings
+
+    def _word_postings(self, word: str) -> Dict[int, int]:
+        """
+        Postings da palavra. Palavras fora do vocabulário da base (ex.:
+        "matric", substring de "matrícula") vão para um LRU de tamanho
+        fixo, para que as consultas dos usuários não façam o índice crescer.
+        """
+        postings = self._word_index.get(word)
+        if postings is not None:
+            return postings
+
+        postings = self._query_word_cache.get(word)
+        if postings is not None:
+            self._query_word_cache.move_to_end(word)
+            return postings
+
+        postings = self._scan_variations(word)
+        self._query_word_cache[word] = postings
+        if len(self._query_word_cache) > QUERY_WORD_CACHE_SIZE:
+            self._query_word_cache.popitem(last=False)
+        return postings
+
+    def _tag_counts(self, query_lower: str) -> Dict[int, int]:
+        """Número de tags de cada item que aparecem na query"""
+        counts: Dict[int, int] = {}
+        for tag, item_ids in self._tag_index.items():
+            if tag in query_lower:
+                for item_id in item_ids:
+                    counts[item_id] = counts.get(item_id, 0) + self._tags_lower[item_id].count(tag)
+        return counts
+
+    def _keyword_counts(self, query_lower: str) -> Dict[int, int]:
+        """Número de pares (palavra da query, variação) que casam em cada item"""
+        counts: Dict[int, int] = {}
+        for word in query_lower.split():
+            if len(word) >= MIN_KEYWORD_LENGTH:
+                for item_id, count in self._word_postings(word).items():
+                    counts[item_id] = counts.get(item_id, 0) + count
+        return counts
+
+    def _text_score(self, query_lower: str, item_id: int, bonus: float, min_score: float) -> Optional[float]:
+        """
+        Maior similaridade entre a query e a pergunta/variações do item.
+
+        Usa os limites superiores baratos do SequenceMatcher para descartar
+        o item (retorna None) quando ele não tem como superar min_score.
+        """
+        matchers = self._text_matchers[item_id]
+        for matcher in matchers:
+            matcher.set_seq1(query_lower)
+
+        threshold = min_score - PRUNE_EPSILON
+        if max(m.real_quick_ratio() for m in matchers) * TEXT_WEIGHT + bonus <= threshold:
+            return None
+
+        bounds = sorted(((m.quick_ratio(), i) for i, m in enumerate(matchers)), reverse=True)
+        if bounds[0][0] * TEXT_WEIGHT + bonus <= threshold:
+            return None
+
+        # Calcula ratio() na ordem do maior limite e para quando nenhum
+        # texto restante pode superar o melhor valor já encontrado
+        best = 0.0
+        for bound, index in bounds:
+            if bound <= best:
+                break
+            best = max(best, matchers[index].ratio())
+        return best
+
+    def score(self, query: str, item_id: int) -> float:
+        """Score de um item específico, idêntico a advanced_similarity"""
+        query_lower = query.lower()
+        tag_score = _repeated_sum(TAG_INCREMENT, self._tag_counts(query_lower).get(item_id, 0))
+        keyword_score = _repeated_sum(KEYWORD_INCREMENT, self._keyword_counts(query_lower).get(item_id, 0))
+        text_score = self._text_score(query_lower, item_id, 0, float("-inf"))
+        return self._combine(text_score, tag_score, keyword_score)
+
+    def _combine(self, text_score: float, tag_score: float, keyword_score: float) -> float:
+        final_score = text_score * TEXT_WEIGHT + tag_score * TAG_WEIGHT + keyword_score * KEYWORD_WEIGHT
+        return min(final_score, 1.0)  # Limita a 1.0
+
+    def match(self, query: str, min_score: float = 0.3) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Retorna (item, score) dos itens com score > min_score, do melhor
+        para o pior (empates mantêm a ordem da base).
+        """
+        query_lower = query.lower()
+        tag_counts = self._tag_counts(query_lower)
+        keyword_counts = self._keyword_counts(query_lower)
+
+        scored_items = []
+        for item_id, item in enumerate(self.items):
+            tag_score = _repeated_sum(TAG_INCREMENT, tag_counts.get(item_id, 0))
+            keyword_score = _repeated_sum(KEYWORD_INCREMENT, keyword_counts.get(item_id, 0))
+            bonus = tag_score * TAG_WEIGHT + keyword_score * KEYWORD_WEIGHT
+
+            text_score = self._text_score(query_lower, item_id, bonus, min_score)
+            if text_score is None:
+                continue
+
+            score = self._combine(text_score, tag_score, keyword_score)
+            if score > min_score:
+                scored_items.append((item, score))
+
+        scored_items.sort(key=lambda x: x[1], reverse=True)
+        return scored_items
+
+    def best_match(self, query: str, min_score: float = 0.5) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Retorna (item, score) do melhor item se o score for >= min_score.
+
+        Equivale a pegar o primeiro elemento de match(): em caso de empate
+        vence o item que aparece antes na base. Os itens são avaliados em
+        ordem decrescente de limite superior e a busca para assim que
+        nenhum item restante pode alcançar o melhor score encontrado.
+        """
+        query_lower = query.lower()
+        tag_counts = self._tag_counts(query_lower)
+        keyword_counts = self._keyword_counts(query_lower)
+
+        candidates = []
+        for item_id in range(len(self.items)):
+            tag_score = _repeated_sum(TAG_INCREMENT, tag_counts.get(item_id, 0))
+            keyword_score = _repeated_sum(KEYWORD_INCREMENT, keyword_counts.get(item_id, 0))
+            bonus = tag_score * TAG_WEIGHT + keyword_score * KEYWORD_WEIGHT
+
+            matchers = self._text_matchers[item_id]
+            for matcher in matchers:
+                matcher.set_seq1(query_lower)
+            upper_bound = min(max(m.quick_ratio() for m in matchers) * TEXT_WEIGHT + bonus, 1.0)
+
+            if upper_bound >= min_score - PRUNE_EPSILON:
+                candidates.append((upper_bound, item_id, tag_score, keyword_score))
+
+        candidates.sort(key=lambda c: (-c[0], c[1]))
+
+        best_id, best_score = None, None
+        for upper_bound, item_id, tag_score, keyword_score in candidates:
+            if best_score is not None and upper_bound < best_score - PRUNE_EPSILON:
+                break
+
+            text_score = self._text_score(query_lower, item_id, 0, float("-inf"))
+            score = self._combine(text_score, tag_score, keyword_score)
+            if best_score is None or score > best_score or (score == best_score and item_id < best_id):
+                best_id, best_score = item_id, score
+
+        if best_id is None or best_score < min_score:
+            return None
+        return self.items[best_id], best_score
+
+    def first_tag_match(self, query: str) -> Optional[Dict[str, Any]]:
+        """Primeiro item (na ordem da base) com alguma tag contida na query"""
+        tag_counts = self._tag_counts(query.lower())
+        if not tag_counts:
+            return None
+        return self.items[min(tag_counts)]
+
+    def find_by_question(self, question: str) -> Optional[Dict[str, Any]]:
+        """Busca exata pela pergunta principal (usada pelos menus)"""
+        return self._by_question.get(question)
@@ -0,0 +1,173 @@
+"""
+Buffer write-behind para eventos de analytics
+
+Em vez de um upload por evento no caminho do handler, os eventos são
+acumulados em memória e enviados em lote (um segmento NDJSON) por uma
+thread em segundo plano, quando o buffer atinge `flush_size` eventos ou
+a cada `flush_interval` segundos, o que vier primeiro.
+
+O buffer tem tamanho máximo: acima dele os eventos novos são descartados
+e contabilizados em `dropped`. Os eventos pendentes são enviados no
+encerramento (close(), chamado também via atexit).
+
+Em ambientes serverless a thread pode ficar congelada entre requisições:
+nesses casos quem grava chama flush_if_due() no próprio caminho da
+requisição, que envia o lote quando ele está cheio ou vencido.
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List
+
+from config.settings import settings
+from src.services.storage.factory import analytics_sink
+from src.services.storage.vercel_storage import make_analytics_event
+
+class AnalyticsBuffer:
+    """
+    Acumula eventos e os grava em segmentos NDJSON em segundo plano.
+
+    Uso:
+        analytics_buffer.record("bot_start", {"user_id": 123})
+    """
+
+    def __init__(self, storage, flush_size: int = 100, flush_interval: float = 30,
+                 max_events: int = 5000):
+        self.storage = storage
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_events = max_events
+
+        self.recorded = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed_flushes = 0
+
+        self._events: deque = deque()
+        self._condition = threading.Condition()
+        self._worker = None
+        self._closed = False
+        self._last_flush = time.monotonic()
+
+    def record(self, event_type: str, data: Dict[str, Any]) -> bool:
+        """
+        Enfileira um evento sem bloquear.
+
+        Returns:
+            False se o evento foi descartado (buffer cheio ou encerrado)
+        """
+        event = make_analytics_event(event_type, data)
+
+        with self._condition:
+            if self._closed or len(self._events) >= self.max_events:
+                self.dropped += 1
+                return False
+
+            self._events.append(event)
+            self.recorded += 1
+            self._ensure_worker()
+
+            if len(self._events) >= self.flush_size:
+                self._condition.notify()
+        return True
+
+    def _ensure_worker(self):
+        """Inicia (ou reinicia, se tiver morrido) a thread de flush (chamado com o lock)"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="analytics-flush", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if len(self._events) < self.flush_size and not self._closed:
+                    self._condition.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                # Um erro inesperado não pode matar a thread: o próximo ciclo tenta de novo
+                print(f"Erro no flush de analytics: {e}")
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        with self._condition:
+            batch = list(self._events)
+            self._events.clear()
+        return batch
+
+    def flush(self) -> bool:
+        """Envia imediatamente todos os eventos pendentes como um segmento"""
+        batch = self._take_batch()
+        self._last_flush = time.monotonic()
+        if not batch:
+            return True
+
+        try:
+            stored = self.storage.store_analytics_batch(batch)
+        except Exception as e:
+            print(f"Erro ao enviar lote de analytics: {e}")
+            stored = False
+
+        if stored:
+            self.flushed += len(batch)
+            return True
+
+        # Devolve o lote ao buffer, respeitando o tamanho máximo
+        self.failed_flushes += 1
+        with self._condition:
+            free_slots = max(self.max_events - len(self._events), 0)
+            self._events.extendleft(reversed(batch[:free_slots]))
+            self.dropped += len(batch) - min(len(batch), free_slots)
+        return False
+
+    def flush_if_due(self) -> bool:
+        """
+        Envia os pendentes se o lote já está cheio ou se passou
+        `flush_interval` desde o último envio; senão não faz nada.
+
+        Returns:
+            False só se um envio foi tentado e falhou
+        """
+        with self._condition:
+            pending = len(self._events)
+        if not pending:
+            return True
+        if pending < self.flush_size and time.monotonic() - self._last_flush < self.flush_interval:
+            return True
+        return self.flush()
+
+    def close(self):
+        """Para a thread de flush e envia o que estiver pendente"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+
+        if self._worker is not None:
+            self._worker.join(timeout=self.flush_interval)
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores do buffer"""
+        with self._condition:
+            pending = len(self._events)
+        return {
+            "pending": pending,
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+        }
+
+# Instância global
+analytics_buffer = AnalyticsBuffer(
+    analytics_sink,
+    flush_size=settings.ANALYTICS_FLUSH_SIZE,
+    flush_interval=settings.ANALYTICS_FLUSH_INTERVAL,
+    max_events=settings.ANALYTICS_MAX_BUFFER
+)
+atexit.register(analytics_buffer.close)
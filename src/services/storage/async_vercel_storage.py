@@ -0,0 +1,326 @@
+"""
+Backend assíncrono do Vercel Blob
+
+Mesmo formato de dados de VercelBlobStorage (user_data_<id>.json,
+segmentos de conversa em conversations/<id>/ e eventos de analytics,
+serializados por serializers.py), mas com um `httpx.AsyncClient` compartilhado: as chamadas não
+bloqueiam o event loop do bot e reaproveitam conexões keep-alive.
+
+Nomes dos blobs, listagem, serialização, índice de URLs e junção de
+segmentos vêm de vercel_storage.py; aqui fica só a camada de I/O.
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from src.services.storage.vercel_storage import (
+    BLOB_API_URL,
+    BlobUrlIndex,
+    SegmentCounter,
+    analytics_event_name,
+    auth_headers,
+    compacted_segment_name,
+    conversation_prefix,
+    conversation_segment_name,
+    decode_legacy_conversations,
+    encode_document,
+    encode_segment,
+    legacy_conversations_name,
+    list_params,
+    make_analytics_event,
+    make_conversation,
+    merge_segments,
+    next_list_cursor,
+    obsolete_segment_urls,
+    sort_segments,
+    stamp_user_data,
+    user_data_name,
+)
+from src.services.storage.serializers import FORMAT_GZIP, decode
+
+class AsyncVercelBlobStorage:
+    """
+    Implementação de AsyncStorage sobre a API do Vercel Blob.
+
+    Uso:
+        storage = AsyncVercelBlobStorage()
+        await storage.store_conversation(user_id, pergunta, resposta)
+    """
+
+    def __init__(self, url_cache_ttl: float = 300, list_page_size: int = 1000,
+                 conversation_history_limit: int = 50, conversation_compact_every: int = 10,
+                 timeout: float = 10, pool_size: int = 10, serializer: str = FORMAT_GZIP):
+        self.blob_token = os.getenv("BLOB_READ_WRITE_TOKEN")
+        self.serializer = serializer
+        self.timeout = timeout
+        self.pool_size = pool_size
+
+        # Índice local pathname -> (expira_em, url) para evitar listar a cada leitura
+        self.url_cache_ttl = url_cache_ttl
+        self.list_page_size = list_page_size
+        self._url_index = BlobUrlIndex(url_cache_ttl)
+
+        self.conversation_history_limit = conversation_history_limit
+        self.conversation_compact_every = conversation_compact_every
+        self._segment_counts = SegmentCounter(conversation_compact_every)
+        self._compactions: set = set()
+        self._without_legacy: set = set()
+
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Cliente HTTP criado no primeiro uso, já dentro do event loop.
+
+        Sem cabeçalhos padrão: o token vai só nas chamadas à API
+        (_api_headers), nunca no download das URLs públicas dos blobs.
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            )
+        return self._client
+
+    def _api_headers(self, **extra: str) -> Dict[str, str]:
+        return {**auth_headers(self.blob_token), **extra}
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # -------------------------------------------------------------------------
+    # Dados do usuário
+    # -------------------------------------------------------------------------
+    async def store_user_data(self, user_id: int, data: Dict[str, Any]) -> bool:
+        try:
+            uploaded = await self._upload_blob(
+                user_data_name(user_id), *encode_document(stamp_user_data(user_id, data), self.serializer)
+            )
+            return uploaded is not None
+
+        except Exception as e:
+            print(f"Erro ao armazenar dados do usuário {user_id}: {e}")
+            return False
+
+    async def get_user_data(self, user_id: int) -> Optional[Dict[str, Any]]:
+        try:
+            data = await self._download_blob(user_data_name(user_id))
+            if data:
+                return decode(data)
+            return None
+
+        except Exception as e:
+            print(f"Erro ao recuperar dados do usuário {user_id}: {e}")
+            return None
+
+    # -------------------------------------------------------------------------
+    # Conversas (segmentos append-only)
+    # -------------------------------------------------------------------------
+    async def store_conversation(self, user_id: int, message: str, response: str) -> bool:
+        try:
+            uploaded = await self._upload_blob(
+                conversation_segment_name(user_id, datetime.now()),
+                *encode_segment([make_conversation(message, response)], self.serializer)
+            )
+            if uploaded is None:
+                return False
+
+            # Lista só quando a contagem local indica compactação, como em
+            # VercelBlobStorage.store_conversation
+            if self._segment_counts.added(user_id) and user_id not in self._compactions:
+                segments = await self._list_conversation_segments(user_id)
+                if len(segments) >= self.conversation_compact_every:
+                    await self.compact_conversations(user_id, segments)
+
+            return True
+
+        except Exception as e:
+            print(f"Erro ao armazenar conversa do usuário {user_id}: {e}")
+            return False
+
+    async def get_conversations(self, user_id: int, limit: int = None) -> List[Dict[str, Any]]:
+        limit = limit or self.conversation_history_limit
+        try:
+            # A compactação limita o número de segmentos: baixa todos em paralelo
+            segments = await self._list_conversation_segments(user_id)
+            contents = await asyncio.gather(*(self.download_url(segment["url"]) for segment in segments))
+            conversations = merge_segments(contents, limit)
+            if len(conversations) >= limit:
+                return conversations
+
+            # Formato antigo: documento JSON único com a lista completa
+            if user_id not in self._without_legacy:
+                legacy = await self._download_blob(legacy_conversations_name(user_id))
+                if legacy:
+                    conversations = decode_legacy_conversations(legacy) + conversations
+                else:
+                    self._without_legacy.add(user_id)
+
+            return conversations[-limit:]
+
+        except Exception as e:
+            print(f"Erro ao recuperar conversas do usuário {user_id}: {e}")
+            return []
+
+    async def compact_conversations(self, user_id: int, segments: List[Dict[str, Any]] = None) -> bool:
+        """Mesma compactação de VercelBlobStorage.compact_conversations"""
+        self._compactions.add(user_id)
+        try:
+            if segments is None:
+                segments = await self._list_conversation_segments(user_id)
+            if len(segments) <= 1:
+                return True
+
+            contents = await asyncio.gather(*(self.download_url(segment["url"]) for segment in segments))
+            conversations = merge_segments(contents, self.conversation_history_limit)
+
+            filename = compacted_segment_name(user_id, segments[-1]["pathname"])
+            blob = await self._upload_blob(filename, *encode_segment(conversations, self.serializer))
+            if blob is None:
+                return False
+
+            filename = blob.get("pathname", filename)
+            deleted = await self.delete_blobs(obsolete_segment_urls(segments, filename))
+            if deleted:
+                self._segment_counts.listed(user_id, 1)
+            return deleted
+
+        except Exception as e:
+            print(f"Erro ao compactar conversas do usuário {user_id}: {e}")
+            return False
+        finally:
+            self._compactions.discard(user_id)
+
+    async def delete_conversations(self, user_id: int) -> bool:
+        try:
+            urls = [segment["url"] for segment in await self._list_conversation_segments(user_id)]
+            if user_id not in self._without_legacy:
+                legacy_url = await self._resolve_blob_url(legacy_conversations_name(user_id))
+                if legacy_url:
+                    urls.append(legacy_url)
+
+            deleted = await self.delete_blobs(urls)
+            if deleted:
+                self._without_legacy.add(user_id)
+                self._segment_counts.listed(user_id, 0)
+            return deleted
+
+        except Exception as e:
+            print(f"Erro ao remover conversas do usuário {user_id}: {e}")
+            return False
+
+    async def _list_conversation_segments(self, user_id: int) -> List[Dict[str, Any]]:
+        segments = sort_segments([blob async for blob in self.list_blobs(prefix=conversation_prefix(user_id))])
+        self._segment_counts.listed(user_id, len(segments))
+        return segments
+
+    # -------------------------------------------------------------------------
+    # Analytics
+    # -------------------------------------------------------------------------
+    async def store_analytics(self, event_type: str, data: Dict[str, Any]) -> bool:
+        try:
+            uploaded = await self._upload_blob(
+                analytics_event_name(event_type),
+                *encode_document(make_analytics_event(event_type, data), self.serializer)
+            )
+            return uploaded is not None
+
+        except Exception as e:
+            print(f"Erro ao armazenar analytics: {e}")
+            return False
+
+    # -------------------------------------------------------------------------
+    # API do Vercel Blob
+    # -------------------------------------------------------------------------
+    async def _upload_blob(self, filename: str, content: bytes,
+                           content_type: str = "application/json") -> Optional[Dict[str, Any]]:
+        """Upload de conteúdo; retorna os metadados do blob ou None se falhar"""
+        response = await self.client.put(
+            f"{BLOB_API_URL}/put",
+            content=content,
+            headers=self._api_headers(**{"X-Filename": filename, "Content-Type": content_type})
+        )
+        if response.status_code != 200:
+            return None
+
+        try:
+            blob = response.json()
+        except ValueError:
+            blob = None
+        if self._url_index.put_uploaded(filename, blob) is None:
+            return {}
+        return blob
+
+    async def list_blobs(self, prefix: str = None) -> AsyncIterator[Dict[str, Any]]:
+        """Lista os blobs (filtrando por prefixo), percorrendo todas as páginas"""
+        params = list_params(self.list_page_size, prefix)
+
+        while True:
+            response = await self.client.get(f"{BLOB_API_URL}/list", params=params, headers=self._api_headers())
+            if response.status_code != 200:
+                return
+
+            page = response.json()
+            for blob in page.get("blobs", []):
+                self._url_index.put(blob["pathname"], blob["url"])
+                yield blob
+
+            cursor = next_list_cursor(page)
+            if cursor is None:
+                return
+            params["cursor"] = cursor
+
+    async def _resolve_blob_url(self, filename: str) -> Optional[str]:
+        cached = self._url_index.get(filename)
+        if cached:
+            return cached
+
+        async for blob in self.list_blobs(prefix=filename):
+            if blob["pathname"] == filename:
+                return blob["url"]
+
+        self._url_index.discard(filename)
+        return None
+
+    async def download_url(self, url: str) -> Optional[bytes]:
+        """Download de uma URL pública de blob (sem o token da API)"""
+        try:
+            response = await self.client.get(url)
+            if response.status_code == 200:
+                return response.content
+            return None
+        except httpx.HTTPError as e:
+            print(f"Erro ao fazer download de {url}: {e}")
+            return None
+
+    async def _download_blob(self, filename: str) -> Optional[bytes]:
+        url = await self._resolve_blob_url(filename)
+        if not url:
+            return None
+
+        data = await self.download_url(url)
+        if data is not None:
+            return data
+
+        # URL em cache pode ter ficado obsoleta: lista de novo uma única vez
+        self._url_index.discard(filename)
+        url = await self._resolve_blob_url(filename)
+        if url:
+            return await self.download_url(url)
+        return None
+
+    async def delete_blobs(self, urls: List[str]) -> bool:
+        if not urls:
+            return True
+
+        response = await self.client.post(f"{BLOB_API_URL}/delete", json={"urls": urls}, headers=self._api_headers())
+
+        self._url_index.discard_urls(urls)
+        return response.status_code == 200
@@ -0,0 +1,38 @@
+"""
+Interface assíncrona de armazenamento
+
+Os handlers do bot usam apenas esta interface, de modo que o backend
+(Vercel Blob em produção, SQLite local em desenvolvimento e benchmarks)
+é escolhido em STORAGE_BACKEND sem mudar o código que o chama.
+"""
+
+from typing import Any, Dict, List, Optional, Protocol, runtime_checkable
+
+@runtime_checkable
+class AsyncStorage(Protocol):
+    """Operações de armazenamento usadas pelo bot"""
+
+    async def get_user_data(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Dados do usuário, ou None se não houver"""
+        ...
+
+    async def store_user_data(self, user_id: int, data: Dict[str, Any]) -> bool:
+        ...
+
+    async def store_conversation(self, user_id: int, message: str, response: str) -> bool:
+        ...
+
+    async def get_conversations(self, user_id: int, limit: int = None) -> List[Dict[str, Any]]:
+        """Últimas `limit` conversas do usuário, das mais antigas para as mais recentes"""
+        ...
+
+    async def delete_conversations(self, user_id: int) -> bool:
+        """Remove todo o histórico de conversas do usuário"""
+        ...
+
+    async def store_analytics(self, event_type: str, data: Dict[str, Any]) -> bool:
+        ...
+
+    async def aclose(self) -> None:
+        """Libera conexões abertas pelo backend"""
+        ...
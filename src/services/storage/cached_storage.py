@@ -0,0 +1,141 @@
+"""
+Cache read-through dos dados de usuário
+
+Enquanto o aluno está no fluxo de cadastro, cada mensagem consulta o
+perfil. O cache guarda o perfil por `ttl` segundos e é atualizado na
+própria gravação (write-through), então nunca devolve um perfil mais
+antigo que o último store_user_data desta instância.
+
+Usuários ainda sem perfil também podem ser cacheados por
+`negative_ttl` segundos (0 desativa). Leituras simultâneas do mesmo
+usuário compartilham uma única consulta ao backend. Cada gravação
+incrementa a versão do usuário: uma consulta que começou antes dela
+devolve o que leu, mas não sobrescreve o cache com o perfil antigo.
+"""
+
+import asyncio
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.services.storage.base import AsyncStorage
+
+class CachedStorage:
+    """
+    AsyncStorage que adiciona cache de get_user_data a outro backend.
+
+    Uso:
+        storage = CachedStorage(AsyncVercelBlobStorage(), ttl=300, negative_ttl=60)
+    """
+
+    def __init__(self, backend: AsyncStorage, ttl: float = 300, negative_ttl: float = 60,
+                 max_size: int = 1024):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[int, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._pending: Dict[int, asyncio.Future] = {}
+        # Versão de cada usuário, incrementada a cada store_user_data
+        self._versions: Dict[int, int] = {}
+
+    async def get_user_data(self, user_id: int) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            expires_at, data = entry
+            if expires_at >= time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return copy.deepcopy(data)
+            del self._entries[user_id]
+
+        self.misses += 1
+
+        # Outra leitura do mesmo usuário já está em andamento: espera por ela
+        pending = self._pending.get(user_id)
+        if pending is not None:
+            return copy.deepcopy(await asyncio.shield(pending))
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[user_id] = future
+        version = self._versions.get(user_id, 0)
+        try:
+            data = await self.backend.get_user_data(user_id)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Marca a exceção como tratada se ninguém estiver esperando
+            raise
+        else:
+            # Gravação concluída durante a consulta: o que foi lido pode ser antigo
+            if self._versions.get(user_id, 0) == version:
+                self._remember(user_id, data)
+            future.set_result(data)
+            return copy.deepcopy(data)
+        finally:
+            if self._pending.get(user_id) is future:
+                del self._pending[user_id]
+
+    async def store_user_data(self, user_id: int, data: Dict[str, Any]) -> bool:
+        self._entries.pop(user_id, None)
+        try:
+            stored = await self.backend.store_user_data(user_id, data)
+        finally:
+            self._bump_version(user_id)
+            # Leituras posteriores não se juntam a uma consulta anterior à gravação
+            self._pending.pop(user_id, None)
+        if stored:
+            self._remember(user_id, data)
+        return stored
+
+    def _bump_version(self, user_id: int):
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        if len(self._versions) > self.max_size:
+            # A versão só importa para quem tem consulta em andamento
+            self._versions = {uid: v for uid, v in self._versions.items() if uid in self._pending}
+
+    def invalidate(self, user_id: int = None):
+        """Remove um usuário do cache (ou todos, sem user_id)"""
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_id, None)
+
+    def _remember(self, user_id: int, data: Optional[Dict[str, Any]]):
+        ttl = self.ttl if data is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+
+        self._entries[user_id] = (time.monotonic() + ttl, copy.deepcopy(data))
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de uso do cache"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    # Demais operações vão direto para o backend
+    async def store_conversation(self, user_id: int, message: str, response: str) -> bool:
+        return await self.backend.store_conversation(user_id, message, response)
+
+    async def get_conversations(self, user_id: int, limit: int = None) -> List[Dict[str, Any]]:
+        return await self.backend.get_conversations(user_id, limit)
+
+    async def delete_conversations(self, user_id: int) -> bool:
+        return await self.backend.delete_conversations(user_id)
+
+    async def store_analytics(self, event_type: str, data: Dict[str, Any]) -> bool:
+        return await self.backend.store_analytics(event_type, data)
+
+    async def aclose(self) -> None:
+        await self.backend.aclose()
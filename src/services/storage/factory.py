@@ -0,0 +1,49 @@
+"""
+Seleção do backend de armazenamento
+
+STORAGE_BACKEND define onde o bot grava dados de usuário, conversas e
+analytics:
+- vercel: Vercel Blob (padrão, usado em produção)
+- local: arquivo SQLite em LOCAL_STORAGE_PATH (desenvolvimento e benchmarks)
+
+Em ambos os casos get_user_data passa pelo cache de CachedStorage.
+"""
+
+from config.settings import settings
+from src.services.storage.base import AsyncStorage
+from src.services.storage.cached_storage import CachedStorage
+from src.services.storage.local_storage import LocalStorage
+from src.services.storage.vercel_storage import vercel_storage
+
+STORAGE_VERCEL = "vercel"
+STORAGE_LOCAL = "local"
+
+def create_storage(backend: str = None) -> AsyncStorage:
+    """Cria o backend assíncrono configurado"""
+    backend = backend or settings.STORAGE_BACKEND
+
+    if backend == STORAGE_LOCAL:
+        return LocalStorage(settings.LOCAL_STORAGE_PATH)
+
+    if backend == STORAGE_VERCEL:
+        # httpx só é necessário para este backend
+        from src.services.storage.async_vercel_storage import AsyncVercelBlobStorage
+        return AsyncVercelBlobStorage(
+            url_cache_ttl=settings.BLOB_URL_CACHE_TTL,
+            conversation_history_limit=settings.CONVERSATION_HISTORY_LIMIT,
+            conversation_compact_every=settings.CONVERSATION_COMPACT_EVERY,
+            serializer=settings.STORAGE_SERIALIZER
+        )
+
+    raise ValueError(f"Backend de armazenamento inválido: {backend}")
+
+# Instância global
+storage_backend = create_storage()
+storage = CachedStorage(
+    storage_backend,
+    ttl=settings.USER_DATA_CACHE_TTL,
+    negative_ttl=settings.USER_DATA_NEGATIVE_CACHE_TTL
+)
+
+# Destino dos lotes gravados pela thread do AnalyticsBuffer (API síncrona)
+analytics_sink = storage_backend if isinstance(storage_backend, LocalStorage) else vercel_storage
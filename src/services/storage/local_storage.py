@@ -0,0 +1,138 @@
+"""
+Backend local de armazenamento (SQLite)
+
+Implementa a mesma interface do Vercel Blob em um arquivo SQLite, para
+desenvolvimento offline e testes de carga sem depender da rede. As
+consultas rodam em uma thread (asyncio.to_thread), então também não
+bloqueiam o event loop.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.services.storage.vercel_storage import make_analytics_event
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_data (
+    user_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    message TEXT NOT NULL,
+    response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_conversations_user ON conversations (user_id, id);
+CREATE TABLE IF NOT EXISTS analytics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_type TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+class LocalStorage:
+    """
+    Implementação de AsyncStorage em SQLite.
+
+    Uso:
+        storage = LocalStorage("data/processed/storage.sqlite3")
+        await storage.store_user_data(user_id, {"nome": "..."})
+    """
+
+    def __init__(self, db_path: str, conversation_history_limit: int = 50):
+        self.db_path = db_path
+        self.conversation_history_limit = conversation_history_limit
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        # Uma conexão compartilhada, serializada pelo lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    def _execute(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            with self._connection:
+                return self._connection.execute(sql, params).fetchall()
+
+    def _executemany(self, sql: str, rows: List[tuple]):
+        with self._lock:
+            with self._connection:
+                self._connection.executemany(sql, rows)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    # -------------------------------------------------------------------------
+    # Dados do usuário
+    # -------------------------------------------------------------------------
+    async def store_user_data(self, user_id: int, data: Dict[str, Any]) -> bool:
+        data["last_updated"] = datetime.now().isoformat()
+        data["user_id"] = user_id
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR REPLACE INTO user_data (user_id, data) VALUES (?, ?)",
+            (user_id, json.dumps(data, ensure_ascii=False))
+        )
+        return True
+
+    async def get_user_data(self, user_id: int) -> Optional[Dict[str, Any]]:
+        rows = await asyncio.to_thread(
+            self._execute, "SELECT data FROM user_data WHERE user_id = ?", (user_id,)
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    # -------------------------------------------------------------------------
+    # Conversas
+    # -------------------------------------------------------------------------
+    async def store_conversation(self, user_id: int, message: str, response: str) -> bool:
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO conversations (user_id, timestamp, message, response) VALUES (?, ?, ?, ?)",
+            (user_id, datetime.now().isoformat(), message, response)
+        )
+        return True
+
+    async def get_conversations(self, user_id: int, limit: int = None) -> List[Dict[str, Any]]:
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT timestamp, message, response FROM conversations "
+            "WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+            (user_id, limit or self.conversation_history_limit)
+        )
+        return [
+            {"timestamp": timestamp, "message": message, "response": response}
+            for timestamp, message, response in reversed(rows)
+        ]
+
+    async def delete_conversations(self, user_id: int) -> bool:
+        await asyncio.to_thread(self._execute, "DELETE FROM conversations WHERE user_id = ?", (user_id,))
+        return True
+
+    # -------------------------------------------------------------------------
+    # Analytics
+    # -------------------------------------------------------------------------
+    async def store_analytics(self, event_type: str, data: Dict[str, Any]) -> bool:
+        return await asyncio.to_thread(self.store_analytics_batch, [make_analytics_event(event_type, data)])
+
+    def store_analytics_batch(self, events: List[Dict[str, Any]]) -> bool:
+        """Grava vários eventos de uma vez (síncrono, usado pelo AnalyticsBuffer)"""
+        self._executemany(
+            "INSERT INTO analytics (event_type, timestamp, data) VALUES (?, ?, ?)",
+            [
+                (event["event_type"], event["timestamp"], json.dumps(event["data"], ensure_ascii=False))
+                for event in events
+            ]
+        )
+        return True
@@ -0,0 +1,185 @@
+"""
+Retenção e compactação dos blobs armazenados
+
+Percorre a listagem paginada do Vercel Blob uma única vez e:
+- remove blobs de analytics mais antigos que `analytics_days` (nos
+  segmentos, a idade é a do evento mais recente, lida do nome, e não a do
+  upload: a junção não reinicia o prazo dos eventos antigos)
+- junta eventos de analytics avulsos (um blob por evento) mais antigos que
+  `rollup_hours` em segmentos, removendo os originais
+- remove o histórico de usuários sem conversa há mais de `conversation_days`
+  (inclusive o documento antigo conversations_<id>.json); a inatividade é
+  medida pelo horário no nome dos segmentos, que a compactação preserva
+- compacta os segmentos de conversa dos demais usuários
+
+Downloads, compactações e remoções rodam em paralelo (`workers` threads).
+
+Uso:
+    python -m src.services.storage.retention --dry-run
+    python -m src.services.storage.retention --analytics-days 30 --workers 16
+"""
+
+import argparse
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from config.settings import settings
+from src.services.storage.serializers import decode
+from src.services.storage.vercel_storage import (
+    ANALYTICS_SEGMENT_PREFIX,
+    VercelBlobStorage,
+    analytics_segment_time,
+    conversation_segment_time,
+    vercel_storage,
+)
+
+# Remoções por requisição à API
+DELETE_BATCH_SIZE = 100
+
+# Eventos por segmento gerado na junção dos eventos avulsos
+ROLLUP_SEGMENT_SIZE = 1000
+
+ANALYTICS_PREFIX = "analytics_"
+CONVERSATIONS_PREFIX = "conversations/"
+LEGACY_CONVERSATIONS_PATTERN = re.compile(r"^conversations_(\d+)\.json$")
+
+def _blob_age(blob: Dict[str, Any], now: datetime) -> timedelta:
+    uploaded_at = blob.get("uploadedAt")
+    if not uploaded_at:
+        return timedelta(0)
+    return now - datetime.fromisoformat(uploaded_at.replace("Z", "+00:00"))
+
+def _analytics_age(blob: Dict[str, Any], now: datetime) -> timedelta:
+    """Idade de um blob de analytics: pelo evento mais recente nos segmentos, senão pelo upload"""
+    newest = analytics_segment_time(blob["pathname"])
+    if newest is None:
+        return _blob_age(blob, now)
+    # Timestamps dos eventos são gravados no horário local do servidor
+    return now - newest.astimezone(timezone.utc)
+
+def _conversation_age(blob: Dict[str, Any], now: datetime) -> timedelta:
+    """Tempo desde o último turno de um segmento, pelo nome; o documento antigo usa o upload"""
+    last_turn = conversation_segment_time(blob["pathname"])
+    if last_turn is None:
+        return _blob_age(blob, now)
+    # Segmentos são nomeados no horário local do servidor
+    return now - last_turn.astimezone(timezone.utc)
+
+def _batches(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+def run_retention(storage: VercelBlobStorage = vercel_storage, analytics_days: float = 90,
+                  rollup_hours: float = 24, conversation_days: float = 180,
+                  workers: int = 8, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Executa a retenção e retorna os contadores do que foi (ou seria) feito.
+    """
+    now = datetime.now(timezone.utc)
+    analytics_limit = timedelta(days=analytics_days)
+    rollup_limit = timedelta(hours=rollup_hours)
+    conversation_limit = timedelta(days=conversation_days)
+
+    expired: List[str] = []
+    rollup: List[Dict[str, Any]] = []
+    segments_by_user: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    legacy_by_user: Dict[str, Dict[str, Any]] = {}
+    report = defaultdict(int)
+
+    # Uma passada pela listagem paginada classifica todos os blobs
+    for blob in storage.list_blobs():
+        report["listed"] += 1
+        pathname = blob["pathname"]
+        age = _blob_age(blob, now)
+
+        if pathname.startswith(ANALYTICS_PREFIX):
+            if _analytics_age(blob, now) > analytics_limit:
+                expired.append(blob["url"])
+                report["analytics_expired"] += 1
+            elif age > rollup_limit and not pathname.startswith(ANALYTICS_SEGMENT_PREFIX):
+                rollup.append(blob)
+
+        elif pathname.startswith(CONVERSATIONS_PREFIX):
+            segments_by_user[pathname.split("/")[1]].append(blob)
+
+        else:
+            legacy = LEGACY_CONVERSATIONS_PATTERN.match(pathname)
+            if legacy:
+                legacy_by_user[legacy.group(1)] = blob
+
+    # Usuários inativos perdem o histórico; os demais têm os segmentos compactados
+    to_compact: List[int] = []
+    for user_id in set(segments_by_user) | set(legacy_by_user):
+        blobs = segments_by_user.get(user_id, []) + ([legacy_by_user[user_id]] if user_id in legacy_by_user else [])
+        if min(_conversation_age(blob, now) for blob in blobs) > conversation_limit:
+            expired.extend(blob["url"] for blob in blobs)
+            report["conversation_users_expired"] += 1
+        elif len(segments_by_user.get(user_id, [])) > 1:
+            to_compact.append(int(user_id))
+
+    report["conversation_users_compacted"] = len(to_compact)
+    report["analytics_rolled_up"] = len(rollup)
+    report["deleted"] = len(expired)
+
+    if dry_run:
+        return dict(report)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Junta os eventos avulsos em segmentos antes de removê-los
+        if rollup:
+            contents = executor.map(storage.download_url, [blob["url"] for blob in rollup])
+            events, merged = [], []
+            for blob, data in zip(rollup, contents):
+                if data:
+                    events.append(decode(data))
+                    merged.append(blob["url"])
+            events.sort(key=lambda event: event.get("timestamp", ""))
+
+            stored = all(executor.map(storage.store_analytics_batch, _batches(events, ROLLUP_SEGMENT_SIZE)))
+            if stored:
+                expired.extend(merged)
+                report["deleted"] += len(merged)
+            else:
+                report["analytics_rolled_up"] = 0
+
+        compacted = executor.map(storage.compact_conversations, to_compact)
+        report["compaction_failures"] = sum(1 for ok in compacted if not ok)
+
+        deleted = executor.map(storage.delete_blobs, _batches(expired, DELETE_BATCH_SIZE))
+        report["delete_failures"] = sum(1 for ok in deleted if not ok)
+
+    return dict(report)
+
+def main():
+    parser = argparse.ArgumentParser(description="Retenção e compactação dos blobs do Vercel Blob")
+    parser.add_argument("--analytics-days", type=float,
+                        default=settings.ANALYTICS_RETENTION_DAYS,
+                        help="Remove analytics mais antigos que isso (dias)")
+    parser.add_argument("--rollup-hours", type=float,
+                        default=settings.ANALYTICS_ROLLUP_AFTER_HOURS,
+                        help="Junta eventos avulsos mais antigos que isso (horas)")
+    parser.add_argument("--conversation-days", type=float,
+                        default=settings.CONVERSATION_RETENTION_DAYS,
+                        help="Remove históricos sem conversa há mais que isso (dias)")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="Requisições em paralelo")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Só mostra o que seria feito")
+    args = parser.parse_args()
+
+    report = run_retention(
+        analytics_days=args.analytics_days,
+        rollup_hours=args.rollup_hours,
+        conversation_days=args.conversation_days,
+        workers=args.workers,
+        dry_run=args.dry_run
+    )
+
+    print("Simulação (--dry-run):" if args.dry_run else "Retenção concluída:")
+    for name, value in sorted(report.items()):
+        print(f"  {name}: {value}")
+
+if __name__ == "__main__":
+    main()
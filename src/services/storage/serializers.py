@@ -0,0 +1,120 @@
+"""
+Serialização dos blobs armazenados
+
+Formatos disponíveis (configurados em STORAGE_SERIALIZER):
+- json: JSON compacto, sem marcador (legível por qualquer cliente)
+- gzip: JSON compacto comprimido com gzip (padrão, só biblioteca padrão)
+- zstd: JSON compacto comprimido com zstandard (requer o pacote zstandard)
+- msgpack: MessagePack (requer o pacote msgpack)
+
+Exceto json, o conteúdo gravado começa com um marcador de formato
+(b"\\x00<nome>\\x00"). JSON nunca começa com \\x00, então blobs sem
+marcador, inclusive os gravados antes desta camada (JSON indentado e
+segmentos NDJSON), continuam sendo lidos como JSON.
+"""
+
+import gzip
+import json
+from typing import Any, Callable, Dict, List, NamedTuple, Union
+
+FORMAT_JSON = "json"
+FORMAT_GZIP = "gzip"
+FORMAT_ZSTD = "zstd"
+FORMAT_MSGPACK = "msgpack"
+
+MARKER_DELIMITER = b"\x00"
+
+class Serializer(NamedTuple):
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+    content_type: str
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _gzip_dumps(obj: Any) -> bytes:
+    return gzip.compress(_json_dumps(obj), compresslevel=6)
+
+def _gzip_loads(data: bytes) -> Any:
+    return json.loads(gzip.decompress(data))
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("Formato 'zstd' requer o pacote zstandard") from e
+    return zstandard
+
+def _zstd_dumps(obj: Any) -> bytes:
+    return _zstd().ZstdCompressor(level=3).compress(_json_dumps(obj))
+
+def _zstd_loads(data: bytes) -> Any:
+    return json.loads(_zstd().ZstdDecompressor().decompress(data))
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as e:
+        raise ImportError("Formato 'msgpack' requer o pacote msgpack") from e
+    return msgpack
+
+def _msgpack_dumps(obj: Any) -> bytes:
+    return _msgpack().packb(obj, use_bin_type=True)
+
+def _msgpack_loads(data: bytes) -> Any:
+    return _msgpack().unpackb(data, raw=False)
+
+SERIALIZERS: Dict[str, Serializer] = {
+    FORMAT_JSON: Serializer(_json_dumps, json.loads, "application/json"),
+    FORMAT_GZIP: Serializer(_gzip_dumps, _gzip_loads, "application/octet-stream"),
+    FORMAT_ZSTD: Serializer(_zstd_dumps, _zstd_loads, "application/octet-stream"),
+    FORMAT_MSGPACK: Serializer(_msgpack_dumps, _msgpack_loads, "application/octet-stream"),
+}
+
+def get_serializer(fmt: str) -> Serializer:
+    if fmt not in SERIALIZERS:
+        raise ValueError(f"Formato de serialização inválido: {fmt}")
+    return SERIALIZERS[fmt]
+
+def content_type(fmt: str, records: bool = False) -> str:
+    """Content-Type do blob gravado com o formato"""
+    if fmt == FORMAT_JSON and records:
+        return "application/x-ndjson"
+    return get_serializer(fmt).content_type
+
+def encode(obj: Any, fmt: str) -> bytes:
+    """Serializa um objeto, com marcador de formato (exceto json)"""
+    payload = get_serializer(fmt).dumps(obj)
+    if fmt == FORMAT_JSON:
+        return payload
+    return MARKER_DELIMITER + fmt.encode("ascii") + MARKER_DELIMITER + payload
+
+def _split_marker(data: bytes):
+    """(formato, payload) ou (None, data) para blobs sem marcador"""
+    if not data.startswith(MARKER_DELIMITER):
+        return None, data
+    end = data.index(MARKER_DELIMITER, 1)
+    return data[1:end].decode("ascii"), data[end + 1:]
+
+def decode(data: Union[bytes, str]) -> Any:
+    """Lê um objeto gravado por encode ou um JSON sem marcador"""
+    if isinstance(data, str):
+        return json.loads(data)
+    fmt, payload = _split_marker(data)
+    if fmt is None:
+        return json.loads(payload)
+    return get_serializer(fmt).loads(payload)
+
+def encode_records(records: List[Dict[str, Any]], fmt: str) -> bytes:
+    """Serializa uma lista de registros (NDJSON no formato json)"""
+    if fmt == FORMAT_JSON:
+        return b"".join(_json_dumps(record) + b"\n" for record in records)
+    return encode(records, fmt)
+
+def decode_records(data: Union[bytes, str]) -> List[Dict[str, Any]]:
+    """Lê registros gravados por encode_records (ou NDJSON sem marcador)"""
+    if isinstance(data, bytes):
+        fmt, payload = _split_marker(data)
+        if fmt is not None:
+            return get_serializer(fmt).loads(payload)
+    return [json.loads(line) for line in data.splitlines() if line.strip()]
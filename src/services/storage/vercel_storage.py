@@ -1,14 +1,269 @@
-import json
 import os
+import time
 import requests
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple, Union
 from datetime import datetime
+from itertools import islice
 import hashlib
 
+from config.settings import settings
+from src.services.storage.serializers import FORMAT_GZIP, content_type, decode, encode, encode_records, decode_records
+
+BLOB_API_URL = "https://blob.vercel-storage.com"
+
+# Horário no nome dos segmentos de conversa (ordenável como texto)
+SEGMENT_TIME_FORMAT = "%Y%m%d%H%M%S%f"
+COMPACT_SEGMENT_SUFFIX = "_compact.ndjson"
+
+# Segmentos de analytics: o horário no nome é o do evento mais recente do lote
+ANALYTICS_SEGMENT_PREFIX = "analytics_segment_"
+ANALYTICS_SEGMENT_TIME_FORMAT = "%Y%m%d_%H%M%S"
+
+# -----------------------------------------------------------------------------
+# Nomes dos blobs, listagem e serialização (compartilhados com
+# AsyncVercelBlobStorage, que só troca a camada de I/O)
+# -----------------------------------------------------------------------------
+def auth_headers(token: Optional[str]) -> Dict[str, str]:
+    """Cabeçalho das chamadas à API do Blob (downloads de URLs públicas vão sem ele)"""
+    return {"Authorization": f"Bearer {token}"}
+
+def user_data_name(user_id: int) -> str:
+    return f"user_data_{user_id}.json"
+
+def analytics_event_name(event_type: str) -> str:
+    """Nome do blob de um evento de analytics avulso"""
+    event_id = hashlib.md5(f"{datetime.now().isoformat()}_{event_type}".encode()).hexdigest()[:8]
+    return f"analytics_{event_type}_{event_id}.json"
+
+def conversation_prefix(user_id: int) -> str:
+    """Prefixo dos segmentos de conversa de um usuário"""
+    return f"conversations/{user_id}/"
+
+def conversation_segment_name(user_id: int, now: datetime) -> str:
+    """Nome ordenável pelo horário; o sufixo evita colisão entre gravações simultâneas"""
+    suffix = hashlib.md5(f"{now.isoformat()}_{os.getpid()}_{os.urandom(4).hex()}".encode()).hexdigest()[:6]
+    return f"{conversation_prefix(user_id)}{now.strftime(SEGMENT_TIME_FORMAT)}_{suffix}.ndjson"
+
+def compacted_segment_name(user_id: int, last_pathname: str) -> str:
+    """Nome do segmento compactado: mantém o horário do último segmento incluído"""
+    last_name = last_pathname[len(conversation_prefix(user_id)):]
+    return f"{conversation_prefix(user_id)}{last_name.split('_')[0]}{COMPACT_SEGMENT_SUFFIX}"
+
+def conversation_segment_time(pathname: str) -> Optional[datetime]:
+    """Horário do último turno de um segmento (comum ou compactado), lido do nome (None se não for um segmento)"""
+    stamp = pathname.rsplit("/", 1)[-1].split("_")[0]
+    try:
+        return datetime.strptime(stamp, SEGMENT_TIME_FORMAT)
+    except ValueError:
+        return None
+
+def legacy_conversations_name(user_id: int) -> str:
+    """Documento único do formato antigo (lido, nunca mais gravado)"""
+    return f"conversations_{user_id}.json"
+
+def before_segment_key(before: Optional[str]) -> Optional[str]:
+    """Horário ISO convertido para o formato do nome dos segmentos (None se inválido)"""
+    if not before:
+        return None
+    try:
+        return datetime.fromisoformat(before).strftime(SEGMENT_TIME_FORMAT)
+    except ValueError:
+        return None
+
+def segments_to_read(user_id: int, segments: List[Dict[str, Any]],
+                     before_key: str = None) -> List[Dict[str, Any]]:
+    """
+    Segmentos a baixar, do mais recente para o mais antigo.
+
+    Segmentos comuns contêm um único turno gravado depois do horário do
+    nome: os posteriores a `before_key` ficam de fora sem download.
+    """
+    prefix = conversation_prefix(user_id)
+    return [
+        segment for segment in reversed(segments)
+        if not (before_key and not segment["pathname"].endswith(COMPACT_SEGMENT_SUFFIX)
+                and segment["pathname"][len(prefix):].split("_")[0] > before_key)
+    ]
+
+def sort_segments(blobs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Segmentos de uma listagem, do mais antigo para o mais recente"""
+    return sorted(blobs, key=lambda blob: blob["pathname"])
+
+def obsolete_segment_urls(segments: List[Dict[str, Any]], compacted_pathname: str) -> List[str]:
+    """URLs dos segmentos substituídos pelo segmento compactado"""
+    return [segment["url"] for segment in segments if segment["pathname"] != compacted_pathname]
+
+def list_params(page_size: int, prefix: Optional[str] = None) -> Dict[str, Any]:
+    """Parâmetros da primeira página de uma listagem"""
+    params: Dict[str, Any] = {"limit": page_size}
+    if prefix:
+        params["prefix"] = prefix
+    return params
+
+def next_list_cursor(page: Dict[str, Any]) -> Optional[str]:
+    """Cursor da próxima página de uma listagem (None na última)"""
+    cursor = page.get("cursor")
+    if not page.get("hasMore") or not cursor:
+        return None
+    return cursor
+
+def encode_document(data: Any, serializer: str) -> Tuple[bytes, str]:
+    """(conteúdo, content type) de um documento (dados de usuário, evento avulso)"""
+    return encode(data, serializer), content_type(serializer)
+
+def encode_segment(records: List[Dict[str, Any]], serializer: str) -> Tuple[bytes, str]:
+    """(conteúdo, content type) de um segmento de registros (conversas, lote de analytics)"""
+    return encode_records(records, serializer), content_type(serializer, records=True)
+
+def stamp_user_data(user_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Marca os dados do usuário com o id e o horário da gravação"""
+    data["last_updated"] = datetime.now().isoformat()
+    data["user_id"] = user_id
+    return data
+
+def decode_legacy_conversations(data: bytes) -> List[Dict[str, Any]]:
+    """Conversas do documento do formato antigo (mais antigas primeiro)"""
+    return decode(data).get("conversations", [])
+
+def merge_segments(contents: Iterable[Optional[bytes]], limit: int) -> List[Dict[str, Any]]:
+    """Junta o conteúdo dos segmentos (do mais antigo ao mais recente) e mantém os últimos `limit`"""
+    conversations: List[Dict[str, Any]] = []
+    for data in contents:
+        if data:
+            conversations.extend(decode_records(data))
+    return conversations[-limit:]
+
+class BlobUrlIndex:
+    """
+    Índice local pathname -> URL dos blobs, com validade.
+
+    Evita uma listagem a cada leitura; as entradas vêm das respostas de
+    upload e das listagens, e saem quando o blob é removido.
+    """
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, str]] = {}
+
+    def get(self, pathname: str) -> Optional[str]:
+        cached = self._entries.get(pathname)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        return None
+
+    def put(self, pathname: str, url: str):
+        self._entries[pathname] = (time.monotonic() + self.ttl, url)
+
+    def discard(self, pathname: str):
+        self._entries.pop(pathname, None)
+
+    def put_uploaded(self, filename: str, blob: Any) -> Optional[str]:
+        """Registra o blob da resposta de um upload; retorna o pathname gravado (None se a resposta não servir)"""
+        try:
+            pathname = blob.get("pathname", filename)
+            self.put(pathname, blob["url"])
+            return pathname
+        except (AttributeError, KeyError, TypeError):
+            self.discard(filename)
+            return None
+
+    def discard_urls(self, urls: Iterable[str]):
+        removed = set(urls)
+        for pathname, (_, url) in list(self._entries.items()):
+            if url in removed:
+                self._entries.pop(pathname, None)
+
+class SegmentCounter:
+    """
+    Quantos segmentos de conversa cada usuário tem, contados localmente.
+
+    Evita uma listagem a cada gravação: a contagem vem das listagens já
+    feitas (leituras, compactação) e é incrementada a cada segmento
+    gravado; só quando chega a `compact_every` o histórico é listado de
+    novo. Segmentos gravados por outras instâncias só entram na próxima
+    listagem (a retenção compacta o que ficar para trás).
+    """
+
+    def __init__(self, compact_every: int):
+        self.compact_every = compact_every
+        self._counts: Dict[int, int] = {}
+
+    def listed(self, user_id: int, count: int):
+        """Registra a contagem vista em uma listagem"""
+        self._counts[user_id] = count
+
+    def added(self, user_id: int) -> bool:
+        """Conta um segmento gravado; True se a compactação pode estar na hora"""
+        count = self._counts.get(user_id, 0) + 1
+        self._counts[user_id] = count
+        return count >= self.compact_every
+
+def analytics_segment_name(events: List[Dict[str, Any]]) -> str:
+    """
+    Nome do segmento de um lote de eventos.
+
+    Leva o horário do evento mais recente, não o do upload: um lote
+    regravado pela retenção (junção de eventos antigos) continua com a
+    idade dos seus eventos.
+    """
+    newest = datetime.now()
+    timestamps = [event.get("timestamp") for event in events if event.get("timestamp")]
+    if timestamps:
+        try:
+            newest = datetime.fromisoformat(max(timestamps))
+        except ValueError:
+            pass
+    segment_id = hashlib.md5(f"{datetime.now().isoformat()}_{len(events)}_{os.getpid()}_{os.urandom(4).hex()}".encode()).hexdigest()[:8]
+    return f"{ANALYTICS_SEGMENT_PREFIX}{newest.strftime(ANALYTICS_SEGMENT_TIME_FORMAT)}_{segment_id}.ndjson"
+
+def analytics_segment_time(pathname: str) -> Optional[datetime]:
+    """Horário do evento mais recente de um segmento, lido do nome (None se não for um segmento)"""
+    if not pathname.startswith(ANALYTICS_SEGMENT_PREFIX):
+        return None
+    stamp = pathname[len(ANALYTICS_SEGMENT_PREFIX):len(ANALYTICS_SEGMENT_PREFIX) + 15]
+    try:
+        return datetime.strptime(stamp, ANALYTICS_SEGMENT_TIME_FORMAT)
+    except ValueError:
+        return None
+
+def make_conversation(message: str, response: str) -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "message": message,
+        "response": response
+    }
+
+def make_analytics_event(event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Monta o registro de um evento de analytics"""
+    return {
+        "event_type": event_type,
+        "timestamp": datetime.now().isoformat(),
+        "data": data
+    }
+
 class VercelBlobStorage:
-    def __init__(self):
+    def __init__(self, url_cache_ttl: float = 300, list_page_size: int = 1000,
+                 conversation_history_limit: int = 50, conversation_compact_every: int = 10,
+                 serializer: str = FORMAT_GZIP):
         self.blob_token = os.getenv("BLOB_READ_WRITE_TOKEN")
-        self.base_url = "https://blob.vercel-storage.com"
+        self.base_url = BLOB_API_URL
+        
+        # Formato dos blobs gravados (ver serializers.py); qualquer formato é lido
+        self.serializer = serializer
+        
+        # Índice local pathname -> (expira_em, url) para evitar listar a cada leitura
+        self.url_cache_ttl = url_cache_ttl
+        self.list_page_size = list_page_size
+        self._url_index = BlobUrlIndex(url_cache_ttl)
+        
+        # Histórico de conversas em segmentos append-only
+        self.conversation_history_limit = conversation_history_limit
+        self.conversation_compact_every = conversation_compact_every
+        self._segment_counts = SegmentCounter(conversation_compact_every)
+        
+        # Usuários sem o documento do formato antigo: ele não é mais criado,
+        # então a ausência vale para sempre e poupa uma listagem por leitura
+        self._without_legacy: set = set()
         
     def _generate_filename(self, data_type: str, identifier: str = None) -> str:
         """Gera nome único para o arquivo"""
@@ -19,10 +274,7 @@ class VercelBlobStorage:
     
     def _make_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
         """Faz requisição para a API do Vercel Blob"""
-        headers = {
-            "Authorization": f"Bearer {self.blob_token}",
-            "Content-Type": "application/json"
-        }
+        headers = {**auth_headers(self.blob_token), "Content-Type": "application/json"}
         
         url = f"{self.base_url}{endpoint}"
         return requests.request(method, url, headers=headers, **kwargs)
@@ -30,17 +282,10 @@ class VercelBlobStorage:
     def store_user_data(self, user_id: int, data: Dict[str, Any]) -> bool:
         """Armazena dados do usuário"""
         try:
-            filename = f"user_data_{user_id}.json"
-            
-            # Adiciona timestamp aos dados
-            data["last_updated"] = datetime.now().isoformat()
-            data["user_id"] = user_id
-            
-            # Converte para JSON
-            json_data = json.dumps(data, ensure_ascii=False, indent=2)
-            
             # Faz upload para o Vercel Blob
-            response = self._upload_blob(filename, json_data)
+            response = self._upload_blob(
+                user_data_name(user_id), *encode_document(stamp_user_data(user_id, data), self.serializer)
+            )
             return response.status_code == 200
             
         except Exception as e:
@@ -50,11 +295,10 @@ class VercelBlobStorage:
     def get_user_data(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Recupera dados do usuário"""
         try:
-            filename = f"user_data_{user_id}.json"
-            data = self._download_blob(filename)
+            data = self._download_blob(user_data_name(user_id))
             
             if data:
-                return json.loads(data)
+                return decode(data)
             return None
             
         except Exception as e:
@@ -62,105 +306,294 @@ class VercelBlobStorage:
             return None
     
     def store_conversation(self, user_id: int, message: str, response: str) -> bool:
-        """Armazena conversa do usuário"""
+        """
+        Armazena conversa do usuário.
+        
+        O histórico é um log append-only: cada turno vira um segmento
+        novo (um único upload, sem ler o histórico). Os segmentos são
+        contados localmente (SegmentCounter); quando a contagem chega a
+        `conversation_compact_every`, o histórico é listado e, se a
+        listagem confirmar, compactado em um só segmento com as últimas
+        `conversation_history_limit` conversas.
+        """
         try:
-            # Tenta recuperar conversas existentes
-            conversations = self.get_conversations(user_id) or []
-            
-            # Adiciona nova conversa
-            new_conversation = {
-                "timestamp": datetime.now().isoformat(),
-                "message": message,
-                "response": response
-            }
-            
-            conversations.append(new_conversation)
-            
-            # Mantém apenas as últimas 50 conversas
-            if len(conversations) > 50:
-                conversations = conversations[-50:]
-            
-            filename = f"conversations_{user_id}.json"
-            json_data = json.dumps({
-                "user_id": user_id,
-                "conversations": conversations,
-                "last_updated": datetime.now().isoformat()
-            }, ensure_ascii=False, indent=2)
-            
-            response = self._upload_blob(filename, json_data)
-            return response.status_code == 200
+            upload_response = self._upload_blob(
+                conversation_segment_name(user_id, datetime.now()),
+                *encode_segment([make_conversation(message, response)], self.serializer)
+            )
+            if upload_response.status_code != 200:
+                return False
+            
+            if self._segment_counts.added(user_id):
+                segments = self.list_conversation_segments(user_id)
+                if len(segments) >= self.conversation_compact_every:
+                    self.compact_conversations(user_id, segments)
+            
+            return True
             
         except Exception as e:
             print(f"Erro ao armazenar conversa do usuário {user_id}: {e}")
             return False
     
-    def get_conversations(self, user_id: int) -> Optional[List[Dict[str, Any]]]:
-        """Recupera conversas do usuário"""
+    def get_conversations(self, user_id: int, limit: int = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Recupera as últimas `limit` conversas do usuário (mais antigas primeiro).
+        
+        Lê os segmentos do fim para o começo e para assim que tiver turnos
+        suficientes.
+        """
+        limit = limit or self.conversation_history_limit
         try:
-            filename = f"conversations_{user_id}.json"
-            data = self._download_blob(filename)
-            
-            if data:
-                parsed_data = json.loads(data)
-                return parsed_data.get("conversations", [])
-            return []
+            latest = list(islice(self.iter_conversations(user_id), limit))
+            latest.reverse()
+            return latest
             
         except Exception as e:
             print(f"Erro ao recuperar conversas do usuário {user_id}: {e}")
             return []
     
+    def iter_conversations(self, user_id: int, segments: List[Dict[str, Any]] = None,
+                           before: str = None, since: str = None,
+                           before_skip: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre as conversas da mais recente para a mais antiga, baixando
+        cada segmento só quando chega nele.
+        
+        Args:
+            segments: Listagem de list_conversation_segments já feita (opcional)
+            before: Só conversas com timestamp anterior a este (ISO)
+            since: Só conversas com timestamp posterior a este (ISO)
+            before_skip: Com `before`, inclui também as conversas com o mesmo
+                timestamp, menos as `before_skip` primeiras (cursor composto:
+                turnos com o mesmo horário não se perdem entre páginas)
+        """
+        if segments is None:
+            segments = self.list_conversation_segments(user_id)
+        
+        skipped = 0
+        for conversation in self._iter_stored_conversations(user_id, segments, before_segment_key(before)):
+            timestamp = conversation.get("timestamp", "")
+            if since and timestamp <= since:
+                return
+            if before and timestamp > before:
+                continue
+            if before and timestamp == before:
+                if before_skip is None or skipped < before_skip:
+                    skipped += 1
+                    continue
+            yield conversation
+    
+    def _iter_stored_conversations(self, user_id: int, segments: List[Dict[str, Any]],
+                                   before_key: str = None) -> Iterator[Dict[str, Any]]:
+        for segment in segments_to_read(user_id, segments, before_key):
+            data = self.download_url(segment["url"])
+            if data:
+                yield from reversed(decode_records(data))
+        
+        # Formato antigo: documento JSON único com a lista completa
+        if user_id in self._without_legacy:
+            return
+        legacy = self._download_blob(legacy_conversations_name(user_id))
+        if legacy:
+            yield from reversed(decode_legacy_conversations(legacy))
+        else:
+            self._without_legacy.add(user_id)
+    
+    def delete_conversations(self, user_id: int) -> bool:
+        """Remove todo o histórico do usuário (segmentos e documento antigo)"""
+        try:
+            urls = [segment["url"] for segment in self.list_conversation_segments(user_id)]
+            if user_id not in self._without_legacy:
+                legacy_url = self._resolve_blob_url(legacy_conversations_name(user_id))
+                if legacy_url:
+                    urls.append(legacy_url)
+            
+            deleted = self.delete_blobs(urls)
+            if deleted:
+                self._without_legacy.add(user_id)
+                self._segment_counts.listed(user_id, 0)
+            return deleted
+            
+        except Exception as e:
+            print(f"Erro ao remover conversas do usuário {user_id}: {e}")
+            return False
+    
+    @staticmethod
+    def conversations_etag(segments: List[Dict[str, Any]]) -> str:
+        """Versão do histórico a partir da listagem (muda a cada gravação ou compactação)"""
+        digest = hashlib.sha1()
+        for segment in segments:
+            digest.update(f"{segment['pathname']}:{segment.get('size', '')}\n".encode())
+        return digest.hexdigest()
+    
+    def compact_conversations(self, user_id: int, segments: List[Dict[str, Any]] = None) -> bool:
+        """
+        Junta os segmentos do usuário em um único segmento com as últimas
+        `conversation_history_limit` conversas e remove os antigos.
+        
+        Segmentos gravados depois da listagem não são tocados.
+        
+        Args:
+            segments: Listagem de list_conversation_segments já feita (opcional)
+        """
+        try:
+            if segments is None:
+                segments = self.list_conversation_segments(user_id)
+            if len(segments) <= 1:
+                return True
+            
+            conversations = merge_segments(
+                (self.download_url(segment["url"]) for segment in segments),
+                self.conversation_history_limit
+            )
+            
+            filename = compacted_segment_name(user_id, segments[-1]["pathname"])
+            upload_response = self._upload_blob(filename, *encode_segment(conversations, self.serializer))
+            if upload_response.status_code != 200:
+                return False
+            
+            try:
+                filename = upload_response.json().get("pathname", filename)
+            except ValueError:
+                pass
+            deleted = self.delete_blobs(obsolete_segment_urls(segments, filename))
+            if deleted:
+                self._segment_counts.listed(user_id, 1)
+            return deleted
+            
+        except Exception as e:
+            print(f"Erro ao compactar conversas do usuário {user_id}: {e}")
+            return False
+    
+    def list_conversation_segments(self, user_id: int) -> List[Dict[str, Any]]:
+        """Segmentos de conversa do usuário, do mais antigo para o mais recente"""
+        segments = sort_segments(self.list_blobs(prefix=conversation_prefix(user_id)))
+        self._segment_counts.listed(user_id, len(segments))
+        return segments
+    
     def store_analytics(self, event_type: str, data: Dict[str, Any]) -> bool:
         """Armazena dados de analytics"""
         try:
-            # Gera ID único para o evento
-            event_id = hashlib.md5(f"{datetime.now().isoformat()}_{event_type}".encode()).hexdigest()[:8]
-            filename = f"analytics_{event_type}_{event_id}.json"
-            
-            analytics_data = {
-                "event_type": event_type,
-                "timestamp": datetime.now().isoformat(),
-                "data": data
-            }
-            
-            json_data = json.dumps(analytics_data, ensure_ascii=False, indent=2)
-            response = self._upload_blob(filename, json_data)
+            response = self._upload_blob(
+                analytics_event_name(event_type),
+                *encode_document(make_analytics_event(event_type, data), self.serializer)
+            )
             return response.status_code == 200
             
         except Exception as e:
             print(f"Erro ao armazenar analytics: {e}")
             return False
     
-    def _upload_blob(self, filename: str, content: str) -> requests.Response:
+    def store_analytics_batch(self, events: List[Dict[str, Any]]) -> bool:
+        """
+        Armazena vários eventos de analytics em um único segmento.
+        
+        Cada evento deve ter o mesmo formato gravado por store_analytics
+        (event_type, timestamp, data); no formato json o segmento é NDJSON,
+        uma linha compacta por evento.
+        """
+        if not events:
+            return True
+        
+        try:
+            response = self._upload_blob(analytics_segment_name(events), *encode_segment(events, self.serializer))
+            return response.status_code == 200
+            
+        except Exception as e:
+            print(f"Erro ao armazenar lote de analytics: {e}")
+            return False
+    
+    def _upload_blob(self, filename: str, content: Union[bytes, str],
+                     content_type: str = "application/json") -> requests.Response:
         """Upload de conteúdo para o Vercel Blob"""
-        url = f"https://blob.vercel-storage.com/put"
+        headers = {**auth_headers(self.blob_token), "X-Filename": filename, "Content-Type": content_type}
+        
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        response = requests.put(f"{BLOB_API_URL}/put", data=content, headers=headers)
         
-        headers = {
-            "Authorization": f"Bearer {self.blob_token}",
-            "X-Filename": filename,
-            "Content-Type": "application/json"
-        }
+        # A resposta do upload já traz a URL do blob: atualiza o índice local
+        if response.status_code == 200:
+            try:
+                blob = response.json()
+            except ValueError:
+                blob = None
+            self._url_index.put_uploaded(filename, blob)
         
-        response = requests.put(url, data=content.encode('utf-8'), headers=headers)
         return response
     
-    def _download_blob(self, filename: str) -> Optional[str]:
+    def list_blobs(self, prefix: str = None) -> Iterator[Dict[str, Any]]:
+        """Lista os blobs (filtrando por prefixo), percorrendo todas as páginas"""
+        params = list_params(self.list_page_size, prefix)
+        
+        while True:
+            response = requests.get(f"{BLOB_API_URL}/list", headers=auth_headers(self.blob_token), params=params)
+            if response.status_code != 200:
+                return
+            
+            page = response.json()
+            for blob in page.get("blobs", []):
+                self._url_index.put(blob["pathname"], blob["url"])
+                yield blob
+            
+            cursor = next_list_cursor(page)
+            if cursor is None:
+                return
+            params["cursor"] = cursor
+    
+    def _resolve_blob_url(self, filename: str) -> Optional[str]:
+        """URL do blob: do índice local se válido, senão via listagem por prefixo"""
+        cached = self._url_index.get(filename)
+        if cached:
+            return cached
+        
+        for blob in self.list_blobs(prefix=filename):
+            if blob["pathname"] == filename:
+                return blob["url"]
+        
+        self._url_index.discard(filename)
+        return None
+    
+    def download_url(self, url: str) -> Optional[bytes]:
+        """Download direto de um blob cuja URL já é conhecida"""
+        try:
+            response = requests.get(url)
+            if response.status_code == 200:
+                return response.content
+            return None
+        except Exception as e:
+            print(f"Erro ao fazer download de {url}: {e}")
+            return None
+    
+    def delete_blobs(self, urls: List[str]) -> bool:
+        """Remove blobs pelas URLs (uma requisição para todas)"""
+        if not urls:
+            return True
+        
+        headers = {**auth_headers(self.blob_token), "Content-Type": "application/json"}
+        response = requests.post(f"{BLOB_API_URL}/delete", json={"urls": urls}, headers=headers)
+        
+        self._url_index.discard_urls(urls)
+        return response.status_code == 200
+    
+    def _download_blob(self, filename: str) -> Optional[bytes]:
         """Download de conteúdo do Vercel Blob"""
         try:
-            # Primeiro, lista os blobs para encontrar a URL
-            list_url = f"https://blob.vercel-storage.com/list"
-            headers = {"Authorization": f"Bearer {self.blob_token}"}
+            url = self._resolve_blob_url(filename)
+            if not url:
+                return None
             
-            response = requests.get(list_url, headers=headers)
-            if response.status_code == 200:
-                blobs = response.json()
-                
-                # Procura pelo arquivo
-                for blob in blobs.get("blobs", []):
-                    if blob["pathname"] == filename:
-                        # Faz download do conteúdo
-                        download_response = requests.get(blob["url"])
-                        if download_response.status_code == 200:
-                            return download_response.text
+            download_response = requests.get(url)
+            if download_response.status_code == 200:
+                return download_response.content
+            
+            # URL em cache pode ter ficado obsoleta: lista de novo uma única vez
+            self._url_index.discard(filename)
+            url = self._resolve_blob_url(filename)
+            if url:
+                download_response = requests.get(url)
+                if download_response.status_code == 200:
+                    return download_response.content
             
             return None
             
@@ -169,4 +602,9 @@ class VercelBlobStorage:
             return None
 
 # Instância global
-vercel_storage = VercelBlobStorage()
+vercel_storage = VercelBlobStorage(
+    url_cache_ttl=settings.BLOB_URL_CACHE_TTL,
+    conversation_history_limit=settings.CONVERSATION_HISTORY_LIMIT,
+    conversation_compact_every=settings.CONVERSATION_COMPACT_EVERY,
+    serializer=settings.STORAGE_SERIALIZER
+)
@@ -0,0 +1 @@
+"""Serviços de Integração com o Telegram"""
@@ -0,0 +1,123 @@
+"""
+Cliente HTTP da Telegram Bot API
+
+Mantém uma única `requests.Session` com pool de conexões keep-alive, de
+modo que todas as partes de uma resposta longa (e as próximas invocações
+de uma instância serverless já aquecida) reaproveitam a mesma conexão
+TCP+TLS com api.telegram.org.
+
+Erros 429 são repetidos respeitando o `retry_after` informado pelo
+Telegram; falhas de rede e erros 5xx usam backoff exponencial. Uma
+mensagem recusada por Markdown inválido ("can't parse entities") é
+reenviada uma vez sem parse_mode, para o usuário não ficar sem resposta.
+"""
+
+import os
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE_URL = "https://api.telegram.org"
+
+class TelegramBotClient:
+    """
+    Cliente reutilizável para chamadas à Bot API.
+
+    Uso:
+        client = TelegramBotClient(token)
+        client.send_message(chat_id, "Olá!")
+    """
+
+    def __init__(self, token: str, timeout: float = 10, max_retries: int = 3,
+                 max_retry_after: float = 5, pool_size: int = 10):
+        """
+        Args:
+            token: Token do bot
+            timeout: Timeout de cada requisição (segundos)
+            max_retries: Novas tentativas após 429/5xx/erro de rede
+            max_retry_after: Maior espera aceita para um 429 (segundos);
+                acima disso a chamada desiste em vez de segurar o handler
+            pool_size: Conexões mantidas abertas no pool
+        """
+        self.base_url = f"{API_BASE_URL}/bot{token}"
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+
+    def call(self, method: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Chama um método da Bot API.
+
+        Returns:
+            O campo `result` da resposta, ou None se a chamada falhar
+        """
+        url = f"{self.base_url}/{method}"
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                print(f"Erro de rede em {method} (tentativa {attempt + 1}): {e}")
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code == 200:
+                    return response.json().get("result")
+
+                if response.status_code == 429:
+                    delay = self._retry_after(response)
+                    if delay is None:
+                        print(f"{method} limitado pelo Telegram por tempo demais, desistindo")
+                        return None
+                elif response.status_code >= 500:
+                    delay = self._backoff(attempt)
+                elif response.status_code == 400 and payload.get("parse_mode") and "can't parse entities" in response.text:
+                    print(f"Markdown inválido em {method}, reenviando sem parse_mode")
+                    payload = {key: value for key, value in payload.items() if key != "parse_mode"}
+                    continue
+                else:
+                    print(f"Erro {response.status_code} em {method}: {response.text}")
+                    return None
+
+            if attempt < self.max_retries:
+                time.sleep(delay)
+
+        print(f"{method} falhou após {self.max_retries + 1} tentativas")
+        return None
+
+    def _backoff(self, attempt: int) -> float:
+        return 0.5 * (2 ** attempt)
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        """Espera pedida pelo Telegram em um 429, ou None se passar do limite"""
+        try:
+            retry_after = response.json().get("parameters", {}).get("retry_after", 1)
+        except ValueError:
+            retry_after = 1
+
+        if retry_after > self.max_retry_after:
+            return None
+        return retry_after
+
+    def send_message(self, chat_id: int, text: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """Envia uma mensagem de texto"""
+        payload = {"chat_id": chat_id, "text": text}
+        payload.update(kwargs)
+        return self.call("sendMessage", payload)
+
+# Instância compartilhada entre invocações de uma mesma instância serverless
+_client: Optional[TelegramBotClient] = None
+
+def get_bot_client() -> Optional[TelegramBotClient]:
+    """Retorna o cliente global, criado no primeiro uso (None sem TELEGRAM_TOKEN)"""
+    global _client
+    if _client is None:
+        token = os.environ.get("TELEGRAM_TOKEN")
+        if token:
+            _client = TelegramBotClient(token)
+    return _client
@@ -0,0 +1,13 @@
+"""
+Escape de texto para o Markdown (legado) do Telegram
+
+Texto que não foi escrito como Markdown (trechos do PPC, saída do modelo)
+pode ter `_`, `*`, `` ` `` ou `[` sem par; com parse_mode="Markdown" o
+Telegram recusa a mensagem inteira ("can't parse entities").
+"""
+
+MARKDOWN_SPECIAL_CHARS = "_*`["
+
+def escape_markdown(text: str) -> str:
+    """Escapa os caracteres especiais do Markdown legado para exibi-los literalmente"""
+    return "".join("\\" + char if char in MARKDOWN_SPECIAL_CHARS else char for char in text)
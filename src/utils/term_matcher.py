@@ -0,0 +1,149 @@
+"""
+Busca de vários termos de uma vez (autômato de Aho-Corasick)
+
+Em vez de um `termo in texto` por termo, o texto é percorrido uma única
+vez e todas as ocorrências de todos os termos saem dessa passada, com
+posição. O custo depende do tamanho do texto (e do número de
+ocorrências), não do tamanho do vocabulário.
+
+Com o pacote pyahocorasick instalado, o autômato em C é usado. Sem ele, o
+autômato em Python abaixo só compensa com vocabulários grandes (a partir
+de AUTOMATON_MIN_TERMS termos); com menos termos, um `in`/str.find por
+termo é mais rápido e é o que se usa. O resultado é o mesmo nos três casos.
+
+Os termos são comparados como substrings, exatamente como `in`: quem
+precisa ignorar maiúsculas passa termos e texto já em minúsculas.
+"""
+
+from collections import Counter, deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Sem pyahocorasick, vocabulário a partir do qual o autômato em Python fica
+# mais rápido que um `in` por termo. Medido em chunks do PPC (~5 mil
+# caracteres) e em perguntas curtas: com 25 termos o loop leva ~1/5 do
+# tempo do autômato, com ~100 empatam e com 200 o autômato já é mais rápido.
+AUTOMATON_MIN_TERMS = 200
+
+class TermMatcher:
+    """
+    Busca compilada a partir de uma lista de termos (autômato ou, com
+    poucos termos e sem pyahocorasick, um str.find por termo).
+
+    Uso:
+        matcher = TermMatcher(['estágio', 'matrícula', 'carga horária'])
+        matcher.present(texto.lower())    # {'estágio', ...}
+        matcher.find_all(texto.lower())   # {'estágio': [12, 340], ...}
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        # Termos vazios casariam com qualquer texto; não entram no autômato
+        self.terms: List[str] = list(dict.fromkeys(term for term in terms if term))
+
+        self._automaton = None
+        self._transitions = None
+        if ahocorasick is not None and self.terms:
+            self._automaton = ahocorasick.Automaton()
+            for term in self.terms:
+                self._automaton.add_word(term, term)
+            self._automaton.make_automaton()
+            return
+
+        if len(self.terms) < AUTOMATON_MIN_TERMS:
+            # Vocabulário pequeno: busca termo a termo (ver AUTOMATON_MIN_TERMS)
+            return
+
+        # Estado 0 é a raiz; cada estado tem transições e os termos que terminam nele
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Tuple[str, ...]] = [()]
+
+        for term in self.terms:
+            state = 0
+            for char in term:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append(())
+                state = next_state
+            outputs[state] += (term,)
+
+        # Links de falha em largura. Cada estado herda as transições e as
+        # saídas do seu link, então a busca nunca precisa voltar pelos links.
+        fail = [0] * len(goto)
+        self._transitions: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            self._transitions[state] = {**self._transitions[fail[state]], **goto[state]}
+            outputs[state] += outputs[fail[state]]
+            for char, next_state in goto[state].items():
+                fail[next_state] = self._transitions[fail[state]].get(char, 0) if state else 0
+                queue.append(next_state)
+
+        self._outputs = outputs
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Gera (posição inicial, termo) de cada ocorrência, inclusive sobrepostas"""
+        if self._automaton is not None:
+            for end, term in self._automaton.iter(text):
+                yield end - len(term) + 1, term
+            return
+
+        if self._transitions is None:
+            # Mesma ordem do autômato: pela posição final da ocorrência
+            matches = [
+                (position, term)
+                for term, positions in self._find_each(text).items()
+                for position in positions
+            ]
+            matches.sort(key=lambda match: (match[0] + len(match[1]), -len(match[1])))
+            yield from matches
+            return
+
+        transitions, outputs = self._transitions, self._outputs
+        state = 0
+        for position, char in enumerate(text):
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                for term in outputs[state]:
+                    yield position - len(term) + 1, term
+
+    def _find_each(self, text: str) -> Dict[str, List[int]]:
+        """Posições de cada termo com um str.find por termo (ocorrências sobrepostas incluídas)"""
+        positions: Dict[str, List[int]] = {}
+        for term in self.terms:
+            position = text.find(term)
+            while position != -1:
+                positions.setdefault(term, []).append(position)
+                position = text.find(term, position + 1)
+        return positions
+
+    def find_all(self, text: str) -> Dict[str, List[int]]:
+        """Posições de cada termo encontrado (só os termos presentes aparecem)"""
+        if self._automaton is None and self._transitions is None:
+            return self._find_each(text)
+        positions: Dict[str, List[int]] = {}
+        for position, term in self.iter_matches(text):
+            positions.setdefault(term, []).append(position)
+        return positions
+
+    def counts(self, text: str) -> Counter:
+        """Número de ocorrências de cada termo encontrado"""
+        if self._automaton is None and self._transitions is None:
+            return Counter({term: len(positions) for term, positions in self._find_each(text).items()})
+        return Counter(term for _, term in self.iter_matches(text))
+
+    def present(self, text: str) -> Set[str]:
+        """Termos que aparecem no texto (equivale a {t for t in terms if t in text})"""
+        if self._automaton is None and self._transitions is None:
+            return {term for term in self.terms if term in text}
+        return {term for _, term in self.iter_matches(text)}
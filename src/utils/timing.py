@@ -0,0 +1,34 @@
+"""
+Medição do tempo de inicialização dos componentes
+
+Cada componente carregado sob demanda (base Q&A, índice do PPC, modelo
+FLAN-T5) registra aqui quanto tempo levou, para que o bot possa logar um
+resumo da inicialização.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+logger = logging.getLogger("startup")
+
+# Tempo de inicialização por componente, em segundos
+STARTUP_TIMINGS: Dict[str, float] = {}
+
+@contextmanager
+def timed_startup(component: str) -> Iterator[None]:
+    """Mede e registra o tempo de inicialização de um componente"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STARTUP_TIMINGS[component] = elapsed
+        logger.info(f"{component} inicializado em {elapsed * 1000:.1f} ms")
+
+def log_startup_summary() -> None:
+    """Loga o resumo dos tempos de inicialização registrados até agora"""
+    total = sum(STARTUP_TIMINGS.values())
+    details = ", ".join(f"{name}: {elapsed * 1000:.1f} ms" for name, elapsed in STARTUP_TIMINGS.items())
+    logger.info(f"Inicialização ({total * 1000:.1f} ms no total) - {details}")
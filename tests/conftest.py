@@ -4,6 +4,7 @@ Configuração global para testes pytest
 Define fixtures e configurações compartilhadas entre todos os testes.
 """
 
+import os
 import pytest
 import sys
 from pathlib import Path
@@ -11,6 +12,9 @@ from pathlib import Path
 # Adiciona src ao path para importações
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+# config.settings valida o token do bot na importação
+os.environ.setdefault("TELEGRAM_TOKEN", "test-token")
+
 @pytest.fixture
 def sample_qa_item():
     """Fixture com item de Q&A para testes"""
@@ -48,3 +52,75 @@ def sample_ppc_chunk():
         section="estágio",
         word_count=50
     )
+
+class FakeBlobApi:
+    """API do Vercel Blob em memória: upload, listagem paginada, remoção e download público"""
+
+    PUBLIC_URL = "https://blob.test/"
+
+    def __init__(self, page_size: int = 1000):
+        self.blobs = {}
+        self.page_size = page_size
+        self.lists = 0
+        self.downloads = 0
+
+    def url(self, pathname):
+        return self.PUBLIC_URL + pathname
+
+    def put(self, url, data=None, headers=None):
+        pathname = headers["X-Filename"]
+        self.blobs[pathname] = data
+        return FakeResponse(200, json_body={"pathname": pathname, "url": self.url(pathname)})
+
+    def get(self, url, headers=None, params=None):
+        if url.endswith("/list"):
+            self.lists += 1
+            pathnames = sorted(name for name in self.blobs if name.startswith(params.get("prefix", "")))
+            start = int(params.get("cursor", 0))
+            page = pathnames[start:start + self.page_size]
+            has_more = start + self.page_size < len(pathnames)
+            return FakeResponse(200, json_body={
+                "blobs": [
+                    {"pathname": name, "url": self.url(name), "size": len(self.blobs[name])}
+                    for name in page
+                ],
+                "hasMore": has_more,
+                "cursor": str(start + self.page_size) if has_more else None,
+            })
+
+        # Download público: sem cabeçalho de autenticação
+        assert headers is None
+        self.downloads += 1
+        pathname = url[len(self.PUBLIC_URL):]
+        if pathname not in self.blobs:
+            return FakeResponse(404)
+        return FakeResponse(200, content=self.blobs[pathname])
+
+    def post(self, url, json=None, headers=None):
+        for blob_url in json["urls"]:
+            self.blobs.pop(blob_url[len(self.PUBLIC_URL):], None)
+        return FakeResponse(200)
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", json_body=None):
+        self.status_code = status_code
+        self.content = content
+        self._json = json_body
+
+    def json(self):
+        if self._json is None:
+            raise ValueError("resposta sem JSON")
+        return self._json
+
+@pytest.fixture
+def blob_api(monkeypatch):
+    """Substitui as chamadas HTTP do VercelBlobStorage por uma API em memória"""
+    pytest.importorskip("requests")
+    pytest.importorskip("dotenv")
+    from src.services.storage import vercel_storage
+
+    api = FakeBlobApi()
+    monkeypatch.setattr(vercel_storage.requests, "put", api.put)
+    monkeypatch.setattr(vercel_storage.requests, "get", api.get)
+    monkeypatch.setattr(vercel_storage.requests, "post", api.post)
+    return api
@@ -0,0 +1,108 @@
+"""
+Testes do buffer write-behind de analytics (src/services/storage/analytics_buffer.py)
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+# A fábrica cria o backend configurado ao ser importada (Vercel Blob assíncrono por padrão)
+pytest.importorskip("httpx")
+
+from src.services.storage import analytics_buffer as buffer_module
+from src.services.storage.analytics_buffer import AnalyticsBuffer
+
+class FakeSink:
+    """Destino dos lotes; pode ser configurado para falhar"""
+
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    def store_analytics_batch(self, events):
+        if self.fail:
+            return False
+        self.batches.append(events)
+        return True
+
+@pytest.fixture
+def sink():
+    return FakeSink()
+
+def _buffer(sink, **kwargs):
+    # Intervalo longo: os envios do teste são explícitos
+    kwargs.setdefault("flush_interval", 3600)
+    return AnalyticsBuffer(sink, **kwargs)
+
+def test_flush_envia_um_unico_lote(sink):
+    buffer = _buffer(sink, flush_size=100)
+    try:
+        for i in range(3):
+            assert buffer.record("message", {"user_id": i})
+        assert buffer.flush()
+    finally:
+        buffer.close()
+
+    assert len(sink.batches) == 1
+    assert [event["data"]["user_id"] for event in sink.batches[0]] == [0, 1, 2]
+    assert buffer.stats()["flushed"] == 3
+
+def test_flush_if_due_espera_lote_cheio_ou_intervalo(sink, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(buffer_module, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    buffer = _buffer(sink, flush_size=100, flush_interval=30)
+    try:
+        buffer.record("message", {})
+        assert buffer.flush_if_due()
+        assert sink.batches == []
+
+        clock[0] += 31
+        assert buffer.flush_if_due()
+        assert len(sink.batches) == 1
+    finally:
+        buffer.close()
+
+def test_lote_que_falha_volta_para_o_buffer(sink):
+    buffer = _buffer(sink, flush_size=100)
+    try:
+        buffer.record("message", {"n": 1})
+        buffer.record("message", {"n": 2})
+        sink.fail = True
+        assert not buffer.flush()
+        assert buffer.stats()["pending"] == 2
+
+        sink.fail = False
+        buffer.record("message", {"n": 3})
+        assert buffer.flush()
+    finally:
+        buffer.close()
+
+    assert [event["data"]["n"] for event in sink.batches[0]] == [1, 2, 3]
+    assert buffer.stats()["failed_flushes"] == 1
+
+def test_descarta_eventos_acima_do_tamanho_maximo(sink):
+    buffer = _buffer(sink, flush_size=100, max_events=2)
+    try:
+        assert buffer.record("message", {})
+        assert buffer.record("message", {})
+        assert not buffer.record("message", {})
+
+        # Na devolução de um lote que falhou, o excedente também é descartado
+        sink.fail = True
+        buffer.flush()
+        assert buffer.stats()["pending"] == 2
+    finally:
+        sink.fail = False
+        buffer.close()
+
+    assert buffer.stats()["dropped"] == 1
+
+def test_close_envia_pendentes_e_recusa_novos_eventos(sink):
+    buffer = _buffer(sink, flush_size=100)
+    buffer.record("message", {})
+    buffer.close()
+
+    assert len(sink.batches) == 1
+    assert not buffer.record("message", {})
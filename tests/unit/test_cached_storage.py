@@ -0,0 +1,80 @@
+"""
+Testes do cache de dados de usuário (src/services/storage/cached_storage.py)
+"""
+
+import asyncio
+
+from src.services.storage.cached_storage import CachedStorage
+
+class FakeBackend:
+    """Backend em memória; get_user_data pode ser segurado até um evento"""
+
+    def __init__(self):
+        self.users = {}
+        self.reads = 0
+        self.release_read = None
+
+    async def get_user_data(self, user_id):
+        self.reads += 1
+        data = self.users.get(user_id)
+        if self.release_read is not None:
+            await self.release_read.wait()
+        return data
+
+    async def store_user_data(self, user_id, data):
+        self.users[user_id] = data
+        return True
+
+def test_cache_serve_leitura_repetida_sem_consultar_backend():
+    async def scenario():
+        backend = FakeBackend()
+        backend.users[1] = {"nome": "Ana"}
+        storage = CachedStorage(backend, ttl=60)
+        assert await storage.get_user_data(1) == {"nome": "Ana"}
+        assert await storage.get_user_data(1) == {"nome": "Ana"}
+        return backend.reads, storage.stats()
+
+    reads, stats = asyncio.run(scenario())
+    assert reads == 1
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+def test_consulta_anterior_a_gravacao_nao_sobrescreve_o_cache():
+    async def scenario():
+        backend = FakeBackend()
+        backend.users[1] = {"nome": "Antigo"}
+        backend.release_read = asyncio.Event()
+        storage = CachedStorage(backend, ttl=60)
+
+        # Leitura em andamento quando a gravação termina
+        stale_read = asyncio.create_task(storage.get_user_data(1))
+        await asyncio.sleep(0)
+        assert await storage.store_user_data(1, {"nome": "Novo"})
+        backend.release_read.set()
+        assert await stale_read == {"nome": "Antigo"}
+
+        backend.release_read = None
+        return await storage.get_user_data(1)
+
+    assert asyncio.run(scenario()) == {"nome": "Novo"}
+
+def test_leituras_simultaneas_compartilham_uma_consulta():
+    async def scenario():
+        backend = FakeBackend()
+        backend.users[1] = {"nome": "Ana"}
+        storage = CachedStorage(backend, ttl=60)
+        results = await asyncio.gather(*(storage.get_user_data(1) for _ in range(5)))
+        return backend.reads, results
+
+    reads, results = asyncio.run(scenario())
+    assert reads == 1
+    assert results == [{"nome": "Ana"}] * 5
+
+def test_usuario_sem_perfil_usa_negative_ttl():
+    async def scenario():
+        backend = FakeBackend()
+        storage = CachedStorage(backend, ttl=60, negative_ttl=0)
+        assert await storage.get_user_data(1) is None
+        assert await storage.get_user_data(1) is None
+        return backend.reads
+
+    assert asyncio.run(scenario()) == 2
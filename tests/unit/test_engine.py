@@ -0,0 +1,129 @@
+"""
+Testes do roteamento de respostas do motor (src/core/engine.py)
+
+A base Q&A vem de um arquivo temporário; busca no PPC e FLAN-T5 são
+substituídos por funções fixas.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from src.core import engine
+from src.services.ai.flan_service import InferenceQueueFull
+
+QA_ITEMS = [
+    {
+        "pergunta": "Qual a carga horária do estágio supervisionado?",
+        "resposta": "O estágio supervisionado tem 160 horas.",
+        "variacoes": ["Quantas horas tem o estágio supervisionado?"],
+        "tags": ["estágio", "carga horária"],
+        "categoria": "estagio",
+    },
+]
+
+AMBIGUITY = {
+    "keywords": ["como", "onde"],
+    "generic_terms": ["coisa"],
+    "clarification_map": {"estágio": ["📋 Carga horária do estágio"]},
+    "default_clarifications": ["📋 Outro assunto"],
+}
+
+PPC_CONTEXT = "O curso exige atividades complementares registradas pela coordenação ao longo do curso."
+
+@pytest.fixture
+def qa_file(tmp_path, monkeypatch):
+    path = tmp_path / "perguntas.json"
+    path.write_text(json.dumps({"qa_items": QA_ITEMS, "ambiguity_detection": AMBIGUITY},
+                               ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(engine, "QA_FILE", str(path))
+    monkeypatch.setattr(engine, "_knowledge_base", None)
+    return path
+
+@pytest.fixture
+def ppc(monkeypatch):
+    """Busca no PPC sem resposta pronta; o contexto para o FLAN-T5 é configurável"""
+    state = {"response": None, "context": PPC_CONTEXT}
+    monkeypatch.setattr(engine.ppc_search, "get_formatted_response", lambda question: state["response"])
+    monkeypatch.setattr(engine.ppc_search, "get_context_for_flan", lambda question: state["context"])
+    return state
+
+@pytest.fixture
+def flan(monkeypatch):
+    """FLAN-T5 substituído: responde com o texto configurado ou levanta a exceção"""
+    state = {"response": "Texto gerado pelo modelo", "error": None}
+
+    async def generate(question, context=None):
+        if state["error"] is not None:
+            raise state["error"]
+        return state["response"]
+
+    monkeypatch.setattr(engine.flan_batcher, "generate", generate)
+    return state
+
+def _answer(question, user_state=None):
+    return asyncio.run(engine.answer(question, user_state))
+
+def test_opcao_de_menu(qa_file):
+    reply = _answer("Qual a carga horária do estágio supervisionado?")
+    assert reply.source == engine.SOURCE_MENU
+    assert reply.text == "O estágio supervisionado tem 160 horas."
+
+def test_pergunta_curta_pede_esclarecimento(qa_file):
+    reply = _answer("estágio?")
+    assert reply.source == engine.SOURCE_CLARIFICATION
+    assert "Carga horária do estágio" in reply.text
+
+def test_variacao_encontra_item_da_base(qa_file):
+    reply = _answer("Quantas horas tem o estágio supervisionado?")
+    assert reply.source == engine.SOURCE_QA
+    assert reply.score >= 0.5
+
+def test_resposta_pronta_do_ppc(qa_file, ppc):
+    ppc["response"] = "Trecho do PPC"
+    reply = _answer("Quais as regras das atividades complementares?")
+    assert reply.source == engine.SOURCE_PPC and reply.text == "Trecho do PPC"
+
+def test_sem_contexto_do_ppc_nao_chama_o_modelo(qa_file, ppc, flan):
+    ppc["context"] = ""
+    flan["error"] = AssertionError("não deveria gerar")
+    assert _answer("Quais as regras das atividades complementares?").source == engine.SOURCE_NO_CONTEXT
+
+def test_resposta_do_modelo_vai_sem_markdown_e_marca_o_estado(qa_file, ppc, flan):
+    user_state = {}
+    reply = _answer("Quais as regras das atividades complementares?", user_state)
+    assert reply.source == engine.SOURCE_FLAN
+    assert reply.text == "Texto gerado pelo modelo"
+    assert reply.parse_mode is None
+    assert user_state["last_reply_source"] == engine.SOURCE_FLAN
+
+def test_fila_cheia_responde_sem_contexto(qa_file, ppc, flan):
+    flan["error"] = InferenceQueueFull("fila cheia")
+    assert _answer("Quais as regras das atividades complementares?").source == engine.SOURCE_NO_CONTEXT
+
+def test_erro_do_modelo_vira_resposta_de_erro(qa_file, ppc, flan):
+    flan["error"] = RuntimeError("falha")
+    assert _answer("Quais as regras das atividades complementares?").source == engine.SOURCE_ERROR
+
+def test_warm_up_falha_sem_base(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, "QA_FILE", str(tmp_path / "nao_existe.json"))
+    monkeypatch.setattr(engine, "_knowledge_base", None)
+    with pytest.raises(OSError):
+        engine.warm_up()
+
+def test_base_vazia_e_invalida(qa_file):
+    qa_file.write_text(json.dumps({"qa_items": []}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        engine.get_knowledge_base()
+
+def test_recarga_invalida_mantem_a_base_anterior(qa_file):
+    knowledge_base = engine.get_knowledge_base()
+    qa_file.write_text("{ inválido", encoding="utf-8")
+    # mtime diferente do carregado força a recarga
+    engine._knowledge_base = knowledge_base._replace(mtime=-1)
+
+    assert engine.get_knowledge_base().qa == knowledge_base.qa
+    assert _answer("Qual a carga horária do estágio supervisionado?").source == engine.SOURCE_MENU
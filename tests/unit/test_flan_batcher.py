@@ -0,0 +1,91 @@
+"""
+Testes do micro-batching do FLAN-T5 (src/services/ai/flan_batcher.py)
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from src.services.ai.flan_batcher import FlanMicroBatcher
+from src.services.ai.flan_service import UNAVAILABLE_RESPONSE, InferenceQueueFull
+from src.services.ai.response_cache import ResponseCache
+
+class FakeService:
+    """Serviço que responde na hora e registra os lotes recebidos"""
+
+    def __init__(self):
+        self.batches = []
+        self.fallback = None
+
+    async def agenerate_batch(self, requests):
+        self.batches.append(requests)
+        if self.fallback is not None:
+            return [self.fallback for _ in requests]
+        return [f"resposta: {question}" for question, _ in requests]
+
+def test_generate_funciona_em_event_loops_diferentes():
+    service = FakeService()
+    batcher = FlanMicroBatcher(service, max_wait_ms=1)
+
+    # Cada invocação serverless (ou teste) roda o próprio asyncio.run
+    assert asyncio.run(batcher.generate("primeira")) == "resposta: primeira"
+    assert asyncio.run(batcher.generate("segunda")) == "resposta: segunda"
+    assert len(service.batches) == 2
+
+def test_generate_recria_worker_de_loop_ainda_aberto():
+    service = FakeService()
+    batcher = FlanMicroBatcher(service, max_wait_ms=1)
+    first_loop, second_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+        # O worker do primeiro loop continua pendente (loop não foi fechado)
+        assert first_loop.run_until_complete(batcher.generate("primeira")) == "resposta: primeira"
+        response = second_loop.run_until_complete(asyncio.wait_for(batcher.generate("segunda"), 1))
+        assert response == "resposta: segunda"
+    finally:
+        for loop in (first_loop, second_loop):
+            _close_loop(loop)
+
+def _close_loop(loop):
+    """Cancela os workers pendentes antes de fechar o loop"""
+    pending = asyncio.all_tasks(loop)
+    for task in pending:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+    loop.close()
+
+def test_perguntas_simultaneas_entram_no_mesmo_lote():
+    service = FakeService()
+    batcher = FlanMicroBatcher(service, max_batch_size=8, max_wait_ms=20)
+    
+    async def scenario():
+        return await asyncio.gather(*(batcher.generate(f"p{i}") for i in range(3)))
+    
+    assert asyncio.run(scenario()) == ["resposta: p0", "resposta: p1", "resposta: p2"]
+    assert len(service.batches) == 1
+
+def test_fila_cheia_levanta_inference_queue_full():
+    service = FakeService()
+    batcher = FlanMicroBatcher(service, max_wait_ms=1, max_queue=1)
+    
+    async def scenario():
+        # As duas entram na fila antes de o worker rodar: a segunda não cabe
+        return await asyncio.gather(batcher.generate("p0"), batcher.generate("p1"), return_exceptions=True)
+    
+    first, second = asyncio.run(scenario())
+    assert first == "resposta: p0"
+    assert isinstance(second, InferenceQueueFull)
+
+def test_cache_evita_nova_geracao_e_nao_guarda_fallback():
+    service = FakeService()
+    batcher = FlanMicroBatcher(service, max_wait_ms=1, cache=ResponseCache(max_size=8, ttl=60))
+    
+    assert asyncio.run(batcher.generate("pergunta", "contexto")) == "resposta: pergunta"
+    assert asyncio.run(batcher.generate("Pergunta?", "contexto")) == "resposta: pergunta"
+    assert len(service.batches) == 1
+    
+    service.fallback = UNAVAILABLE_RESPONSE
+    asyncio.run(batcher.generate("outra", "contexto"))
+    asyncio.run(batcher.generate("outra", "contexto"))
+    assert len(service.batches) == 3
@@ -0,0 +1,107 @@
+"""
+Testes da API de histórico (api/history.py): cursor composto e ETag
+"""
+
+import base64
+import io
+import json
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+
+from api import history
+from api.history import decode_cursor, encode_cursor
+from src.services.storage.serializers import FORMAT_JSON, encode_records
+from src.services.storage.vercel_storage import VercelBlobStorage
+
+class FakeHandler(history.handler):
+    """Handler sem socket: guarda status, cabeçalhos e corpo da resposta"""
+
+    def __init__(self, path, headers=None):
+        self.path = path
+        self.headers = headers or {}
+        self.wfile = io.BytesIO()
+        self.status = None
+        self.response_headers = {}
+
+    def send_response(self, code, message=None):
+        self.status = code
+
+    def send_header(self, keyword, value):
+        self.response_headers[keyword] = value
+
+    def end_headers(self):
+        pass
+
+    def body(self):
+        return json.loads(self.wfile.getvalue())
+
+@pytest.fixture
+def storage(blob_api, monkeypatch):
+    storage = VercelBlobStorage()
+    storage.blob_token = "token"
+    monkeypatch.setattr(history, "vercel_storage", storage)
+    return storage
+
+def _get(path, headers=None):
+    request = FakeHandler(path, headers)
+    request.do_GET()
+    return request
+
+def _store_segment(blob_api, user_id, stamp, conversations):
+    pathname = f"conversations/{user_id}/{stamp}_abc123.ndjson"
+    blob_api.blobs[pathname] = encode_records(conversations, FORMAT_JSON)
+
+def test_cursor_ida_e_volta_e_cursor_antigo():
+    assert decode_cursor(encode_cursor("2025-03-01T10:00:00", 2)) == ("2025-03-01T10:00:00", 2)
+
+    # Cursores emitidos antes do cursor composto traziam só o timestamp
+    legacy = base64.urlsafe_b64encode(b"2025-03-01T10:00:00").decode().rstrip("=")
+    assert decode_cursor(legacy) == ("2025-03-01T10:00:00", None)
+
+def test_paginas_nao_perdem_turnos_com_o_mesmo_horario(blob_api, storage):
+    same_time = "2025-03-01T10:00:00"
+    _store_segment(blob_api, 1, "20250301095900000000", [
+        {"timestamp": "2025-03-01T09:59:00", "message": "m0", "response": "r"},
+    ])
+    _store_segment(blob_api, 1, "20250301100000000000", [
+        {"timestamp": same_time, "message": f"m{i}", "response": "r"} for i in range(1, 4)
+    ])
+
+    messages, cursor = [], None
+    for _ in range(5):
+        path = "/history/1?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        body = _get(path).body()
+        messages = [c["message"] for c in body["conversations"]] + messages
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(messages) == ["m0", "m1", "m2", "m3"]
+    assert len(messages) == 4
+
+def test_etag_igual_responde_304(blob_api, storage):
+    _store_segment(blob_api, 1, "20250301100000000000", [
+        {"timestamp": "2025-03-01T10:00:00", "message": "m", "response": "r"},
+    ])
+
+    first = _get("/history/1")
+    assert first.status == 200
+    etag = first.response_headers["ETag"]
+
+    downloads = blob_api.downloads
+    cached = _get("/history/1", headers={"If-None-Match": etag})
+    assert cached.status == 304
+    assert blob_api.downloads == downloads
+
+    # Outros parâmetros ou um turno novo mudam o ETag
+    assert _get("/history/1?order=desc").response_headers["ETag"] != etag
+    storage.store_conversation(1, "nova", "r")
+    assert _get("/history/1", headers={"If-None-Match": etag}).status == 200
+
+def test_parametros_invalidos_respondem_400(storage):
+    assert _get("/history/abc").status == 400
+    assert _get("/history/1?order=cima").status == 400
+    assert _get("/history/1?limit=dez").status == 400
@@ -0,0 +1,57 @@
+"""
+Testes da ingestão de vários PDFs (src/services/document/ingest.py)
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("fitz")
+
+from src.services.document.ingest import document_ids, ingest, write_corpus
+
+def _results():
+    for document_id in ("a", "b"):
+        stats = {"document": document_id, "source": f"{document_id}.pdf", "pages": 1}
+        chunks = [{"id": f"{document_id}:chunk_1_{n}", "text": "texto", "source": document_id} for n in range(2)]
+        yield stats, chunks
+
+def test_ids_sao_unicos_mesmo_com_sufixo_ja_usado():
+    assert document_ids(["a.pdf", "x/a.pdf", "a-2.pdf"]) == ["a", "a-2", "a-2-2"]
+    assert document_ids(["a-2.pdf", "a.pdf", "x/a.pdf"]) == ["a-2", "a", "a-3"]
+    assert document_ids(["x/ppc.pdf", "y/ppc.pdf", "z/ppc.pdf"]) == ["ppc", "ppc-2", "ppc-3"]
+
+def test_ingest_valida_overlap_antes_de_processar():
+    with pytest.raises(ValueError):
+        ingest(["nao_existe.pdf"], chunk_size=100, overlap=100)
+
+def test_corpus_json_com_estatisticas(tmp_path):
+    output = tmp_path / "saida" / "corpus.json"
+    documents = write_corpus(_results(), str(output))
+
+    data = json.loads(output.read_text(encoding="utf-8"))
+    assert data["source"] == ["a.pdf", "b.pdf"]
+    assert data["total_chunks"] == 4
+    assert data["documents"] == documents
+    assert [chunk["source"] for chunk in data["chunks"]] == ["a", "a", "b", "b"]
+
+def test_corpus_ndjson_um_chunk_por_linha(tmp_path):
+    output = tmp_path / "corpus.ndjson"
+    documents = write_corpus(_results(), str(output))
+
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["a:chunk_1_0", "a:chunk_1_1", "b:chunk_1_0", "b:chunk_1_1"]
+    assert [stats["document"] for stats in documents] == ["a", "b"]
+
+def test_falha_no_meio_mantem_o_corpus_anterior(tmp_path):
+    output = tmp_path / "corpus.ndjson"
+    output.write_text("anterior\n", encoding="utf-8")
+
+    def failing_results():
+        yield next(_results())
+        raise RuntimeError("falha no segundo documento")
+
+    with pytest.raises(RuntimeError):
+        write_corpus(failing_results(), str(output))
+    assert output.read_text(encoding="utf-8") == "anterior\n"
+    assert [path.name for path in tmp_path.iterdir()] == ["corpus.ndjson"]
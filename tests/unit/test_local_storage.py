@@ -0,0 +1,68 @@
+"""
+Testes do backend SQLite (src/services/storage/local_storage.py) e da
+interface AsyncStorage (src/services/storage/base.py)
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+
+from src.services.storage.base import AsyncStorage
+from src.services.storage.cached_storage import CachedStorage
+from src.services.storage.local_storage import LocalStorage
+from src.services.storage.vercel_storage import make_analytics_event
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(str(tmp_path / "db" / "storage.sqlite3"), conversation_history_limit=3)
+
+def test_backends_implementam_a_interface_async(storage):
+    assert isinstance(storage, AsyncStorage)
+    assert isinstance(CachedStorage(storage), AsyncStorage)
+
+def test_dados_do_usuario(storage):
+    async def scenario():
+        assert await storage.get_user_data(1) is None
+        assert await storage.store_user_data(1, {"nome": "Ana"})
+        return await storage.get_user_data(1)
+
+    data = asyncio.run(scenario())
+    assert data["nome"] == "Ana" and data["user_id"] == 1 and "last_updated" in data
+
+def test_conversas_em_ordem_com_limite_e_remocao(storage):
+    async def scenario():
+        for i in range(5):
+            await storage.store_conversation(1, f"pergunta {i}", f"resposta {i}")
+        await storage.store_conversation(2, "outro usuário", "r")
+
+        latest = await storage.get_conversations(1)
+        last_two = await storage.get_conversations(1, limit=2)
+        await storage.delete_conversations(1)
+        return latest, last_two, await storage.get_conversations(1), await storage.get_conversations(2)
+
+    latest, last_two, deleted, other = asyncio.run(scenario())
+    assert [c["message"] for c in latest] == ["pergunta 2", "pergunta 3", "pergunta 4"]
+    assert [c["message"] for c in last_two] == ["pergunta 3", "pergunta 4"]
+    assert deleted == []
+    assert [c["message"] for c in other] == ["outro usuário"]
+
+def test_analytics_avulso_e_em_lote(storage, tmp_path):
+    async def scenario():
+        await storage.store_analytics("bot_start", {"user_id": 1})
+        await storage.aclose()
+
+    assert storage.store_analytics_batch([
+        make_analytics_event("message", {"user_id": 1}),
+        make_analytics_event("message", {"user_id": 2}),
+    ])
+    assert storage.store_analytics_batch([])
+    asyncio.run(scenario())
+
+    connection = sqlite3.connect(storage.db_path)
+    rows = connection.execute("SELECT event_type FROM analytics ORDER BY id").fetchall()
+    connection.close()
+    assert [event_type for event_type, in rows] == ["message", "message", "bot_start"]
@@ -0,0 +1,67 @@
+"""
+Testes da segmentação em chunks do PDFProcessor (src/services/document/pdf_processor.py)
+
+O texto das páginas vem de uma lista, sem abrir um PDF de verdade.
+"""
+
+import pytest
+
+pytest.importorskip("fitz")
+
+from src.services.document.pdf_processor import PDFProcessor
+
+def _processor(pages):
+    processor = PDFProcessor("documento.pdf")
+    processor.iter_page_texts = lambda: iter(pages)
+    return processor
+
+def _words(prefix, count):
+    return " ".join(f"{prefix}{n}" for n in range(count))
+
+def test_texto_que_atravessa_paginas_aparece_inteiro_em_um_chunk():
+    pages = [
+        _words("a", 30) + " o estágio supervisionado",
+        "é obrigatório para todos " + _words("b", 30),
+    ]
+    chunks = list(_processor(pages).iter_chunks(chunk_size=20, overlap=5))
+    
+    spanning = [chunk for chunk in chunks if "estágio supervisionado é obrigatório" in chunk["text"]]
+    assert spanning
+    assert spanning[0]["pages"] == [1, 2]
+    # Ids continuam derivados da página de origem
+    assert all(chunk["id"].startswith("chunk_") for chunk in chunks)
+
+def test_update_chunks_resegmenta_pagina_alterada_e_a_seguinte():
+    pages = [_words("a", 40), _words("b", 40), _words("c", 40)]
+    previous, _ = _processor(pages).update_chunks(chunk_size=20, overlap=5)
+    
+    data, changes = _processor(pages).update_chunks(previous, chunk_size=20, overlap=5)
+    assert data["chunks"] == previous["chunks"]
+    assert changes.changed_pages == [] and changes.upserted == [] and changes.removed == []
+    
+    # O fim da página 1 muda: a página 2 herda outras palavras, a 3 é reaproveitada
+    pages[0] = _words("a", 39) + " novo"
+    data, changes = _processor(pages).update_chunks(previous, chunk_size=20, overlap=5)
+    assert changes.changed_pages == [1, 2]
+    page_3_ids = set(previous["pages"][2]["chunks"])
+    assert page_3_ids <= {chunk["id"] for chunk in data["chunks"]}
+    assert not page_3_ids & {chunk["id"] for chunk in changes.upserted}
+    assert data == _processor(pages).update_chunks(chunk_size=20, overlap=5)[0]
+
+@pytest.mark.parametrize("overlap", [20, 25, -1])
+def test_overlap_fora_do_intervalo_levanta_erro_antes_de_ler_paginas(overlap):
+    processor = PDFProcessor("documento.pdf")
+    processor.iter_page_texts = lambda: pytest.fail("não deveria ler o PDF")
+    
+    with pytest.raises(ValueError):
+        processor.iter_chunks(chunk_size=20, overlap=overlap)
+    with pytest.raises(ValueError):
+        processor.update_chunks(chunk_size=20, overlap=overlap)
+    with pytest.raises(ValueError):
+        processor.extract_text_with_chunks(chunk_size=20, overlap=overlap)
+
+def test_chunks_avancam_sem_repetir_com_overlap_maximo():
+    chunks = list(_processor([_words("a", 50)]).iter_chunks(chunk_size=20, overlap=19))
+    
+    assert len(chunks) == 31
+    assert chunks[-1]["text"].endswith("a49")
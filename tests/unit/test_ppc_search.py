@@ -0,0 +1,141 @@
+"""
+Testes da busca no PPC (src/services/search/ppc_search.py)
+"""
+
+import json
+import os
+from difflib import SequenceMatcher
+
+import pytest
+
+from src.services.search.ppc_search import PPCSearch, RANKING_BM25, RANKING_HEURISTIC
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PPC_CHUNKS_FILE = os.path.join(PROJECT_ROOT, "data", "qa", "public", "ppc_chunks.json")
+
+HEURISTIC_QUERIES = [
+    "quantas horas de estágio?",
+    "como faço o TCC?",
+    "qual a carga horária do curso",
+    "requisitos para colação de grau",
+    "matrícula em disciplinas optativas",
+    "cursos",
+    "que",
+]
+
+CHUNKS = [
+    {"id": "chunk_1", "text": "O estágio supervisionado tem carga horária de 160 horas.",
+     "keywords": ["estágio", "carga horária"], "section": "estágio"},
+    {"id": "chunk_2", "text": "A matrícula é feita a cada semestre pelo SIGAA.",
+     "keywords": ["matrícula", "semestre"], "section": "matrícula"},
+    {"id": "chunk_3", "text": "O curso de Engenharia de Software forma profissionais que atuam no mercado.",
+     "keywords": ["curso", "engenharia", "software"], "section": "geral"},
+    {"id": "chunk_4", "text": "O trabalho de conclusão de curso (TCC) é desenvolvido em duas disciplinas.",
+     "keywords": ["curso", "disciplina"], "section": "disciplinas"},
+]
+
+@pytest.fixture
+def chunks_file(tmp_path):
+    path = tmp_path / "ppc_chunks.json"
+    path.write_text(json.dumps({"chunks": CHUNKS}, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+def test_bm25_ignora_consulta_so_com_palavras_funcionais(chunks_file):
+    search = PPCSearch(chunks_file, ranking=RANKING_BM25)
+
+    assert search.search_ppc("que") == []
+    assert search.search_ppc("quero saber sobre isso") == []
+
+def test_bm25_encontra_termo_relevante(chunks_file):
+    search = PPCSearch(chunks_file, ranking=RANKING_BM25)
+
+    results = search.search_ppc("quantas horas de estágio?")
+
+    assert results[0]["chunk"]["id"] == "chunk_1"
+
+def test_bm25_aplica_score_minimo(chunks_file):
+    search = PPCSearch(chunks_file, ranking=RANKING_BM25)
+    best_score = search.search_ppc("matrícula")[0]["score"]
+
+    strict = PPCSearch(chunks_file, ranking=RANKING_BM25, min_score=best_score + 0.01)
+
+    assert strict.search_ppc("matrícula") == []
+
+def _full_scan_score(query, chunk):
+    """Score heurístico original, calculado chunk a chunk sem índice"""
+    chunk_text = chunk['text'].lower()
+    chunk_keywords = [k.lower() for k in chunk.get('keywords', [])]
+
+    keyword_matches = sum(1 for keyword in chunk_keywords if keyword in query)
+    term_matches = sum(1 for term in query.split() if len(term) > 2 and term in chunk_text)
+    text_similarity = SequenceMatcher(None, query, chunk_text).ratio()
+
+    section_bonus = 0
+    if chunk.get('section') == 'estágio' and 'estágio' in query:
+        section_bonus = 0.3
+    elif chunk.get('section') == 'matrícula' and 'matrícula' in query:
+        section_bonus = 0.3
+    elif chunk.get('section') == 'disciplinas' and 'disciplina' in query:
+        section_bonus = 0.3
+
+    return (keyword_matches * 0.3) + (term_matches * 0.25) + (text_similarity * 0.25) + section_bonus
+
+def _full_scan(chunks, query, max_chunks):
+    query = query.lower()
+    scored = [(chunk, _full_scan_score(query, chunk)) for chunk in chunks]
+    scored = [(chunk, score) for chunk, score in scored if score > 0.1]
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return [(chunk['id'], score) for chunk, score in scored[:max_chunks]]
+
+@pytest.mark.parametrize("query", HEURISTIC_QUERIES)
+def test_heuristico_igual_a_varredura_completa(query):
+    search = PPCSearch(PPC_CHUNKS_FILE, ranking=RANKING_HEURISTIC)
+
+    results = [(item['chunk']['id'], item['score']) for item in search.search_ppc(query, max_chunks=5)]
+
+    assert results == _full_scan(search.chunks, query, 5)
+
+def test_heuristico_casa_substring_dos_termos(chunks_file):
+    search = PPCSearch(chunks_file, ranking=RANKING_HEURISTIC)
+
+    # "atua" é substring de "atuam": o chunk entra mesmo sem o token exato
+    ids = [item['chunk']['id'] for item in search.search_ppc("onde atua", max_chunks=4)]
+
+    assert ids == ["chunk_3"]
+
+def test_busca_aplica_mudancas_do_arquivo_de_chunks(chunks_file):
+    search = PPCSearch(chunks_file, ranking=RANKING_BM25, refresh_interval=0)
+    assert search.search_ppc("matrícula")[0]["chunk"]["id"] == "chunk_2"
+
+    changed = [chunk for chunk in CHUNKS if chunk["id"] != "chunk_2"] + [
+        {"id": "chunk_5", "text": "A colação de grau acontece ao final do curso.",
+         "keywords": ["curso"], "section": "geral"},
+    ]
+    with open(chunks_file, "w", encoding="utf-8") as f:
+        json.dump({"chunks": changed}, f, ensure_ascii=False)
+    os.utime(chunks_file, (0, 0))
+
+    assert search.search_ppc("matrícula") == []
+    assert search.search_ppc("colação de grau")[0]["chunk"]["id"] == "chunk_5"
+    assert len([chunk for chunk in search.chunks if chunk is not None]) == 4
+
+@pytest.mark.parametrize("query", HEURISTIC_QUERIES)
+def test_heuristico_igual_a_varredura_completa_apos_mudancas(query):
+    search = PPCSearch(PPC_CHUNKS_FILE, ranking=RANKING_HEURISTIC)
+    removed = [chunk["id"] for chunk in search.chunks[::3]]
+    edited = {**search.chunks[1], "text": "Novo texto sobre a carga horária do estágio e do TCC."}
+    search.apply_chunk_changes([edited], removed)
+
+    live_chunks = [chunk for chunk in search.chunks if chunk is not None]
+    results = [(item['chunk']['id'], item['score']) for item in search.search_ppc(query, max_chunks=5)]
+
+    assert results == _full_scan(live_chunks, query, 5)
+
+def test_recarga_nao_sobrescreve_tempo_de_inicializacao(chunks_file, monkeypatch):
+    from src.utils.timing import STARTUP_TIMINGS
+
+    search = PPCSearch(chunks_file, ranking=RANKING_BM25)
+    monkeypatch.setitem(STARTUP_TIMINGS, "ppc_search", -1.0)
+    search.load_chunks()
+
+    assert STARTUP_TIMINGS["ppc_search"] == -1.0
@@ -0,0 +1,102 @@
+"""
+Testes do QAMatcher (src/services/search/qa_matcher.py)
+
+O contrato do QAMatcher é dar exatamente o score de advanced_similarity,
+o cálculo original item a item; a referência abaixo reproduz esse cálculo.
+"""
+
+import json
+import os
+from difflib import SequenceMatcher
+
+import pytest
+
+from src.services.search import qa_matcher
+from src.services.search.qa_matcher import QAMatcher
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+QA_FILE = os.path.join(PROJECT_ROOT, "data", "qa", "public", "perguntas_respostas_melhorado.json")
+
+QUERIES = [
+    "Qual o calendário acadêmico?",
+    "quando começam as aulas do semestre",
+    "como faço minha matrícula no sigaa",
+    "matric",
+    "quero saber sobre estágio obrigatório",
+    "horas complementares",
+    "TCC",
+    "xyzzy plugh",
+    "",
+]
+
+def advanced_similarity(query, item):
+    """Score original (antes do QAMatcher), calculado item a item"""
+    query_lower = query.lower()
+
+    main_score = SequenceMatcher(None, query_lower, item["pergunta"].lower()).ratio()
+    variation_scores = [
+        SequenceMatcher(None, query_lower, variacao.lower()).ratio()
+        for variacao in item.get("variacoes", [])
+    ]
+    max_variation_score = max(variation_scores) if variation_scores else 0
+
+    tag_score = 0
+    for tag in item.get("tags", []):
+        if tag.lower() in query_lower:
+            tag_score += 0.3
+
+    keyword_score = 0
+    for word in query_lower.split():
+        if len(word) > 3:
+            for variacao in item.get("variacoes", []):
+                if word in variacao.lower():
+                    keyword_score += 0.2
+
+    final_score = max(main_score, max_variation_score) * 0.6 + tag_score * 0.2 + keyword_score * 0.2
+    return min(final_score, 1.0)
+
+@pytest.fixture(scope="module")
+def qa_items():
+    with open(QA_FILE, encoding="utf-8") as f:
+        return json.load(f)["qa_items"]
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_score_igual_a_advanced_similarity(qa_items, query):
+    matcher = QAMatcher(qa_items)
+
+    for item_id, item in enumerate(qa_items):
+        assert matcher.score(query, item_id) == advanced_similarity(query, item)
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("min_score", [0.0, 0.3, 0.5])
+def test_match_igual_a_varredura_completa(qa_items, query, min_score):
+    matcher = QAMatcher(qa_items)
+
+    expected = [(item, advanced_similarity(query, item)) for item in qa_items]
+    expected = [(item, score) for item, score in expected if score > min_score]
+    expected.sort(key=lambda x: x[1], reverse=True)
+
+    assert matcher.match(query, min_score=min_score) == expected
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_best_match_igual_ao_primeiro_da_varredura(qa_items, query):
+    matcher = QAMatcher(qa_items)
+
+    scored = sorted(
+        ((item, advanced_similarity(query, item)) for item in qa_items),
+        key=lambda x: x[1], reverse=True
+    )
+    expected = scored[0] if scored and scored[0][1] >= 0.5 else None
+
+    assert matcher.best_match(query, min_score=0.5) == expected
+
+def test_cache_de_palavras_das_consultas_e_limitado(qa_items, monkeypatch):
+    monkeypatch.setattr(qa_matcher, "QUERY_WORD_CACHE_SIZE", 8)
+    matcher = QAMatcher(qa_items)
+    vocabulary_size = len(matcher._word_index)
+
+    for number in range(50):
+        matcher.match(f"palavra{number} inexistente{number}")
+
+    assert len(matcher._word_index) == vocabulary_size
+    assert len(matcher._query_word_cache) == 8
@@ -0,0 +1,63 @@
+"""
+Testes do cache de respostas do FLAN-T5 (src/services/ai/response_cache.py)
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+from src.services.ai import response_cache as cache_module
+from src.services.ai.response_cache import ResponseCache
+from src.services.search.ppc_search import PPCSearch
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+def test_chave_normaliza_a_pergunta_e_depende_do_contexto():
+    key = ResponseCache.make_key("  Quantas HORAS de estágio? ", "contexto")
+    assert key == ResponseCache.make_key("quantas horas de estágio", "contexto")
+    assert key != ResponseCache.make_key("quantas horas de estágio", "outro contexto")
+    assert ResponseCache.make_key("pergunta", None) == ResponseCache.make_key("pergunta", "")
+
+def test_entrada_expira_apos_o_ttl(clock):
+    cache = ResponseCache(max_size=4, ttl=60)
+    key = cache.make_key("pergunta", "contexto")
+    cache.set(key, "resposta")
+
+    clock[0] += 59
+    assert cache.get(key) == "resposta"
+    clock[0] += 2
+    assert cache.get(key) is None
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_descarta_a_entrada_menos_usada(clock):
+    cache = ResponseCache(max_size=2, ttl=60)
+    cache.set(("a", ""), "A")
+    cache.set(("b", ""), "B")
+    cache.get(("a", ""))
+    cache.set(("c", ""), "C")
+
+    assert cache.get(("b", "")) is None
+    assert cache.get(("a", "")) == "A" and cache.get(("c", "")) == "C"
+
+def test_recarga_dos_chunks_invalida_o_cache(tmp_path):
+    cache = ResponseCache(max_size=4, ttl=60)
+    cache.set(cache.make_key("pergunta", "contexto"), "resposta")
+
+    chunks_file = tmp_path / "ppc_chunks.json"
+    chunks_file.write_text(json.dumps({"chunks": [
+        {"id": "1", "text": "O estágio curricular tem 400 horas", "section": "estágio"},
+    ]}, ensure_ascii=False), encoding="utf-8")
+    search = PPCSearch(str(chunks_file))
+    search.ensure_loaded()
+    search.add_reload_listener(cache.clear)
+    search.apply_chunk_changes([{"id": "2", "text": "O TCC é individual", "section": "tcc"}])
+
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,76 @@
+"""
+Testes da seleção de blobs pela retenção (src/services/storage/retention.py)
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+
+from src.services.storage.retention import run_retention
+from src.services.storage.vercel_storage import ANALYTICS_SEGMENT_TIME_FORMAT, SEGMENT_TIME_FORMAT
+
+class FakeStorage:
+    """Só a listagem: com dry_run nada é baixado, gravado ou removido"""
+
+    def __init__(self, blobs):
+        self.blobs = blobs
+
+    def list_blobs(self, prefix=None):
+        return iter(self.blobs)
+
+def _uploaded(days_ago: float) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days_ago)).isoformat().replace("+00:00", "Z")
+
+def _blob(pathname, uploaded_days_ago=0.0):
+    return {"pathname": pathname, "url": f"https://blob.test/{pathname}", "uploadedAt": _uploaded(uploaded_days_ago)}
+
+def _segment(user_id, days_ago, suffix="abc123.ndjson", uploaded_days_ago=None):
+    # Nome no horário local do servidor, como em conversation_segment_name
+    stamp = (datetime.now() - timedelta(days=days_ago)).strftime(SEGMENT_TIME_FORMAT)
+    return _blob(f"conversations/{user_id}/{stamp}_{suffix}",
+                 days_ago if uploaded_days_ago is None else uploaded_days_ago)
+
+def _run(blobs, **kwargs):
+    return run_retention(FakeStorage(blobs), analytics_days=90, rollup_hours=24,
+                         conversation_days=180, dry_run=True, **kwargs)
+
+def test_inatividade_vem_do_nome_mesmo_com_upload_recente():
+    # Segmento compactado pela retenção ontem, mas com último turno há 200 dias
+    report = _run([_segment(1, 200, suffix="compact.ndjson", uploaded_days_ago=1)])
+    assert report["conversation_users_expired"] == 1
+    assert report["deleted"] == 1
+
+def test_usuario_ativo_com_varios_segmentos_e_compactado():
+    report = _run([_segment(1, 200), _segment(1, 2), _segment(2, 3)])
+    assert report.get("conversation_users_expired", 0) == 0
+    # Só o usuário 1 tem mais de um segmento
+    assert report["conversation_users_compacted"] == 1
+
+def test_documento_antigo_usa_o_horario_do_upload():
+    report = _run([_blob("conversations_5.json", uploaded_days_ago=365), _blob("conversations_6.json", 10)])
+    assert report["conversation_users_expired"] == 1
+    assert report["deleted"] == 1
+
+def test_documento_antigo_nao_expira_usuario_com_segmento_recente():
+    report = _run([_blob("conversations_5.json", uploaded_days_ago=365), _segment(5, 1)])
+    assert report.get("conversation_users_expired", 0) == 0
+
+def test_analytics_expirados_e_eventos_avulsos_para_juntar():
+    old_segment = (datetime.now() - timedelta(days=100)).strftime(ANALYTICS_SEGMENT_TIME_FORMAT)
+    recent_segment = (datetime.now() - timedelta(days=5)).strftime(ANALYTICS_SEGMENT_TIME_FORMAT)
+    report = _run([
+        # Regravado há pouco, mas com eventos de 100 dias atrás
+        _blob(f"analytics_segment_{old_segment}_aaaa.ndjson", uploaded_days_ago=1),
+        _blob(f"analytics_segment_{recent_segment}_bbbb.ndjson", uploaded_days_ago=5),
+        _blob("analytics_message_11111111.json", uploaded_days_ago=120),
+        _blob("analytics_message_22222222.json", uploaded_days_ago=2),
+        _blob("analytics_message_33333333.json", uploaded_days_ago=0.1),
+        _blob("user_data_1.json", uploaded_days_ago=400),
+    ])
+    assert report["listed"] == 6
+    assert report["analytics_expired"] == 2
+    assert report["analytics_rolled_up"] == 1
+    assert report["deleted"] == 2
@@ -0,0 +1,69 @@
+"""
+Testes da serialização dos blobs (src/services/storage/serializers.py)
+"""
+
+import json
+
+import pytest
+
+from src.services.storage.serializers import (
+    FORMAT_GZIP,
+    FORMAT_JSON,
+    FORMAT_MSGPACK,
+    FORMAT_ZSTD,
+    content_type,
+    decode,
+    decode_records,
+    encode,
+    encode_records,
+)
+
+DOCUMENT = {"user_id": 1, "nome": "Ação", "tags": ["estágio", "tcc"], "ativo": True}
+RECORDS = [
+    {"timestamp": "2025-03-01T10:00:00", "message": "Olá", "response": "Oi"},
+    {"timestamp": "2025-03-01T10:01:00", "message": "Estágio?", "response": "400 horas"},
+]
+
+def _available(fmt):
+    """Formato, ou pulado se o pacote opcional não estiver instalado"""
+    if fmt == FORMAT_ZSTD:
+        pytest.importorskip("zstandard")
+    if fmt == FORMAT_MSGPACK:
+        pytest.importorskip("msgpack")
+    return fmt
+
+FORMATS = [FORMAT_JSON, FORMAT_GZIP, FORMAT_ZSTD, FORMAT_MSGPACK]
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_documento_ida_e_volta(fmt):
+    assert decode(encode(DOCUMENT, _available(fmt))) == DOCUMENT
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_registros_ida_e_volta(fmt):
+    assert decode_records(encode_records(RECORDS, _available(fmt))) == RECORDS
+
+def test_json_nao_tem_marcador_e_registros_sao_ndjson():
+    assert encode(DOCUMENT, FORMAT_JSON).startswith(b"{")
+    lines = encode_records(RECORDS, FORMAT_JSON).decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == RECORDS
+    assert content_type(FORMAT_JSON, records=True) == "application/x-ndjson"
+    assert content_type(FORMAT_GZIP, records=True) == "application/octet-stream"
+
+def test_gzip_grava_com_marcador_de_formato():
+    assert encode(DOCUMENT, FORMAT_GZIP).startswith(b"\x00gzip\x00")
+
+def test_le_json_indentado_gravado_antes_da_camada():
+    legacy = json.dumps(DOCUMENT, ensure_ascii=False, indent=2).encode("utf-8")
+    assert decode(legacy) == DOCUMENT
+    assert decode(legacy.decode("utf-8")) == DOCUMENT
+
+def test_le_ndjson_gravado_antes_da_camada():
+    legacy = "\n".join(json.dumps(record, ensure_ascii=False) for record in RECORDS) + "\n\n"
+    assert decode_records(legacy.encode("utf-8")) == RECORDS
+    assert decode_records(legacy) == RECORDS
+
+def test_formato_invalido_levanta_erro():
+    with pytest.raises(ValueError):
+        encode(DOCUMENT, "xml")
+    with pytest.raises(ValueError):
+        decode(b"\x00xml\x00<a/>")
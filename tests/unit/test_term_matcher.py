@@ -0,0 +1,57 @@
+"""
+Testes do TermMatcher (src/utils/term_matcher.py)
+
+Os dois caminhos sem pyahocorasick (autômato em Python e busca termo a
+termo) devem dar o mesmo resultado que `in`/str.find.
+"""
+
+import pytest
+
+from src.utils import term_matcher
+from src.utils.term_matcher import TermMatcher
+
+TERMS = ['estágio', 'carga horária', 'horária', 'ária', 'curso', 'cursos', 'aa', 'a', '']
+TEXTS = [
+    'o estágio tem carga horária de 160 horas; a carga horária do curso é de 3200 horas',
+    'cursos de graduação',
+    'aaaa',
+    '',
+]
+
+@pytest.fixture(params=["loop", "automaton"])
+def matcher(request, monkeypatch):
+    monkeypatch.setattr(term_matcher, "ahocorasick", None)
+    monkeypatch.setattr(term_matcher, "AUTOMATON_MIN_TERMS", 1000 if request.param == "loop" else 0)
+    return TermMatcher(TERMS)
+
+def _expected_positions(text):
+    positions = {}
+    for term in filter(None, dict.fromkeys(TERMS)):
+        start = text.find(term)
+        while start != -1:
+            positions.setdefault(term, []).append(start)
+            start = text.find(term, start + 1)
+    return positions
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_present_igual_a_in(matcher, text):
+    assert matcher.present(text) == {term for term in TERMS if term and term in text}
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_find_all_e_counts_iguais_a_find(matcher, text):
+    expected = _expected_positions(text)
+
+    assert matcher.find_all(text) == expected
+    assert matcher.counts(text) == {term: len(positions) for term, positions in expected.items()}
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_iter_matches_ordenado_pela_posicao_final(matcher, text):
+    ends = [position + len(term) for position, term in matcher.iter_matches(text)]
+
+    assert ends == sorted(ends)
+
+def test_vocabulario_pequeno_nao_compila_automato(monkeypatch):
+    monkeypatch.setattr(term_matcher, "ahocorasick", None)
+
+    assert TermMatcher(TERMS)._transitions is None
+    assert TermMatcher([f"termo{number}" for number in range(term_matcher.AUTOMATON_MIN_TERMS)])._transitions is not None
@@ -0,0 +1,111 @@
+"""
+Testes do histórico segmentado de conversas (src/services/storage/vercel_storage.py)
+"""
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+
+from src.services.storage.serializers import FORMAT_JSON, encode
+from src.services.storage.vercel_storage import (
+    SegmentCounter,
+    VercelBlobStorage,
+    compacted_segment_name,
+    conversation_segment_time,
+    legacy_conversations_name,
+)
+
+def _storage(**kwargs):
+    storage = VercelBlobStorage(**kwargs)
+    storage.blob_token = "token"
+    return storage
+
+def _segments(blob_api, user_id):
+    return sorted(name for name in blob_api.blobs if name.startswith(f"conversations/{user_id}/"))
+
+def test_cada_turno_vira_um_segmento_lido_em_ordem(blob_api):
+    storage = _storage(conversation_compact_every=100)
+    for i in range(3):
+        assert storage.store_conversation(1, f"pergunta {i}", f"resposta {i}")
+
+    assert len(_segments(blob_api, 1)) == 3
+    conversations = storage.get_conversations(1)
+    assert [c["message"] for c in conversations] == ["pergunta 0", "pergunta 1", "pergunta 2"]
+    assert [c["message"] for c in storage.get_conversations(1, limit=2)] == ["pergunta 1", "pergunta 2"]
+
+def test_compactacao_mantem_as_ultimas_conversas_em_um_segmento(blob_api):
+    storage = _storage(conversation_compact_every=4, conversation_history_limit=3)
+    for i in range(4):
+        storage.store_conversation(1, f"pergunta {i}", "resposta")
+
+    segments = _segments(blob_api, 1)
+    assert len(segments) == 1
+    assert segments[0].endswith("_compact.ndjson")
+    assert [c["message"] for c in storage.get_conversations(1)] == ["pergunta 1", "pergunta 2", "pergunta 3"]
+
+def test_segmento_compactado_mantem_o_horario_do_ultimo_turno():
+    last = "conversations/1/20250301120000000000_abc123.ndjson"
+    compacted = compacted_segment_name(1, last)
+    assert compacted == "conversations/1/20250301120000000000_compact.ndjson"
+    assert conversation_segment_time(compacted) == conversation_segment_time(last)
+    assert conversation_segment_time("conversations_1.json") is None
+
+def test_gravacao_so_lista_quando_a_compactacao_esta_na_hora(blob_api):
+    storage = _storage(conversation_compact_every=10)
+    for i in range(25):
+        storage.store_conversation(7, f"pergunta {i}", "resposta")
+
+    # Uma listagem a cada 10 gravações, e não uma por gravação
+    assert blob_api.lists == 2
+    # Compactado + os 6 turnos gravados depois da última compactação
+    assert len(_segments(blob_api, 7)) == 7
+
+def test_contagem_local_recomeca_apos_remover_historico(blob_api):
+    storage = _storage(conversation_compact_every=3)
+    storage.store_conversation(1, "a", "b")
+    storage.store_conversation(1, "c", "d")
+    assert storage.delete_conversations(1)
+    assert _segments(blob_api, 1) == []
+
+    lists = blob_api.lists
+    storage.store_conversation(1, "e", "f")
+    storage.store_conversation(1, "g", "h")
+    assert blob_api.lists == lists
+
+def test_segment_counter_avisa_ao_atingir_o_limite():
+    counter = SegmentCounter(compact_every=3)
+    counter.listed(1, 1)
+    assert not counter.added(1)
+    assert counter.added(1)
+    counter.listed(1, 1)
+    assert not counter.added(1)
+
+def test_le_documento_do_formato_antigo_depois_dos_segmentos(blob_api):
+    blob_api.blobs[legacy_conversations_name(1)] = encode({"conversations": [
+        {"timestamp": "2024-01-01T10:00:00", "message": "antiga", "response": "r"},
+    ]}, FORMAT_JSON)
+    storage = _storage()
+    storage.store_conversation(1, "nova", "r")
+
+    assert [c["message"] for c in storage.get_conversations(1)] == ["antiga", "nova"]
+
+def test_usuario_sem_documento_antigo_nao_lista_de_novo(blob_api):
+    storage = _storage()
+    storage.store_conversation(1, "pergunta", "resposta")
+    storage.get_conversations(1)
+
+    lists = blob_api.lists
+    storage.get_conversations(1)
+    # Só a listagem dos segmentos; a ausência do documento antigo fica lembrada
+    assert blob_api.lists == lists + 1
+
+def test_dados_do_usuario_e_listagem_paginada(blob_api):
+    blob_api.page_size = 2
+    storage = _storage(list_page_size=2)
+    for user_id in range(5):
+        assert storage.store_user_data(user_id, {"nome": f"aluno {user_id}"})
+
+    assert len(list(storage.list_blobs(prefix="user_data_"))) == 5
+    data = _storage().get_user_data(3)
+    assert data["nome"] == "aluno 3" and data["user_id"] == 3